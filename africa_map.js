@@ -21,22 +21,19 @@ const tooltip = d3.select("body").append("div")
   .style("opacity", 0);
 
 let countryPaths, dataMap = {}, selectedFocus = "all", selectedClass = "all";
+let lastClickedCountry = null; // Guards against shard responses arriving out of order
 let currentMapView = 'country'; // 'country' or 'region'
-let regionGeoData = null; // Aggregated GeoJSON for regions
-let regionDataMap = {};   // Aggregated policy data for regions
+let regionGeoData = null; // Merged region shapes, prebuilt by scripts/geo_build.py
 
-// --- Declare geoData and policyData globally ---
+// Simplification level of the prebuilt TopoJSON (see scripts/geo_build.py):
+// "full", "medium" or "low". Small screens get the lightest geometry.
+const GEOMETRY_LEVEL = width < 600 ? "low" : "medium";
+let regionDataMap = {};   // Region summaries, prebuilt by scripts/policy_export.py
+
+// --- Declare geoData and the policy summary globally ---
 let geoData = null;
-let policyData = null;
-
-// --- IMPORTANT: DEFINING REGIONS HERE ---
-const regionDefinitions = {
-    "North Africa": ["Algeria", "Egypt", "Libya", "Morocco", "Sudan", "Tunisia", "Western Sahara"],
-    "West Africa": ["Benin", "Burkina Faso", "Cape Verde", "The Gambia", "Ghana", "Guinea", "Guinea-Bissau", "Côte d'Ivoire", "Liberia", "Mali", "Mauritania", "Niger", "Nigeria", "Senegal", "Sierra Leone", "Togo"],
-    "Central Africa": ["Burundi", "Cameroon", "Central African Republic", "Chad", "Democratic Republic of Congo", "Republic of Congo", "Equatorial Guinea", "Gabon", "São Tomé & Príncipe"],
-    "East Africa": ["Comoros", "Djibouti", "Eritrea", "Ethiopia", "Kenya", "Madagascar", "Mauritius", "Rwanda", "Seychelles", "Somalia", "South Sudan", "Tanzania", "Uganda"],
-    "Southern Africa": ["Angola", "Botswana", "Eswatini", "Lesotho", "Malawi", "Mozambique", "Namibia", "South Africa", "Zambia", "Zimbabwe"],
-};
+let policySummary = null; // Per-country counts for the first screen (see scripts/policy_export.py)
+let facetIndex = null; // Focus/class/country co-occurrence lookups (see scripts/policy_export.py)
 
 // --- NEW: Color Scale for Regions ---
 let regionColorScale; // Declare globally
@@ -111,125 +108,84 @@ const createBarChartContainer = (parentSelection, titleText) => {
 };
 
 
-// Prepare Regional Data and GeoJSON 
-function prepareRegionalData(allGeoData, allPolicyData) {
-    // 1. Aggregate Policy Data
-    Object.keys(regionDefinitions).forEach(regionName => {
-        const countriesInRegion = regionDefinitions[regionName];
-        const aggregatedRegionDetails = {
-            "Government document": [],
-            "Focus areas Raw": [], // <<< NEW: Store raw list for actual counts
-            "Policy class Raw": [], // <<< NEW: Store raw list for actual counts
-            "Focus areas": new Set(), // Still keep for unique list (for filters, general display)
-            "Policy class": new Set(), // Still keep for unique list (for filters, general display)
-            "action or strategy": new Set(),
-            "Policy promotes youth employment": false,
-            "Policy promotes women employment": false,
-            "policy promotes employment of people with disabilities": false,
-            "total_documents": 0,
-            "countries": []
-        };
-
-        countriesInRegion.forEach(countryName => {
-            const countryDetails = dataMap[countryName];
-            if (countryDetails) {
-                aggregatedRegionDetails["Government document"].push(...countryDetails["Government document"]);
-                
-                // --- CRITICAL CHANGE FOR COUNTING FOCUS AREAS ---
-                if (countryDetails["Focus areas"]) {
-                    aggregatedRegionDetails["Focus areas Raw"].push(...countryDetails["Focus areas"]); // Add all occurrences
-                    countryDetails["Focus areas"].forEach(f => aggregatedRegionDetails["Focus areas"].add(f)); // Add to Set for unique list
-                }
-                
-                // --- CRITICAL CHANGE FOR COUNTING POLICY CLASS ---
-                if (countryDetails["Policy class"]) {
-                    aggregatedRegionDetails["Policy class Raw"].push(...countryDetails["Policy class"]); // Add all occurrences
-                    countryDetails["Policy class"].forEach(c => aggregatedRegionDetails["Policy class"].add(c)); // Add to Set for unique list
-                }
+// --- Per-country shards: full records are only fetched when a country is clicked ---
+// A small LRU cache of shard promises, so repeated clicks (and concurrent ones) fetch once.
+const SHARD_CACHE_SIZE = 12;
+const shardCache = new Map();
 
-                countryDetails["action or strategy"].forEach(a => aggregatedRegionDetails["action or strategy"].add(a));
-                
-                if (countryDetails["Policy promotes youth employment"] === "Yes") aggregatedRegionDetails["Policy promotes youth employment"] = true;
-                if (countryDetails["Policy promotes women employment"] === "Yes") aggregatedRegionDetails["Policy promotes women employment"] = true;
-                if (countryDetails["policy promotes employment of people with disabilities"] === "Yes") aggregatedRegionDetails["policy promotes employment of people with disabilities"] = true;
-                
-                // --- Use the unique count of "Government document" for total_documents ---
-                aggregatedRegionDetails["total_documents"] = [...new Set(aggregatedRegionDetails["Government document"])].length;
-                aggregatedRegionDetails["countries"].push(countryName);
-            }
-        });
+function loadCountryShard(name) {
+    let shard = shardCache.get(name);
+    if (shard) {
+        shardCache.delete(name); // re-insert to mark as most recently used
+    } else {
+        shard = d3.json(`/data/${policySummary.countries[name].shard}`);
+        shard.catch(() => shardCache.delete(name)); // let a failed fetch be retried
+    }
+    shardCache.set(name, shard);
+    if (shardCache.size > SHARD_CACHE_SIZE) {
+        shardCache.delete(shardCache.keys().next().value);
+    }
+    return shard;
+}
 
-        // Convert Sets back to Arrays for the unique lists
-        aggregatedRegionDetails["Focus areas"] = Array.from(aggregatedRegionDetails["Focus areas"]);
-        aggregatedRegionDetails["Policy class"] = Array.from(aggregatedRegionDetails["Policy class"]);
-        
-        // Convert action or strategy Set to Array
-        aggregatedRegionDetails["action or strategy"] = Array.from(aggregatedRegionDetails["action or strategy"]);
-        
-        // Convert boolean flags to "Yes"/"No" strings
-        aggregatedRegionDetails["Policy promotes youth employment"] = aggregatedRegionDetails["Policy promotes youth employment"] ? "Yes" : "No";
-        aggregatedRegionDetails["Policy promotes women employment"] = aggregatedRegionDetails["Policy promotes women employment"] ? "Yes" : "No";
-        aggregatedRegionDetails["policy promotes employment of people with disabilities"] = aggregatedRegionDetails["policy promotes employment of employment of people with disabilities"] ? "Yes" : "No";
-
-        regionDataMap[regionName] = aggregatedRegionDetails;
-    });
+// Number of rows of a country matching the selected focus and class, from the summary's
+// [focus id, class id, count] entries (ids index policySummary.focus / policySummary.class)
+function matchedRowCount(details, focus, cls) {
+    return details.rows
+        .filter(([f, c]) =>
+            filterMatches(f === null ? null : policySummary.focus[f], focus) &&
+            filterMatches(c === null ? null : policySummary.class[c], cls))
+        .reduce((total, [, , count]) => total + count, 0);
+}
 
-    // 2. Aggregate GeoJSON 
-    if (allGeoData.type === "FeatureCollection" && allGeoData.features && typeof topojson !== 'undefined' && typeof topojson.topology === 'function') {
-        const mergedFeatures = [];
-        Object.keys(regionDefinitions).forEach(regionName => {
-            const countriesInRegion = regionDefinitions[regionName];
-            
-            const countryFeatures = allGeoData.features.filter(f =>
-                countriesInRegion.includes(f.properties.name) && f.geometry
-            );
-            
-            if (countryFeatures.length > 0) {
-                try {
-                    const tempTopology = topojson.topology({ 
-                        collection: { type: "FeatureCollection", features: countryFeatures } 
-                    }); 
-                    
-                    if (tempTopology.objects && tempTopology.objects.collection && tempTopology.objects.collection.geometries) {
-                        const mergedGeometry = topojson.merge(tempTopology, tempTopology.objects.collection.geometries);
-
-                        mergedFeatures.push({
-                            type: "Feature",
-                            geometry: mergedGeometry,
-                            properties: { name: regionName }
-                        });
-                    } else {
-                        console.warn(`WARNING: Topology for region ${regionName} (Countries: ${countriesInRegion.join(', ')}) did not produce expected 'objects.collection.geometries' structure. Topology output:`, tempTopology);
-                    }
-                } catch (e) {
-                    console.error(`ERROR during topojson.topology/merge for region ${regionName} (Countries: ${countriesInRegion.join(', ')}):`, e);
-                }
-            } else {
-                console.warn(`WARNING: No valid GeoJSON features found for region ${regionName} to merge.`);
-            }
-        });
-        regionGeoData = { type: "FeatureCollection", features: mergedFeatures };
+// Names of a country's focus areas and policy classes
+function summaryNames(details, position, names) {
+    return [...new Set(details.rows.map(row => row[position]).filter(i => i !== null))].map(i => names[i]);
+}
 
-        // --- NEW: Initialize the regionColorScale after regionDataMap is populated ---
-        const totalDocumentCounts = Object.values(regionDataMap)
-            .map(d => d.total_documents)
-            .filter(count => count > 0); // Only consider regions with documents for the scale
 
-        if (totalDocumentCounts.length > 0) {
-            const minDocs = d3.min(totalDocumentCounts);
-            const maxDocs = d3.max(totalDocumentCounts);
+// --- Prepare the facet index: name -> id maps and a lookup for focus/class pairs ---
+function prepareFacetIndex(raw) {
+    const toIds = names => new Map(names.map((name, i) => [name, i]));
+    const pairCountries = new Map();
+    raw.pairs.forEach(([f, c, countries]) => pairCountries.set(`${f},${c}`, countries));
+    return { ...raw, focusIds: toIds(raw.focus), classIds: toIds(raw.class), pairCountries };
+}
+
+// Names of the countries with at least one row matching the selected focus and class
+function matchingCountryNames(focus, cls) {
+    const f = facetIndex.focusIds.get(focus);
+    const c = facetIndex.classIds.get(cls);
+    let ids;
+    if (focus === "all" && cls === "all") {
+        return new Set(facetIndex.countries);
+    } else if (cls === "all") {
+        ids = f === undefined ? [] : facetIndex.focus_countries[f];
+    } else if (focus === "all") {
+        ids = c === undefined ? [] : facetIndex.class_countries[c];
+    } else {
+        ids = facetIndex.pairCountries.get(`${f},${c}`) || [];
+    }
+    return new Set(ids.map(i => facetIndex.countries[i]));
+}
 
-            regionColorScale = d3.scaleQuantize()
-                .domain([minDocs, maxDocs])
-                .range(["#fef0d9", "#fdcd8f", "#fc8d59", "#e34a33", "#b30000"]); // Example color range (light to dark red/orange)
-        } else {
-            // Fallback if no regions have documents
-            regionColorScale = d3.scaleQuantize().domain([0, 1]).range(["#e5e7eb"]);
-        }
 
+// Color scale for the region view, based on the prebuilt document counts per region
+function prepareRegionColorScale() {
+    const totalDocumentCounts = Object.values(regionDataMap)
+        .map(d => d.total_documents)
+        .filter(count => count > 0); // Only consider regions with documents for the scale
+
+    if (totalDocumentCounts.length > 0) {
+        const minDocs = d3.min(totalDocumentCounts);
+        const maxDocs = d3.max(totalDocumentCounts);
+
+        regionColorScale = d3.scaleQuantize()
+            .domain([minDocs, maxDocs])
+            .range(["#fef0d9", "#fdcd8f", "#fc8d59", "#e34a33", "#b30000"]); // Example color range (light to dark red/orange)
     } else {
-        console.warn("GeoData is not a GeoJSON FeatureCollection or topojson.topology function is missing. Regional shapes cannot be merged. Display might be affected.");
-        regionGeoData = { type: "FeatureCollection", features: [] }; 
+        // Fallback if no regions have documents
+        regionColorScale = d3.scaleQuantize().domain([0, 1]).range(["#e5e7eb"]);
     }
 }
 
@@ -299,25 +255,20 @@ function drawMap() {
             let tooltipHtml = `<strong>${name}</strong><br/>`;
 
             if (currentMapView === 'country') {
-                const allFocus = [...new Set(details["Focus areas"])];
-                const allClasses = [...new Set(details["Policy class"])];
-                const allDocs = details["Government document"];
-
-                const matchedDocsCount = allDocs.filter((doc, i) =>
-                    filterMatches(details["Focus areas"][i], selectedFocus) &&
-                    filterMatches(details["Policy class"][i], selectedClass)
-                ).length;
+                const allFocus = summaryNames(details, 0, policySummary.focus);
+                const allClasses = summaryNames(details, 1, policySummary.class);
+                const matchedDocsCount = matchedRowCount(details, selectedFocus, selectedClass);
 
                 tooltipHtml += `
                     <b>Matched Focus Area:</b> ${selectedFocus === "all" ? "<i>All</i>" : (allFocus.includes(selectedFocus) ? selectedFocus : "<i>None</i>")}<br/>
                     <b>Matched Policy Class:</b> ${selectedClass === "all" ? "<i>All</i>" : (allClasses.includes(selectedClass) ? selectedClass : "<i>None</i>")}<br/>
                     <b>Matched Actions:</b> ${matchedDocsCount}
                     <br/>
-                    <b>Total Documents:</b> ${[...new Set(allDocs)].length}
+                    <b>Total Documents:</b> ${details.total_documents}
                 `;
             } else { // currentMapView === 'region'
                 const displayedCountries = details.countries.join(', ');
-                const displayedTotalDocs = [...new Set(details["Government document"])].length;
+                const displayedTotalDocs = details.total_documents;
 
                 tooltipHtml += `
                     <b>Countries:</b> ${displayedCountries}<br/>
@@ -353,7 +304,7 @@ function drawMap() {
 
             resetSidebarAndDetails(); 
 
-            if (!details || details["Government document"].length === 0) {
+            if (!details || details.total_documents === 0) {
                 d3.select("#sidebar-title").text(`No Data for ${name}`);
                 d3.select("#document-list").html("<p>No policy data available.</p>");
                 return;
@@ -362,48 +313,54 @@ function drawMap() {
             if (currentMapView === 'country') {
                 // --- COUNTRY VIEW CLICK LOGIC ---
                 d3.select("#sidebar-title").text(`Documents for ${name}`);
-                const allDocs = details["Government document"];
-                const focusList = details["Focus areas"];
-                const classList = details["Policy class"];
-
-                const matchedDocs = allDocs.filter((doc, i) =>
-                    filterMatches(focusList[i], selectedFocus) && 
-                    filterMatches(classList[i], selectedClass)
-                );
-                const uniqueDocs = [...new Set(matchedDocs)];
-
                 const listContainer = d3.select("#document-list");
-                if (uniqueDocs.length === 0) {
-                    listContainer.append("p").text("No matching documents.");
-                } else {
-                    listContainer.append("p")
-                    .style("margin-bottom", "0.5rem")
-                    .style("font-weight", "bold")
-                    .text(`${uniqueDocs.length} unique matching document${uniqueDocs.length > 1 ? "s" : ""}:`);
-
-                    const ul = listContainer.append("ul");
-                    uniqueDocs.forEach(doc => {
-                        ul.append("li")
-                        .text(doc)
-                        .style("cursor", "pointer")
-                        .on("click", () => showDocDetails(doc, details, selectedFocus, selectedClass)); 
-                    });
-
-                }
+                listContainer.append("p").attr("class", "loading").text("Loading documents…");
+                lastClickedCountry = name;
+
+                loadCountryShard(name).then(record => {
+                    // Ignore the response if another country was clicked in the meantime
+                    if (lastClickedCountry !== name) return;
+                    listContainer.select(".loading").remove();
+
+                    const allDocs = record["Document ID by country"];
+                    const focusList = record["Focus areas"];
+                    const classList = record["Policy class"];
+
+                    const matchedDocs = allDocs.filter((doc, i) =>
+                        filterMatches(focusList[i], selectedFocus) && 
+                        filterMatches(classList[i], selectedClass)
+                    );
+                    const uniqueDocs = [...new Set(matchedDocs)].filter(doc => doc !== null);
+
+                    if (uniqueDocs.length === 0) {
+                        listContainer.append("p").text("No matching documents.");
+                    } else {
+                        listContainer.append("p")
+                        .style("margin-bottom", "0.5rem")
+                        .style("font-weight", "bold")
+                        .text(`${uniqueDocs.length} unique matching document${uniqueDocs.length > 1 ? "s" : ""}:`);
+
+                        const ul = listContainer.append("ul");
+                        uniqueDocs.forEach(doc => {
+                            ul.append("li")
+                            .text(documentTitle(record, doc))
+                            .style("cursor", "pointer")
+                            .on("click", () => showDocDetails(doc, record, selectedFocus, selectedClass)); 
+                        });
+                    }
+                }).catch(() => {
+                    if (lastClickedCountry !== name) return;
+                    listContainer.html("<p>Could not load the documents. Please try again.</p>");
+                });
             } else { // currentMapView === 'region'
                 // --- REGION VIEW CLICK LOGIC ---
                 d3.select("#sidebar-title").text(`Insights for ${name}`);
                 d3.select("#document-list").html(""); 
 
                 const regionSummaryContainer = d3.select("#document-list"); 
-                regionSummaryContainer.append("p").html(`<b>Total Documents in Region:</b> ${[...new Set(details["Government document"])].length}`);
+                regionSummaryContainer.append("p").html(`<b>Total Documents in Region:</b> ${details.total_documents}`);
                 regionSummaryContainer.append("p").html(`<b>Countries in Region:</b> ${details.countries.join(', ')}`);
 
-                const regionalPolicyClassCounts = {}; 
-                // Using "Policy class Raw" for correct counts
-                details["Policy class Raw"].forEach(pc => {
-                    regionalPolicyClassCounts[pc] = (regionalPolicyClassCounts[pc] || 0) + 1;
-                });
                 d3.select("#doc-title").text(`Regional Breakdown for ${name}`);
                 d3.select("#doc-charts").html(""); 
 
@@ -413,20 +370,12 @@ function drawMap() {
                     .style("flex-wrap", "wrap")
                     .style("gap", "1rem");
 
-                const regionalFocusAreaCounts = {};
-                // Using "Focus areas Raw" for correct counts
-                details["Focus areas Raw"].forEach(fa => {
-                    regionalFocusAreaCounts[fa] = (regionalFocusAreaCounts[fa] || 0) + 1;
-                });
-                
-                // Prepare data for charts (top 10, sorted)
-                const topFocusAreas = Object.entries(regionalFocusAreaCounts)
-                    .sort((a, b) => b[1] - a[1])
+                // Prepare data for charts (top 10; the export already sorts counts in descending order)
+                const topFocusAreas = details["Focus area counts"]
                     .slice(0, 10)
                     .map(([area, count]) => ({ label: area, value: count })); // Map to {label, value} objects
 
-                const topPolicyClasses = Object.entries(regionalPolicyClassCounts)
-                    .sort((a, b) => b[1] - a[1])
+                const topPolicyClasses = details["Policy class counts"]
                     .slice(0, 10)
                     .map(([policyClass, count]) => ({ label: policyClass, value: count })); // Map to {label, value} objects
                 
@@ -450,79 +399,64 @@ function updateFilterOptions(changedFilterId = null) {
     const currentFocus = d3.select("#focusFilter").property("value");
     const currentClass = d3.select("#classFilter").property("value");
 
-    let availableFocusAreas = new Set();
-    let availablePolicyClasses = new Set();
-
-    // Iterate through all policy data entries to find relevant options
-    policyData.forEach(d => {
-        // A country's data is relevant if its documents match the *other* filter's selection
-        // For focus, check against currentClass. For class, check against currentFocus.
-
-        if (d["Government document"] && Array.isArray(d["Government document"])) {
-            d["Government document"].forEach((doc, i) => {
-                const docFocus = d["Focus areas"] ? d["Focus areas"][i] : null;
-                const docClass = d["Policy class"] ? d["Policy class"][i] : null;
-
-                // Check if this specific document entry matches the other filter's selection
-                const isFocusRelevant = (changedFilterId === 'focusFilter' || currentClass === 'all' || (docClass && filterMatches(docClass, currentClass)));
-                const isClassRelevant = (changedFilterId === 'classFilter' || currentFocus === 'all' || (docFocus && filterMatches(docFocus, currentFocus)));
+    // Options come straight from the facet index: a focus area is available if it
+    // co-occurs with the selected class (and vice versa), unless that filter just changed.
+    let availableFocusAreas = facetIndex.focus;
+    let availablePolicyClasses = facetIndex.class;
 
-                if (isFocusRelevant && docFocus) {
-                    if (Array.isArray(docFocus)) {
-                        docFocus.forEach(f => availableFocusAreas.add(f));
-                    } else {
-                        availableFocusAreas.add(docFocus);
-                    }
-                }
-                if (isClassRelevant && docClass) {
-                     if (Array.isArray(docClass)) {
-                        docClass.forEach(c => availablePolicyClasses.add(c));
-                    } else {
-                        availablePolicyClasses.add(docClass);
-                    }
-                }
-            });
-        }
-    });
+    if (changedFilterId !== 'focusFilter' && currentClass !== 'all') {
+        const c = facetIndex.classIds.get(currentClass);
+        availableFocusAreas = c === undefined ? [] : facetIndex.class_focus[c].map(i => facetIndex.focus[i]);
+    }
+    if (changedFilterId !== 'classFilter' && currentFocus !== 'all') {
+        const f = facetIndex.focusIds.get(currentFocus);
+        availablePolicyClasses = f === undefined ? [] : facetIndex.focus_classes[f].map(i => facetIndex.class[i]);
+    }
 
     // Populate Focus Areas filter
     const focusSelect = d3.select("#focusFilter");
     focusSelect.selectAll("option").remove(); // Clear existing options
     focusSelect.append("option").text("All").attr("value", "all");
-    Array.from(availableFocusAreas).sort().forEach(f => {
+    availableFocusAreas.forEach(f => { // already sorted by the export
         focusSelect.append("option").text(f).attr("value", f);
     });
     // Restore previous selection if it's still available, otherwise default to 'all'
-    focusSelect.property("value", Array.from(availableFocusAreas).includes(currentFocus) ? currentFocus : "all");
+    focusSelect.property("value", availableFocusAreas.includes(currentFocus) ? currentFocus : "all");
 
 
     // Populate Policy Class filter
     const classSelect = d3.select("#classFilter");
     classSelect.selectAll("option").remove(); // Clear existing options
     classSelect.append("option").text("All").attr("value", "all");
-    Array.from(availablePolicyClasses).sort().forEach(c => {
+    availablePolicyClasses.forEach(c => { // already sorted by the export
         classSelect.append("option").text(c).attr("value", c);
     });
     // Restore previous selection if it's still available, otherwise default to 'all'
-    classSelect.property("value", Array.from(availablePolicyClasses).includes(currentClass) ? currentClass : "all");
+    classSelect.property("value", availablePolicyClasses.includes(currentClass) ? currentClass : "all");
 }
 
 
 // Fetch data and geo
 Promise.all([
-  d3.json("/data/africa.geojson"),
-  d3.json("/data/africa_policy_data.json")
-]).then(([fetchedGeoData, fetchedPolicyData]) => { 
-  geoData = fetchedGeoData;
-  policyData = fetchedPolicyData;
-
-  policyData.forEach(d => dataMap[d.country] = d);
+  d3.json(`/data/africa.${GEOMETRY_LEVEL}.topo.json`),
+  d3.json("/data/africa_policy_summary.json"),
+  d3.json("/data/africa_policy_facets.json"),
+  d3.json("/data/africa_policy_regions.json")
+]).then(([fetchedTopology, fetchedSummary, fetchedFacets, fetchedRegionData]) => { 
+  // Country and region shapes share arcs in one quantized topology
+  geoData = topojson.feature(fetchedTopology, fetchedTopology.objects.countries);
+  regionGeoData = topojson.feature(fetchedTopology, fetchedTopology.objects.regions);
+  policySummary = fetchedSummary;
+  facetIndex = prepareFacetIndex(fetchedFacets);
+  regionDataMap = fetchedRegionData.regions;
+
+  dataMap = policySummary.countries;
 
   // Initial population of filters (before any changes)
   updateFilterOptions(null); // Call with null to indicate initial load
 
-  // Prepare regional data after country data is loaded
-  prepareRegionalData(geoData, policyData);
+  // Regional aggregates and shapes are prebuilt; only the color scale is derived here
+  prepareRegionColorScale();
 
   // --- Map View Switcher Logic ---
   d3.select("#view-country").on("click", function() {
@@ -582,6 +516,8 @@ function resetSidebarAndDetails() {
 function updateMap() {
   let dataMapToUse = (currentMapView === 'country') ? dataMap : regionDataMap;
   let dataToDraw = (currentMapView === 'country') ? geoData.features : regionGeoData.features;
+  // Countries matching the current filters, looked up once instead of scanning every document
+  const matchedCountries = (currentMapView === 'country') ? matchingCountryNames(selectedFocus, selectedClass) : null;
 
   svg.selectAll(".map-entity") 
     .data(dataToDraw, d => d.properties.name)
@@ -591,17 +527,7 @@ function updateMap() {
         if (!details || details["total_documents"] === 0) return "#e5e7eb"; // Gray for no data
 
         if (currentMapView === 'country') {
-            // FIX 2: Iterate over Government Document to find matching documents
-            const hasMatchingDocument = details["Government document"].some((doc, i) => {
-                // Ensure the index 'i' is valid for associated arrays
-                if (details["Focus areas"] && i < details["Focus areas"].length && 
-                    details["Policy class"] && i < details["Policy class"].length) {
-                    return filterMatches(details["Focus areas"][i], selectedFocus) &&
-                           filterMatches(details["Policy class"][i], selectedClass);
-                }
-                return false; // If index is out of bounds for related arrays, no match
-            });
-            return hasMatchingDocument ? "#F1B434" : "#f0f0f0"; 
+            return matchedCountries.has(d.properties.name) ? "#F1B434" : "#f0f0f0"; 
         } else {
             // --- NEW: Use regionColorScale for regions ---
             return regionColorScale(details.total_documents);
@@ -609,22 +535,38 @@ function updateMap() {
     });
 }
 
+// Document ID -> row indices of a country record, built on first use
+const documentRowsCache = new WeakMap();
+
+function documentRows(countryDetails) {
+  let index = documentRowsCache.get(countryDetails);
+  if (!index) {
+    index = new Map();
+    countryDetails["Document ID by country"].forEach((doc, i) => {
+      if (doc === null) return;
+      if (!index.has(doc)) index.set(doc, []);
+      index.get(doc).push(i);
+    });
+    documentRowsCache.set(countryDetails, index);
+  }
+  return index;
+}
+
+// Title of a document from the record's document table (IDs are per country)
+function documentTitle(countryDetails, docId) {
+  return countryDetails.documents[docId] ?? `Document ${docId}`;
+}
+
 /**
  * Lists all unique actions or strategies associated with a specific document
  * for a given country.
  */
-function getUniqueActionsForDocument(docTitle, countryDetails) {
+function getUniqueActionsForDocument(docId, countryDetails) {
   const uniqueActions = new Set();
-  const allDocs = countryDetails["Government document"];
-  const allActions = countryDetails["action or strategy"]; 
-
-  if (!allActions || !Array.isArray(allActions) || !allDocs || !Array.isArray(allDocs)) {
-      console.warn("getUniqueActionsForDocument: Required 'action or strategy' or 'Government document' field is missing or not an array for this country.");
-      return [];
-  }
+  const allActions = countryDetails["action or strategy"];
 
-  allDocs.forEach((doc, i) => {
-    if (doc === docTitle && i < allActions.length && allActions[i] !== undefined && allActions[i] !== null) {
+  (documentRows(countryDetails).get(docId) || []).forEach(i => {
+    if (allActions[i] !== null) {
       uniqueActions.add(allActions[i]);
     }
   });
@@ -633,19 +575,16 @@ function getUniqueActionsForDocument(docTitle, countryDetails) {
 }
 
 // --- showDocDetails function (for individual documents in Country View) ---
-function showDocDetails(docTitle, details, currentSelectedFocus, currentSelectedClass) {
-  d3.select("#doc-title").text(docTitle);
+function showDocDetails(docId, details, currentSelectedFocus, currentSelectedClass) {
+  d3.select("#doc-title").text(documentTitle(details, docId));
 
   d3.select("#class-chart").selectAll("*").remove(); 
   d3.select("#focus-chart").selectAll("*").remove(); 
 
-  const allGovDocs = details["Government document"];
   const allFocusAreas = details["Focus areas"];
   const allPolicyClasses = details["Policy class"];
 
-  const rawIndices = allGovDocs
-    .map((doc, i) => doc === docTitle ? i : -1)
-    .filter(i => i !== -1);
+  const rawIndices = documentRows(details).get(docId) || [];
 
   const filteredIndices = rawIndices.filter(i => {
     const focusMatch = filterMatches(allFocusAreas[i], currentSelectedFocus);
@@ -669,9 +608,9 @@ function showDocDetails(docTitle, details, currentSelectedFocus, currentSelected
     classGroups[cls].women.push(details["Policy promotes women employment"][i]);
     classGroups[cls].disability.push(details["policy promotes employment of people with disabilities"][i]);
 
-    const actionOrStrategyData = details["action or strategy"];
-    if (actionOrStrategyData && Array.isArray(actionOrStrategyData) && actionOrStrategyData[i] !== undefined && actionOrStrategyData[i] !== null) {
-        classGroups[cls].actions.add(actionOrStrategyData[i]);
+    const action = details["action or strategy"][i];
+    if (action !== null) {
+        classGroups[cls].actions.add(action);
     }
   });
 
@@ -14,49 +14,69 @@ def _():
 
 
 @app.cell
-def _(pd):
-    df = pd.read_csv('../data/Wilma-climate tech policies.csv')
-    df
-    return (df,)
+def _():
+    # pipeline modules shared with the build scripts (importable outside marimo)
+    from policy_cache import load_policy_data_cached
+    from policy_aggregates import (
+        counts_by_region,
+        value_counts_by_region,
+    )
+    from policy_build import export_web_data
+    from policy_cube import PolicyCube
+    return (
+        PolicyCube,
+        counts_by_region,
+        export_web_data,
+        load_policy_data_cached,
+        value_counts_by_region,
+    )
 
 
 @app.cell
-def _(df):
-    # finding the number of unique values in each column
-    unique_counts = df.nunique()
-    unique_counts
-    return
+def _(load_policy_data_cached):
+    # reuses the binary cache in data/cache/ while the CSV is unchanged
+    data = load_policy_data_cached('../data/Wilma-climate tech policies.csv')
+    data
+    return (data,)
 
 
 @app.cell
-def _(df):
-    # removing the last 2 unnamed columns
-    data  = df.iloc[:, :-2]
-    data
-    return (data,)
+def _(PolicyCube, data):
+    # counts of every country x focus area x policy class x employment flag combination;
+    # the rankings below slice and sum it instead of rescanning the table
+    cube = PolicyCube.from_frame(data)
+    return (cube,)
 
 
 @app.cell
-def _(df):
+def _(data):
+    # finding the number of unique values in each column
+    unique_counts = data.nunique()
+    unique_counts
+    return
+
+
+@app.cell
+def _(data):
     # value counts for key features
     # Value counts for key features
     print("Green Tech Targeting:")
-    print(df['Policy targets green technology'].value_counts(dropna=False))
+    print(data['Policy targets green technology'].value_counts(dropna=False))
 
     print("\nFocus Areas (Top 10):")
-    print(df['Focus areas'].value_counts(dropna=False).head(10))
+    print(data['Focus areas'].value_counts(dropna=False).head(10))
 
     print("\nAction or Strategy:")
-    print(df['action or strategy'].value_counts(dropna=False))
+    print(data['action or strategy'].value_counts(dropna=False))
 
     print("\nYouth Employment Promotion:")
-    print(df['Policy promotes youth employment'].value_counts(dropna=False))
+    print(data['Policy promotes youth employment'].value_counts(dropna=False))
 
     print("\nWomen Employment Promotion:")
-    print(df['Policy promotes women employment'].value_counts(dropna=False))
+    print(data['Policy promotes women employment'].value_counts(dropna=False))
 
     print("\nDisability Employment Promotion:")
-    print(df['policy promotes employment of people with disabilities'].value_counts(dropna=False))
+    print(data['policy promotes employment of people with disabilities'].value_counts(dropna=False))
     return
 
 
@@ -110,7 +130,7 @@ def _(data):
 def _(data):
     #count of focus areas per country
     focus_areas_per_country = (
-        data.groupby('Country name')['Focus areas']
+        data.groupby('Country name', observed=True)['Focus areas']
         .apply(lambda x: ', '.join(x.dropna().unique()))
         .reset_index()
     )
@@ -124,7 +144,7 @@ def _(data):
 
     # lis of policy class per country
     policy_class_per_country = (
-        data.groupby('Country name')['Policy class']
+        data.groupby('Country name', observed=True)['Policy class']
         .apply(lambda x: ', '.join(x.dropna().unique()))
         .reset_index()
     )
@@ -137,7 +157,7 @@ def _(data):
 def _(data):
     # counting the number of unique focus areas per country
     unique_focus_areas_per_country = (
-        data.groupby('Country name')['Focus areas']
+        data.groupby('Country name', observed=True)['Focus areas']
         .nunique()
         .reset_index(name='Unique Focus Areas Count')
     )
@@ -150,7 +170,7 @@ def _(data):
 def _(data):
     #counting the number of unique policy classes per country
     unique_policy_classes_per_country = (
-        data.groupby('Country name')['Policy class']
+        data.groupby('Country name', observed=True)['Policy class']
         .nunique()
         .reset_index(name='Unique Policy Classes Count')
     )
@@ -166,66 +186,30 @@ def _(data):
 
 
 @app.cell
-def _(data):
-
-
-    # Group all rows per country and aggregate data into lists (not unique counts)
-    grouped = data.groupby("Country name").agg({
-        "Focus areas": lambda x: list(x.dropna()),
-        "Policy class": lambda x: list(x.dropna()),
-        "Government document": lambda x: list(x.dropna()),
-        "Policy targets green technology": lambda x: list(x.dropna()),
-        "action or strategy": lambda x: list(x.dropna()),
-        "Policy promotes youth employment": lambda x: list(x.dropna()),
-        "Policy promotes women employment": lambda x: list(x.dropna()),
-        "policy promotes employment of people with disabilities": lambda x: list(x.dropna())
-    }).reset_index()
-
-
-    return (grouped,)
-
-
-@app.cell
-def _(grouped):
-    # Rename the key for consistency with frontend (optional)
-    grouped_data = grouped.rename(columns={"Country name": "country"})
-
-    # Save to JSON as an array of records (VALID JSON for D3/Flask)
-    grouped_data.to_json("../data/africa_policy_data.json", orient="records", indent=2)
-
+def _(data, export_web_data):
+    # Writes every data/africa_policy_* file the map loads: the per-country records
+    # (row-aligned lists, not unique counts) and their shards, the country summary,
+    # the facet index for the filters, the region summaries (shapes come from
+    # geo_build.py) and the search index. It also saves the snapshot that
+    # python scripts/policy_build.py diffs against to re-export only edited countries.
+    export_web_data(data, "../data")
     return
 
 
 @app.cell
 def _():
-
     # Define the regions and their corresponding countries
-    regions = {
-         "North Africa": ["Algeria", "Egypt", "Libya", "Morocco", "Sudan", "Tunisia", "Western Sahara"],
-        "West Africa": ["Benin", "Burkina Faso", "Cape Verde", "The Gambia", "Ghana", "Guinea", "Guinea-Bissau", "Côte d'Ivoire", "Liberia", "Mali", "Mauritania", "Niger", "Nigeria", "Senegal", "Sierra Leone", "Togo"],
-        "Central Africa": ["Burundi", "Cameroon", "Central African Republic", "Chad", "Democratic Republic of Congo", "Republic of Congo", "Equatorial Guinea", "Gabon", "São Tomé and Príncipe"],
-        "East Africa": ["Comoros", "Djibouti", "Eritrea", "Ethiopia", "Kenya", "Madagascar", "Mauritius", "Rwanda", "Seychelles", "Somalia", "South Sudan", "Tanzania", "Uganda"],
-        "Southern Africa": ["Angola", "Botswana", "Eswatini", "Lesotho", "Malawi", "Mozambique", "Namibia", "South Africa", "Zambia", "Zimbabwe"],
-    }
+    # (the loader joins them onto the table once as the 'Region' column)
+    from policy_data import REGIONS as regions
     return (regions,)
 
 
 @app.cell
-def _(data, pd, regions):
-    # finding the top policy classes per region with counts
-    top_policy_classes_per_region = {}
-    for region, countries in regions.items():
-        # Filter data for the current region
-        region_data = data[data['Country name'].isin(countries)]
-
-        # Count occurrences of each Policy class
-        policy_counts = region_data['Policy class'].value_counts()
-
-        # Get the top 10 Policy classes
-        top_policy_classes = policy_counts.head(10)
-
-        # Store the results
-        top_policy_classes_per_region[region] = top_policy_classes
+def _(cube, pd, regions):
+    # finding the top 10 policy classes per region with counts (read from the cube)
+    top_policy_classes_per_region = {
+        region: cube.select(region=region).top_k('policy_class', 10) for region in regions
+    }
 
     # Convert the results to a DataFrame for better visualization
     top_policy_classes_df = pd.DataFrame(top_policy_classes_per_region).fillna(0).astype(int).T
@@ -234,33 +218,6 @@ def _(data, pd, regions):
     return top_policy_classes_df, top_policy_classes_per_region
 
 
-@app.cell
-def _(data, pd, regions):
-    def _():
-        # finding top 10 focus areas per region with counts
-        top_focus_areas_per_region = {}
-        for region, countries in regions.items():
-            # Filter data for the current region
-            region_data = data[data['Country name'].isin(countries)]
-
-            # Count occurrences of each Focus area
-            focus_counts = region_data['Focus areas'].value_counts()
-
-            # Get the top 10 Focus areas
-            top_focus_areas = focus_counts.head(10)
-
-            # Store the results
-            top_focus_areas_per_region[region] = top_focus_areas
-
-        # Convert the results to a DataFrame for better visualization
-        top_focus_areas_df = pd.DataFrame(top_focus_areas_per_region).fillna(0).astype(int).T
-        return top_focus_areas_df.head()
-
-
-    _()
-    return
-
-
 @app.cell
 def _(plt, top_policy_classes_df, top_policy_classes_per_region):
     # plotting the policy class graphs for all regions in percentage
@@ -324,21 +281,11 @@ def _(plt, top_focus_areas_df, top_focus_areas_per_region):
 
 
 @app.cell
-def _(data, pd, regions):
-        # finding top 10 focus areas per region with counts
-    top_focus_areas_per_region = {}
-    for reg, country in regions.items():
-        # Filter data for the current region
-        regional_data = data[data['Country name'].isin(country)]
-
-        # Count occurrences of each Focus area
-        focus_counts = regional_data['Focus areas'].value_counts()
-
-        # Get the top 10 Focus areas
-        top_focus_areas = focus_counts.head(10)
-
-        # Store the results
-        top_focus_areas_per_region[reg] = top_focus_areas
+def _(cube, pd, regions):
+    # finding top 10 focus areas per region with counts
+    top_focus_areas_per_region = {
+        region: cube.select(region=region).top_k('focus', 10) for region in regions
+    }
 
     # Convert the results to a DataFrame for better visualization
     top_focus_areas_df = pd.DataFrame(top_focus_areas_per_region).fillna(0).astype(int).T
@@ -403,31 +350,34 @@ def _(plot_policy_classes_for_region):
 
 
 @app.cell
-def _(data, plt):
-    # plotting percentage policy class distribution for  north africa
+def _(data, plt, value_counts_by_region):
+    # policy class counts for every region, computed once for the pie charts below
+    policy_class_by_region = value_counts_by_region(data, 'Policy class')
 
-    def plot_north_africa_policy_class_distribution():
-        north_africa_countries = ["Algeria", "Egypt", "Libya", "Morocco", "Sudan", "Tunisia", "Western Sahara"]
-        north_africa_data = data[data['Country name'].isin(north_africa_countries)]
-
-        # Count occurrences of each Policy class
-        policy_counts = north_africa_data['Policy class'].value_counts()
+    def plot_policy_class_distribution_for_region(region, figsize=(10, 10)):
+        # Count occurrences of each Policy class in the region
+        policy_counts = policy_class_by_region.loc[region].sort_values(ascending=False, kind='stable')
+        policy_counts = policy_counts[policy_counts > 0]
 
         # Plotting
-        plt.figure(figsize=(12, 11))
-        # Adjust font sizes and weight here
+        plt.figure(figsize=figsize)
         plt.pie(policy_counts, 
                 labels=policy_counts.index, 
                 autopct='%1.1f%%', 
                 startangle=140,
                 textprops={'fontsize': 11, 'fontweight':'bold'}, # This controls the labels
                 wedgeprops={'linewidth': 1, 'edgecolor': 'white'})
-        plt.title('Distribution of Policy Strategy Classes in North Africa')
+        plt.title(f'Distribution of Policy Strategy Classes in {region}')
         plt.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle.
         plt.tight_layout()
         plt.show()
+    return (plot_policy_class_distribution_for_region,)
+
 
-    plot_north_africa_policy_class_distribution()
+@app.cell
+def _(plot_policy_class_distribution_for_region):
+    # plotting percentage policy class distribution for north africa
+    plot_policy_class_distribution_for_region("North Africa", figsize=(12, 11))
     return
 
 
@@ -438,30 +388,9 @@ def _(plot_policy_classes_for_region):
 
 
 @app.cell
-def _(data, plt):
-    # # plotting percentage policy class distribution for  west africa
-
-    def plot_west_africa_policy_class_distribution():
-        west_africa_countries = ["Benin", "Burkina Faso", "Cabo Verde", "Gambia", "Ghana", "Guinea", "Guinea-Bissau", "Côte d'Ivoire", "Liberia", "Mali", "Mauritania", "Niger", "Nigeria", "Senegal", "Sierra Leone", "Togo"]
-        west_africa_data = data[data['Country name'].isin(west_africa_countries)]
-
-        # Count occurrences of each Policy class
-        policy_counts = west_africa_data['Policy class'].value_counts()
-
-        # Plotting
-        plt.figure(figsize=(10, 10))
-        plt.pie(policy_counts, 
-                labels=policy_counts.index, 
-                autopct='%1.1f%%', 
-                startangle=140,
-                textprops={'fontsize': 11, 'fontweight':'bold'}, # This controls the labels
-                wedgeprops={'linewidth': 1, 'edgecolor': 'white'})
-        plt.title('Distribution of Policy Strategy Classes in West Africa')
-        plt.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle.
-        plt.tight_layout()
-        plt.show()
-
-    plot_west_africa_policy_class_distribution()
+def _(plot_policy_class_distribution_for_region):
+    # plotting percentage policy class distribution for west africa
+    plot_policy_class_distribution_for_region("West Africa", figsize=(10, 10))
     return
 
 
@@ -472,30 +401,9 @@ def _(plot_policy_classes_for_region):
 
 
 @app.cell
-def _(data, plt):
-    # # plotting percentage policy class distribution for  central africa
-
-    def plot_central_africa_policy_class_distribution():
-        central_africa_countries = ["Burundi", "Cameroon", "Central African Republic", "Chad", "Democratic Republic of Congo", "Republic of Congo", "Equatorial Guinea", "Gabon", "Sao Tome and Principe"]
-        central_africa_data = data[data['Country name'].isin(central_africa_countries)]
-
-        # Count occurrences of each Policy class
-        policy_counts = central_africa_data['Policy class'].value_counts()
-
-        # Plotting
-        plt.figure(figsize=(12, 11))
-        plt.pie(policy_counts, 
-                labels=policy_counts.index, 
-                autopct='%1.1f%%', 
-                startangle=140,
-                textprops={'fontsize': 11, 'fontweight':'bold'}, # This controls the labels
-                wedgeprops={'linewidth': 1, 'edgecolor': 'white'})
-        plt.title('Distribution of Policy Strategy Classes in Central Africa')
-        plt.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle.
-        plt.tight_layout()
-        plt.show()
-
-    plot_central_africa_policy_class_distribution()
+def _(plot_policy_class_distribution_for_region):
+    # plotting percentage policy class distribution for central africa
+    plot_policy_class_distribution_for_region("Central Africa", figsize=(12, 11))
     return
 
 
@@ -506,30 +414,9 @@ def _(plot_policy_classes_for_region):
 
 
 @app.cell
-def _(data, plt):
-    # plotting percentage policy class distribution for  east africa
-
-    def plot_east_africa_policy_class_distribution():
-        east_africa_countries = ["Comoros", "Djibouti", "Eritrea", "Ethiopia", "Kenya", "Madagascar", "Mauritius", "Rwanda", "Seychelles", "Somalia", "South Sudan", "Tanzania", "Uganda"]
-        east_africa_data = data[data['Country name'].isin(east_africa_countries)]
-
-        # Count occurrences of each Policy class
-        policy_counts = east_africa_data['Policy class'].value_counts()
-
-        # Plotting
-        plt.figure(figsize=(10, 10))
-        plt.pie(policy_counts, 
-                labels=policy_counts.index, 
-                autopct='%1.1f%%', 
-                startangle=140,
-                textprops={'fontsize': 11, 'fontweight':'bold'}, # This controls the labels
-                wedgeprops={'linewidth': 1, 'edgecolor': 'white'})
-        plt.title('Distribution of Policy Strategy Classes in East Africa')
-        plt.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle.
-        plt.tight_layout()
-        plt.show()
-
-    plot_east_africa_policy_class_distribution()
+def _(plot_policy_class_distribution_for_region):
+    # plotting percentage policy class distribution for east africa
+    plot_policy_class_distribution_for_region("East Africa", figsize=(10, 10))
     return
 
 
@@ -540,30 +427,9 @@ def _(plot_policy_classes_for_region):
 
 
 @app.cell
-def _(data, plt):
-    # # plotting percentage policy class distribution for  southern africa
-
-    def plot_southern_africa_policy_class_distribution():
-        southern_africa_countries = ["Angola", "Botswana", "Eswatini", "Lesotho", "Malawi", "Mozambique", "Namibia", "South Africa", "Zambia", "Zimbabwe"]
-        southern_africa_data = data[data['Country name'].isin(southern_africa_countries)]
-
-        # Count occurrences of each Policy class
-        policy_counts = southern_africa_data['Policy class'].value_counts()
-
-        # Plotting
-        plt.figure(figsize=(10, 10))
-        plt.pie(policy_counts, 
-                labels=policy_counts.index, 
-                autopct='%1.1f%%', 
-                startangle=140,
-                textprops={'fontsize': 11, 'fontweight':'bold'}, # This controls the labels
-                wedgeprops={'linewidth': 1, 'edgecolor': 'white'})
-        plt.title('Distribution of Policy Strategy Classes in Southern Africa')
-        plt.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle.
-        plt.tight_layout()
-        plt.show()
-
-    plot_southern_africa_policy_class_distribution()
+def _(plot_policy_class_distribution_for_region):
+    # plotting percentage policy class distribution for southern africa
+    plot_policy_class_distribution_for_region("Southern Africa", figsize=(10, 10))
     return
 
 
@@ -679,18 +545,12 @@ def _(data, plt):
 
 
 @app.cell
-def _(data, plt):
+def _(cube, plt):
     # top 10 focus areas that promotes youth employment
 
     def plot_youth_employment_focus_areas():
-        # Filter data for policies that promote youth employment
-        youth_data = data[data['Policy promotes youth employment'] == 'Yes']
-
-        # Count occurrences of each Focus area in this subset
-        focus_counts = youth_data['Focus areas'].value_counts()
-
-        # Get the top 10 Focus areas
-        top_focus_areas = focus_counts.head(10)
+        # Top 10 Focus areas of the policies that promote youth employment
+        top_focus_areas = cube.select(youth=True).top_k('focus', 10)
 
         # Plotting
         top_focus_areas.plot(kind='barh', figsize=(12, 6), title='Top 10 Focus Areas Promoting Youth Employment')
@@ -704,18 +564,12 @@ def _(data, plt):
 
 
 @app.cell
-def _(data, plt):
+def _(cube, plt):
     #top focus areas promoting women employment
 
     def plot_women_employment_focus_areas():
-        # Filter data for policies that promote youth employment
-        youth_data = data[data['Policy promotes women employment'] == 'Yes']
-
-        # Count occurrences of each Focus area in this subset
-        focus_counts = youth_data['Focus areas'].value_counts()
-
-        # Get the top 10 Focus areas
-        top_focus_areas = focus_counts.head(10)
+        # Top 10 Focus areas of the policies that promote women employment
+        top_focus_areas = cube.select(women=True).top_k('focus', 10)
 
         # Plotting
         top_focus_areas.plot(kind='barh', figsize=(12, 6), title='Top 10 Focus Areas Promoting women Employment')
@@ -729,19 +583,13 @@ def _(data, plt):
 
 
 @app.cell
-def _(data, plt):
+def _(cube, plt):
 
     # top focus areas promoting disability
 
     def plot_disability_employment_focus_areas():
-        # Filter data for policies that promote disability employment
-        disability_data = data[data['policy promotes employment of people with disabilities'] == 'Yes']
-
-        # Count occurrences of each Focus area in this subset
-        focus_counts = disability_data['Focus areas'].value_counts()
-
-        # Get the top 10 Focus areas
-        top_focus_areas = focus_counts.head(10)
+        # Top 10 Focus areas of the policies that promote disability employment
+        top_focus_areas = cube.select(disability=True).top_k('focus', 10)
 
         # Plotting
         top_focus_areas.plot(kind='barh', figsize=(12, 6), title='Top 10 Focus Areas Promoting Disability Employment')
@@ -755,19 +603,12 @@ def _(data, plt):
 
 
 @app.cell
-def _(data, plt):
+def _(cube, plt):
     # top focus areas that promote all 3
 
     def plot_combined_employment_focus_areas():
-        # Filter data for policies that promote youth and women and disability
-        combined_data = data[
-            (data['Policy promotes youth employment'] == 'Yes') &
-            (data['Policy promotes women employment'] == 'Yes') &
-            (data['policy promotes employment of people with disabilities'] == 'Yes')]
-        # Count occurrences of each Focus area in this subset
-        focus_counts = combined_data['Focus areas'].value_counts()
-        # Get the top 10 Focus areas
-        top_focus_areas = focus_counts.head(10)
+        # Top 10 Focus areas of the policies that promote youth and women and disability
+        top_focus_areas = cube.select(youth=True, women=True, disability=True).top_k('focus', 10)
         # Plotting
         top_focus_areas.plot(kind='barh', figsize=(12, 6), title='Top 10 Focus Areas promoting all employments')
         plt.xlabel('Number of employment created')
@@ -800,19 +641,19 @@ def _(data, regions):
 
 
 @app.cell
-def _(data, plt, regions):
+def _(data, plt, regions, value_counts_by_region):
     # plotting the countriey with least and most number of policies promoting youth employments in each region
 
     def plot_youth_employment_by_region():
         fig, axes = plt.subplots(nrows=3, ncols=2, figsize=(15, 15))
         axes = axes.flatten()
 
-        for i, (region, countries) in enumerate(regions.items()):
-            # Filter data for the current region
-            region_data = data[data['Country name'].isin(countries)]
+        # Count occurrences of youth employment promotion for all regions at once
+        youth_by_region = value_counts_by_region(data, 'Policy promotes youth employment')
+        youth_by_region = youth_by_region.rename(columns={True: 'Yes', False: 'No'})
 
-            # Count occurrences of youth employment promotion
-            youth_counts = region_data['Policy promotes youth employment'].value_counts()
+        for i, region in enumerate(regions):
+            youth_counts = youth_by_region.loc[region].sort_values(ascending=False)
 
             # Plotting
             youth_counts.plot(kind='barh', ax=axes[i], title=f'Youth Employment Promotion in {region}')
@@ -855,10 +696,11 @@ def _(data, plt):
 
     def plot_least_youth_employment_country():
         # Filter data for policies that do not promote youth employment
-        no_youth_data = data[data['Policy promotes youth employment'] == 'No']
+        no_youth_data = data[data['Policy promotes youth employment'] == False]
 
         # Count occurrences of each Country
         country_counts = no_youth_data['Country name'].value_counts()
+        country_counts = country_counts[country_counts > 0]
 
         # Plotting
         plt.figure(figsize=(12, 6))
@@ -879,10 +721,11 @@ def _(data, plt):
 
     def plot_most_youth_employment_country():
         # Filter data for policies that promote youth employment
-        yes_youth_data = data[data['Policy promotes youth employment'] == 'Yes']
+        yes_youth_data = data[data['Policy promotes youth employment']]
 
         # Count occurrences of each Country
         country_counts = yes_youth_data['Country name'].value_counts()
+        country_counts = country_counts[country_counts > 0]
 
         # Plotting
         plt.figure(figsize=(12, 6))
@@ -897,35 +740,20 @@ def _(data, plt):
 
 
 @app.cell
-def _(data):
+def _(df_counts):
     # lets create a dictionary like country, promoptes youth employment and count yes, promiotes women employment and count yes , promotes disability employment and count yes for all countries
 
     def create_employment_promotion_dict():
-        employment_dict = {}
-
-        for country in data['Country name'].unique():
-            country_data = data[data['Country name'] == country]
-
-            youth_count = country_data['Policy promotes youth employment'].value_counts().get('Yes', 0)
-
-            women_count = country_data['Policy promotes women employment'].value_counts().get('Yes', 0)
-
-            disability_count = country_data['policy promotes employment of people with disabilities'].value_counts().get('Yes', 0)
-
-            employment_dict[country] = {
-                'Youth Employment Count': youth_count,
-                'Women Employment Count': women_count,
-                'Disability Employment Count': disability_count
-            }
-
-            return employment_dict
+        # built from the per-country count matrix instead of re-filtering the data per country
+        renamed = df_counts.rename(columns={
+            'Policy promotes youth employment': 'Youth Employment Count',
+            'Policy promotes women employment': 'Women Employment Count',
+            'policy promotes employment of people with disabilities': 'Disability Employment Count'
+        })
+        return renamed.to_dict(orient='index')
 
     employment_promotion_dict = create_employment_promotion_dict()
     employment_promotion_dict
-
-
-
-
     return
 
 
@@ -943,25 +771,13 @@ def _():
 
 
 @app.cell
-def _(data, employment_columns):
-    # Initialize an empty dictionary to store the results
-    country_employment_counts = {}
-
-    # Group by 'Country name' and iterate through each group
-    for country_name, group in data.groupby('Country name'):
-        # Initialize a dictionary for the current country's counts
-        country_counts = {}
-        for col in employment_columns:
-            # Count 'Yes' occurrences in the current column for the current country's group
-            # Using .str.strip() to handle potential leading/trailing spaces if any
-            yes_count = (group[col].astype(str).str.strip().str.lower() == 'yes').sum()
-            country_counts[col] = yes_count
-        # Add the country's counts to the main dictionary
-        country_employment_counts[country_name] = country_counts
+def _(cube, employment_columns):
+    # 'Yes' rows per country for every employment column, summed from the count cube
+    df_counts = cube.employment_counts()[employment_columns]
 
     # Print the resulting dictionary
-    print(country_employment_counts)
-    return (country_employment_counts,)
+    print(df_counts.to_dict(orient='index'))
+    return (df_counts,)
 
 
 @app.function
@@ -994,10 +810,9 @@ def plot_employment_data(data_series, title, color, ax):
 
 
 @app.cell
-def _(country_employment_counts, pd):
-    df_counts = pd.DataFrame.from_dict(country_employment_counts, orient='index')
+def _(df_counts):
     df_counts.head()
-    return (df_counts,)
+    return
 
 
 @app.cell
@@ -1101,17 +916,10 @@ def _(df_counts, employment_columns, plt, regions, title_mapping):
 
 
 @app.cell
-def _(df_counts, employment_columns, np, pd, plt, regions, title_mapping):
-    # Create a DataFrame to store regional sums for each employment type
-    regional_employment_sums = pd.DataFrame(index=regions.keys(), columns=employment_columns).fillna(0)
-
-    # Populate the regional_employment_sums DataFrame
-    for region_name_stacked, countries_in_region_stacked in regions.items(): # Unique loop variables
-        # Filter df_counts for the current region's countries
-        regional_df_stacked = df_counts.reindex(countries_in_region_stacked).dropna()
-        if not regional_df_stacked.empty:
-            for employment_col_stacked in employment_columns: # Unique loop variable
-                regional_employment_sums.loc[region_name_stacked, employment_col_stacked] = regional_df_stacked[employment_col_stacked].sum()
+def _(counts_by_region, data, employment_columns, np, plt, title_mapping):
+    # regional sums for each employment type, from one grouped pass over the table
+    regional_employment_sums = counts_by_region(data, employment_columns)
+    regional_employment_sums.index.name = None
 
     # Clean up column names for the legend
     stacked_column_names = [title_mapping.get(col, col.replace("_", " ").title()) for col in employment_columns]
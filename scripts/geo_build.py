@@ -0,0 +1,442 @@
+"""
+Build step for the map geometry.
+
+Converts data/africa.geojson into quantized TopoJSON at several simplification
+levels. Each topology holds two objects that share arcs:
+
+- "countries": one geometry per country (only the name is kept as a property)
+- "regions": the countries of each region merged into one shape, so the browser
+  no longer runs topojson.topology/merge on every page load
+
+Country borders in africa.geojson share identical vertices, so a region is merged by
+cancelling every edge that appears in both directions (the internal borders) and
+chaining the remaining edges back into rings. Arcs are simplified independently with
+Douglas-Peucker; since shared borders are stored once, neighbouring shapes stay
+gap-free at every level.
+
+Usage:
+    python scripts/geo_build.py
+"""
+import json
+from collections import defaultdict
+
+from policy_data import DATA_DIR, REGIONS
+
+GEOJSON_PATH = DATA_DIR / "africa.geojson"
+
+# Quantization grid (points per axis) and Douglas-Peucker tolerance in degrees per level
+QUANTIZATION = 100_000
+SIMPLIFICATION_LEVELS = {
+    "full": 0.0,
+    "medium": 0.02,
+    "low": 0.08,
+}
+
+
+def polygons_of(geometry):
+    """
+    Returns the polygons of a Polygon or MultiPolygon geometry.
+
+    Args:
+        geometry (dict): GeoJSON geometry.
+
+    Returns:
+        list: Polygons, each a list of rings (lists of [lon, lat] positions).
+    """
+    if geometry["type"] == "Polygon":
+        return [geometry["coordinates"]]
+    if geometry["type"] == "MultiPolygon":
+        return geometry["coordinates"]
+    return []
+
+
+def ring_area(ring):
+    """
+    Signed planar area of a closed ring (negative when clockwise in lon/lat).
+
+    Args:
+        ring (list): Closed list of [lon, lat] positions.
+
+    Returns:
+        float: Signed area in square degrees.
+    """
+    return sum(x1 * y2 - x2 * y1 for (x1, y1), (x2, y2) in zip(ring, ring[1:])) / 2
+
+
+def _contains(ring, point):
+    # even-odd ray casting
+    x, y = point
+    inside = False
+    for (x1, y1), (x2, y2) in zip(ring, ring[1:]):
+        if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+            inside = not inside
+    return inside
+
+
+def _boundary_edges(features):
+    # directed edges left after cancelling the ones shared by two neighbouring rings
+    edges = defaultdict(int)
+    for feature in features:
+        for polygon in polygons_of(feature["geometry"]):
+            for ring in polygon:
+                for a, b in zip(ring, ring[1:]):
+                    a, b = tuple(a), tuple(b)
+                    if a == b:
+                        continue
+                    if edges[(b, a)] > 0:
+                        edges[(b, a)] -= 1
+                    else:
+                        edges[(a, b)] += 1
+    return [edge for edge, count in edges.items() for _ in range(count)]
+
+
+def _chain_rings(edges):
+    outgoing = defaultdict(list)
+    for a, b in edges:
+        outgoing[a].append(b)
+
+    rings = []
+    for start in list(outgoing):
+        while outgoing[start]:
+            ring = [start]
+            current = outgoing[start].pop()
+            while current != start and outgoing[current]:
+                ring.append(current)
+                current = outgoing[current].pop()
+            ring.append(start)
+            if len(ring) >= 4:
+                rings.append([list(p) for p in ring])
+    return rings
+
+
+def merge_features(features):
+    """
+    Dissolves the internal borders between features into a single MultiPolygon.
+
+    Args:
+        features (list): GeoJSON features with Polygon/MultiPolygon geometries
+            whose shared borders use identical vertices.
+
+    Returns:
+        dict: MultiPolygon geometry with clockwise exteriors and counter-clockwise holes,
+        as in the source file.
+    """
+    rings = _chain_rings(_boundary_edges(features))
+    exteriors = [ring for ring in rings if ring_area(ring) < 0]
+    holes = [ring for ring in rings if ring_area(ring) >= 0]
+
+    polygons = [[ring] for ring in exteriors]
+    for hole in holes:
+        containing = [
+            i for i, ring in enumerate(exteriors)
+            if _contains(ring, hole[0]) or _contains(ring, hole[1])
+        ]
+        if containing:
+            smallest = min(containing, key=lambda i: abs(ring_area(exteriors[i])))
+            polygons[smallest].append(hole)
+    return {"type": "MultiPolygon", "coordinates": polygons}
+
+
+def merge_regions(geojson, regions=REGIONS):
+    """
+    Builds one merged feature per region.
+
+    Args:
+        geojson (dict): Country FeatureCollection (feature names in properties.name).
+        regions (dict): Region name -> list of countries.
+
+    Returns:
+        dict: FeatureCollection with properties.name set to the region name and
+        properties.countries listing the merged countries.
+    """
+    features = []
+    for region, countries in regions.items():
+        members = [
+            f for f in geojson["features"]
+            if f["properties"].get("name") in countries and f.get("geometry")
+        ]
+        if not members:
+            continue
+        features.append({
+            "type": "Feature",
+            "geometry": merge_features(members),
+            "properties": {"name": region, "countries": [f["properties"]["name"] for f in members]},
+        })
+    return {"type": "FeatureCollection", "features": features}
+
+
+def _quantizer(layers, quantization):
+    xs, ys = [], []
+    for collection in layers.values():
+        for feature in collection["features"]:
+            for polygon in polygons_of(feature["geometry"]):
+                for ring in polygon:
+                    xs.extend(p[0] for p in ring)
+                    ys.extend(p[1] for p in ring)
+    x0, y0 = min(xs), min(ys)
+    kx = (max(xs) - x0) / (quantization - 1) or 1
+    ky = (max(ys) - y0) / (quantization - 1) or 1
+
+    def quantize(ring):
+        points = []
+        for x, y in ring:
+            point = (round((x - x0) / kx), round((y - y0) / ky))
+            if not points or point != points[-1]:
+                points.append(point)
+        if points[0] != points[-1]:
+            points.append(points[0])
+        return points
+
+    return quantize, {"scale": [kx, ky], "translate": [x0, y0]}
+
+
+def _find_junctions(rings):
+    # a point is a junction when its neighbours differ between the rings passing through it
+    neighbours = {}
+    junctions = set()
+    for ring in rings:
+        n = len(ring) - 1
+        for i in range(n):
+            point = ring[i]
+            pair = frozenset((ring[i - 1] if i else ring[n - 1], ring[i + 1]))
+            seen = neighbours.get(point)
+            if seen is None:
+                neighbours[point] = pair
+            elif seen != pair:
+                junctions.add(point)
+    return junctions
+
+
+def _rotate(ring, start):
+    return ring[start:-1] + ring[:start + 1]
+
+
+def _cut_ring(ring, junctions):
+    # split a closed ring into arcs that start and end at junctions
+    stops = [i for i, point in enumerate(ring[:-1]) if point in junctions]
+    if not stops:
+        # no junctions: a single closed arc, rotated to a canonical start so that
+        # identical rings (e.g. an enclave and the hole around it) share it
+        return [_rotate(ring, ring.index(min(ring[:-1])))]
+    ring = _rotate(ring, stops[0])
+    stops = [i for i, point in enumerate(ring) if point in junctions]
+    return [ring[a:b + 1] for a, b in zip(stops, stops[1:])]
+
+
+class _ArcIndex:
+    def __init__(self):
+        self.arcs = []
+        self.ids = {}
+
+    def add(self, points):
+        key = tuple(points)
+        if key in self.ids:
+            return self.ids[key]
+        reverse = key[::-1]
+        if reverse in self.ids:
+            return ~self.ids[reverse]
+        self.ids[key] = len(self.arcs)
+        self.arcs.append(list(points))
+        return self.ids[key]
+
+
+def build_topology(layers, quantization=QUANTIZATION):
+    """
+    Builds a quantized topology (arcs shared between all shapes of all layers).
+
+    Args:
+        layers (dict): Object name -> GeoJSON FeatureCollection.
+        quantization (int): Grid size per axis.
+
+    Returns:
+        dict: Topology with absolute (not yet delta-encoded) integer arcs.
+    """
+    quantize, transform = _quantizer(layers, quantization)
+    shapes = {
+        name: [
+            (feature, [[quantize(ring) for ring in polygon] for polygon in polygons_of(feature["geometry"])])
+            for feature in collection["features"]
+        ]
+        for name, collection in layers.items()
+    }
+    junctions = _find_junctions(
+        ring for features in shapes.values() for _, polygons in features for polygon in polygons for ring in polygon
+    )
+
+    index = _ArcIndex()
+    objects = {}
+    for name, features in shapes.items():
+        geometries = []
+        for feature, polygons in features:
+            arcs = [
+                [[index.add(arc) for arc in _cut_ring(ring, junctions)] for ring in polygon if len(ring) >= 4]
+                for polygon in polygons
+            ]
+            geometries.append({
+                "type": "MultiPolygon" if len(arcs) > 1 else "Polygon",
+                "arcs": arcs if len(arcs) > 1 else arcs[0],
+                "properties": {"name": feature["properties"]["name"]},
+            })
+        objects[name] = {"type": "GeometryCollection", "geometries": geometries}
+    return {"type": "Topology", "transform": transform, "objects": objects, "arcs": index.arcs}
+
+
+def _douglas_peucker(points, tolerance):
+    if len(points) <= 2 or tolerance <= 0:
+        return points
+    if points[0] == points[-1]:
+        # closed arc: split at the point farthest from the start and keep both halves
+        far = max(range(len(points)), key=lambda i: (points[i][0] - points[0][0]) ** 2 + (points[i][1] - points[0][1]) ** 2)
+        if far == 0:
+            return points
+        return _douglas_peucker(points[:far + 1], tolerance)[:-1] + _douglas_peucker(points[far:], tolerance)
+
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    tolerance_sq = tolerance * tolerance
+    while stack:
+        first, last = stack.pop()
+        (x1, y1), (x2, y2) = points[first], points[last]
+        dx, dy = x2 - x1, y2 - y1
+        length_sq = dx * dx + dy * dy
+        best, best_dist = None, tolerance_sq
+        for i in range(first + 1, last):
+            px, py = points[i]
+            if length_sq == 0:
+                dist = (px - x1) ** 2 + (py - y1) ** 2
+            else:
+                cross = dx * (py - y1) - dy * (px - x1)
+                dist = cross * cross / length_sq
+            if dist > best_dist:
+                best, best_dist = i, dist
+        if best is not None:
+            keep[best] = True
+            stack.append((first, best))
+            stack.append((best, last))
+    return [p for p, kept in zip(points, keep) if kept]
+
+
+def _ring_points(arcs, ring):
+    points = []
+    for arc_id in ring:
+        arc = arcs[arc_id] if arc_id >= 0 else arcs[~arc_id][::-1]
+        points.extend(arc if not points else arc[1:])
+    return points
+
+
+def _rings_of(topology):
+    for collection in topology["objects"].values():
+        for geometry in collection["geometries"]:
+            polygons = geometry["arcs"] if geometry["type"] == "MultiPolygon" else [geometry["arcs"]]
+            for polygon in polygons:
+                yield from polygon
+
+
+def simplify_topology(topology, tolerance):
+    """
+    Simplifies every arc, keeping junctions fixed.
+
+    Arcs of rings that would collapse or flip orientation (small islands) are kept
+    at full resolution.
+
+    Args:
+        topology (dict): Topology from build_topology.
+        tolerance (float): Douglas-Peucker tolerance in degrees.
+
+    Returns:
+        dict: New topology with simplified arcs.
+    """
+    kx, ky = topology["transform"]["scale"]
+    grid_tolerance = tolerance / min(kx, ky)
+    original = topology["arcs"]
+    arcs = [_douglas_peucker(arc, grid_tolerance) for arc in original]
+
+    changed = True
+    while changed:
+        changed = False
+        for ring in _rings_of(topology):
+            before = ring_area(_ring_points(original, ring))
+            after = ring_area(_ring_points(arcs, ring))
+            if before and (after == 0 or (after > 0) != (before > 0)):
+                for arc_id in ring:
+                    i = arc_id if arc_id >= 0 else ~arc_id
+                    if arcs[i] is not original[i]:
+                        arcs[i] = original[i]
+                        changed = True
+    return {**topology, "arcs": arcs}
+
+
+def encode_arcs(topology):
+    """
+    Delta-encodes the quantized arcs as required by the TopoJSON format.
+
+    Args:
+        topology (dict): Topology with absolute integer arcs.
+
+    Returns:
+        dict: Topology ready to be written.
+    """
+    encoded = []
+    for arc in topology["arcs"]:
+        deltas = [list(arc[0])]
+        for (x1, y1), (x2, y2) in zip(arc, arc[1:]):
+            deltas.append([x2 - x1, y2 - y1])
+        encoded.append(deltas)
+    return {**topology, "arcs": encoded}
+
+
+def topology_path(level):
+    """
+    Returns the output file of a simplification level.
+
+    Args:
+        level (str): Key of SIMPLIFICATION_LEVELS.
+
+    Returns:
+        Path: e.g. data/africa.medium.topo.json.
+    """
+    return DATA_DIR / f"africa.{level}.topo.json"
+
+
+def build_topologies(source=GEOJSON_PATH, levels=SIMPLIFICATION_LEVELS, quantization=QUANTIZATION):
+    """
+    Writes one TopoJSON file per simplification level.
+
+    Args:
+        source (str or Path): Country GeoJSON file.
+        levels (dict): Level name -> tolerance in degrees.
+        quantization (int): Grid size per axis.
+
+    Returns:
+        list: One report dict per level with "level", "path", "vertices" and "bytes".
+    """
+    with open(source, encoding="utf-8") as f:
+        countries = json.load(f)
+    topology = build_topology({"countries": countries, "regions": merge_regions(countries)}, quantization)
+
+    reports = []
+    for level, tolerance in levels.items():
+        simplified = simplify_topology(topology, tolerance) if tolerance else topology
+        path = topology_path(level)
+        content = json.dumps(encode_arcs(simplified), ensure_ascii=False, separators=(",", ":"))
+        path.write_text(content, encoding="utf-8")
+        reports.append({
+            "level": level,
+            "path": str(path),
+            "vertices": sum(len(arc) for arc in simplified["arcs"]),
+            "bytes": len(content.encode("utf-8")),
+        })
+    return reports
+
+
+if __name__ == "__main__":
+    source_vertices = sum(
+        len(ring)
+        for feature in json.loads(GEOJSON_PATH.read_text(encoding="utf-8"))["features"]
+        for polygon in polygons_of(feature["geometry"])
+        for ring in polygon
+    )
+    print(f"source: {GEOJSON_PATH.name}, {source_vertices} vertices, {GEOJSON_PATH.stat().st_size} bytes")
+    for report in build_topologies():
+        print(f"{report['level']}: {report['vertices']} vertices, {report['bytes']} bytes -> {report['path']}")
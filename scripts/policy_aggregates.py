@@ -0,0 +1,102 @@
+"""
+Vectorized aggregations over the cleaned policy table.
+
+Each function does a single grouped pass over the frame instead of filtering it
+once per country or per column.
+"""
+import pandas as pd
+
+from policy_data import COUNTRY, EMPLOYMENT_COLUMNS, REGION, yes_no_to_bool
+from policy_instrument import instrumented
+
+
+def employment_flags(data, columns=EMPLOYMENT_COLUMNS):
+    """
+    Returns the Yes/No employment columns as a 0/1 integer frame.
+
+    Columns that are not boolean yet (e.g. a raw frame) are normalized once here;
+    unknown values count as 0.
+
+    Args:
+        data (pd.DataFrame): Policy table.
+        columns (list): Yes/No columns to convert.
+
+    Returns:
+        pd.DataFrame: Integer frame aligned with data's index.
+    """
+    flags = {}
+    for col in columns:
+        values = data[col]
+        if values.dtype != "boolean":
+            values = yes_no_to_bool(values)
+        flags[col] = values.fillna(False).astype("int32")
+    return pd.DataFrame(flags, index=data.index)
+
+
+@instrumented("employment_counts")
+def employment_counts_by_country(data, columns=EMPLOYMENT_COLUMNS):
+    """
+    Counts the rows marked "Yes" per country for each employment column.
+
+    Args:
+        data (pd.DataFrame): Policy table.
+        columns (list): Yes/No columns to count.
+
+    Returns:
+        pd.DataFrame: Country x column count matrix (the notebook's df_counts),
+        indexed by country name in sorted order.
+    """
+    counts = employment_flags(data, columns).groupby(data[COUNTRY], observed=True).sum()
+    counts.index = pd.Index(counts.index.astype(object), name=None)
+    return counts.astype(int)
+
+
+@instrumented("region_value_counts")
+def value_counts_by_region(data, column):
+    """
+    Counts the occurrences of every value of a column in each region.
+
+    Args:
+        data (pd.DataFrame): Policy table with the REGION column.
+        column (str): Column to count (e.g. "Policy class").
+
+    Returns:
+        pd.DataFrame: Region x value count matrix; every region in REGIONS is present.
+    """
+    counts = data.groupby([REGION, column], observed=False).size().unstack(fill_value=0)
+    return counts.reindex(pd.Index(data[REGION].cat.categories, name=REGION), fill_value=0)
+
+
+@instrumented("regional_top_k")
+def top_k_by_region(data, column, k=10):
+    """
+    Finds the k most frequent values of a column in each region.
+
+    Args:
+        data (pd.DataFrame): Policy table with the REGION column.
+        column (str): Column to rank (e.g. "Focus areas").
+        k (int): Number of values kept per region.
+
+    Returns:
+        dict: Region name -> count Series sorted in descending order (zero counts dropped).
+    """
+    top = {}
+    for region, counts in value_counts_by_region(data, column).iterrows():
+        counts = counts[counts > 0].sort_values(ascending=False, kind="stable")
+        top[region] = counts.head(k).rename("count").rename_axis(column)
+    return top
+
+
+@instrumented("region_counts")
+def counts_by_region(data, columns=EMPLOYMENT_COLUMNS):
+    """
+    Counts the rows marked "Yes" per region for each employment column.
+
+    Args:
+        data (pd.DataFrame): Policy table with the REGION column.
+        columns (list): Yes/No columns to count.
+
+    Returns:
+        pd.DataFrame: Region x column count matrix; every region in REGIONS is present.
+    """
+    return employment_flags(data, columns).groupby(data[REGION], observed=False).sum().astype(int)
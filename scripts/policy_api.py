@@ -0,0 +1,159 @@
+"""
+Local ASGI service answering filtered policy queries.
+
+Instead of shipping the whole dataset to the browser, the map can ask for the
+slice the current view needs:
+
+    GET /countries?focus=&class=&region=   countries with a matching row
+    GET /country/{name}/documents          documents of one country
+    GET /document/{id}/actions             actions of one document ("7-2", see policy_queries)
+    GET /regions                           prebuilt summaries of all regions
+    GET /regions/{name}                    summary of one region
+    GET /stats                             query cache counters
+
+Query results come from CachedPolicyQueries, so repeated filter combinations are
+served from an LRU cache that is invalidated when the CSV changes. The handlers
+do blocking pandas work, so they run in Starlette's threadpool rather than on the
+event loop.
+
+Every JSON response carries an ETag (a hash of the body) and is answered with
+304 Not Modified when the client sends it back in If-None-Match; bodies above
+GZIP_MINIMUM_SIZE bytes are gzip-compressed for clients that accept it.
+
+Usage:
+    python scripts/policy_api.py [--host 127.0.0.1] [--port 8000] [--csv path]
+"""
+import argparse
+import hashlib
+import json
+
+from starlette.applications import Starlette
+from starlette.exceptions import HTTPException
+from starlette.middleware import Middleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import Response
+from starlette.routing import Route
+
+from policy_data import POLICY_CSV
+from policy_queries import CachedPolicyQueries, normalize_filter
+
+GZIP_MINIMUM_SIZE = 500
+
+
+def json_response(request, payload):
+    """
+    Serializes a payload and honours If-None-Match.
+
+    Args:
+        request (Request): Incoming request.
+        payload: JSON-serializable object.
+
+    Returns:
+        Response: 200 with the minified JSON body, or 304 without a body when the
+        client already holds this version.
+    """
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    # weak validator: the same entity may be sent gzip-compressed or not
+    etag = f'W/"{hashlib.sha1(body).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def _query_value(request, name):
+    # empty parameters (?focus=) and "all" mean "no filter", like the map's "All" option
+    return normalize_filter(request.query_params.get(name))
+
+
+# The handlers are plain functions: Starlette runs them in its threadpool, so a
+# cold query, a reload after the CSV changed or serializing a large body never
+# blocks the event loop (CachedPolicyQueries is thread-safe).
+def countries(request):
+    queries = request.app.state.queries
+    focus = _query_value(request, "focus")
+    policy_class = _query_value(request, "class")
+    region = _query_value(request, "region")
+    return json_response(request, {
+        "focus": focus,
+        "class": policy_class,
+        "region": region,
+        "countries": queries.matching_countries(focus, policy_class, region),
+    })
+
+
+def documents(request):
+    name = request.path_params["name"]
+    result = request.app.state.queries.country_documents(name)
+    if result is None:
+        raise HTTPException(404, f"unknown country: {name}")
+    return json_response(request, {"country": name, "documents": result})
+
+
+def actions(request):
+    key = request.path_params["id"]
+    try:
+        result = request.app.state.queries.document_actions(key)
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
+    if result is None:
+        raise HTTPException(404, f"unknown document: {key}")
+    return json_response(request, result)
+
+
+def regions(request):
+    return json_response(request, request.app.state.queries.region_summaries())
+
+
+def region(request):
+    name = request.path_params["name"]
+    summary = request.app.state.queries.region_summaries()["regions"].get(name)
+    if summary is None:
+        raise HTTPException(404, f"unknown region: {name}")
+    return json_response(request, {"region": name, **summary})
+
+
+def stats(request):
+    return json_response(request, request.app.state.queries.stats())
+
+
+def create_app(path=POLICY_CSV, max_entries=1024, max_bytes=32 << 20):
+    """
+    Builds the ASGI application over one policy spreadsheet.
+
+    The cleaned table is loaded once (through the Feather cache) and reloaded
+    only when the CSV's content changes.
+
+    Args:
+        path (str or Path): Source CSV file.
+        max_entries (int): Maximum number of cached query results.
+        max_bytes (int): Maximum approximate size of the cached query results.
+
+    Returns:
+        Starlette: The application.
+    """
+    app = Starlette(
+        routes=[
+            Route("/countries", countries),
+            Route("/country/{name}/documents", documents),
+            Route("/document/{id}/actions", actions),
+            Route("/regions", regions),
+            Route("/regions/{name}", region),
+            Route("/stats", stats),
+        ],
+        middleware=[Middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE)],
+    )
+    app.state.queries = CachedPolicyQueries(path, max_entries, max_bytes)
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve filtered policy queries.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--csv", default=POLICY_CSV, help="policy spreadsheet to serve")
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.csv), host=args.host, port=args.port)
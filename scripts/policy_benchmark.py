@@ -0,0 +1,235 @@
+"""
+Benchmarks of the analysis and export pipeline.
+
+Every stage (CSV ingestion, the grouped per-country records, the regional top-k
+tables, the employment counts, the count cube, the bitmap index, the JSON export and
+chart rendering) is run on the
+real spreadsheet and on synthetic tables scaled 10x, 100x and 1000x. For each run the
+wall time, the peak resident memory above the level before the stage (sampled with
+psutil) and the size of what the stage wrote are recorded.
+
+Synthetic inputs are written by policy_synth from a model learned on the real table
+(same seed, same file), then loaded like the real CSV.
+
+Results are saved as JSON (benchmarks/<timestamp>.json by default); pass an earlier
+file with --compare to print the time ratio of every stage.
+
+Usage:
+    python scripts/policy_benchmark.py [--scales 1 10 100 1000] [--stages ingest grouped ...]
+                                       [--out results.json] [--compare old.json]
+"""
+import argparse
+import json
+import platform
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+import psutil
+
+from policy_aggregates import counts_by_region, employment_counts_by_country, top_k_by_region
+from policy_bitmap import BitmapIndex
+from policy_build import export_web_data
+from policy_cache import file_hash, load_policy_data_cached
+from policy_charts import chart_specs, render_charts
+from policy_cube import PolicyCube
+from policy_data import FOCUS, POLICY_CLASS, POLICY_CSV, REGIONS, ROOT_DIR, load_policy_data
+from policy_export import build_country_records
+from policy_instrument import PeakMemory
+from policy_synth import learn_policy_model, write_synthetic_csv
+
+BENCHMARK_FORMAT = "africa-policy-benchmark/1"
+BENCHMARK_DIR = ROOT_DIR / "benchmarks"
+DEFAULT_SCALES = [1, 10, 100, 1000]
+
+
+def _directory_size(path):
+    return sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file())
+
+
+# Each stage gets the context dict (csv, data, work directory) and returns the number
+# of bytes it wrote, or None for in-memory stages
+def _stage_ingest(ctx):
+    ctx["data"] = load_policy_data(ctx["csv"])
+
+
+def _stage_grouped(ctx):
+    build_country_records(ctx["data"])
+
+
+def _stage_regional_top_k(ctx):
+    top_k_by_region(ctx["data"], FOCUS, 10)
+    top_k_by_region(ctx["data"], POLICY_CLASS, 10)
+
+
+def _stage_employment_counts(ctx):
+    employment_counts_by_country(ctx["data"])
+    counts_by_region(ctx["data"])
+
+
+def _stage_cube(ctx):
+    # builds the cube and answers the regional top-k and employment counts from it
+    cube = PolicyCube.from_frame(ctx["data"])
+    for region in REGIONS:
+        cube.select(region=region).top_k("focus", 10)
+        cube.select(region=region).top_k("policy_class", 10)
+    cube.employment_counts()
+    cube.rollup_regions().employment_counts("region", observed=False)
+
+
+def _stage_bitmap(ctx):
+    # builds the bitmap index and counts the flag combinations of every region
+    index = BitmapIndex.from_frame(ctx["data"])
+    for region in REGIONS:
+        index.count(region=region, youth=True, women=True, disability=True)
+        len(index.query(f'women AND disability AND energy AND region="{region}"'))
+
+
+def _stage_json_export(ctx):
+    out_dir = Path(ctx["work"]) / "export"
+    out_dir.mkdir(exist_ok=True)
+    export_web_data(ctx["data"], out_dir)
+    return _directory_size(out_dir) - _directory_size(out_dir / "cache")
+
+
+def _stage_charts(ctx):
+    out_dir = Path(ctx["work"]) / "charts"
+    render_charts(chart_specs(ctx["data"]), out_dir, workers=1, use_cache=False)
+    return _directory_size(out_dir)
+
+
+STAGES = {
+    "ingest": _stage_ingest,
+    "grouped": _stage_grouped,
+    "regional_top_k": _stage_regional_top_k,
+    "employment_counts": _stage_employment_counts,
+    "cube": _stage_cube,
+    "bitmap": _stage_bitmap,
+    "json_export": _stage_json_export,
+    "charts": _stage_charts,
+}
+
+
+def run_stage(name, ctx):
+    """
+    Runs one stage and measures it.
+
+    Args:
+        name (str): Key of STAGES.
+        ctx (dict): Stage context.
+
+    Returns:
+        dict: stage, seconds, peak_rss_bytes and output_bytes.
+    """
+    with PeakMemory() as memory:
+        start = time.perf_counter()
+        output_bytes = STAGES[name](ctx)
+        seconds = time.perf_counter() - start
+    return {
+        "stage": name,
+        "seconds": round(seconds, 4),
+        "peak_rss_bytes": memory.peak,
+        "output_bytes": output_bytes,
+    }
+
+
+def run_benchmarks(scales=DEFAULT_SCALES, stages=tuple(STAGES), path=POLICY_CSV, seed=0):
+    """
+    Runs the selected stages at every scale.
+
+    Args:
+        scales (list): Scale factors (1 is the real table).
+        stages (list): Stage names, run in this order.
+        path (str or Path): Source CSV.
+        seed (int): Seed of the synthetic tables.
+
+    Returns:
+        list: One result dict per (scale, stage) with "scale" and "rows" added.
+    """
+    base = load_policy_data_cached(path)
+    model = learn_policy_model(base)
+    results = []
+    for scale in scales:
+        with tempfile.TemporaryDirectory(prefix=f"policy-bench-{scale}x-") as work:
+            csv, data = Path(path), base
+            if scale != 1:
+                csv = Path(work) / "policies.csv"
+                write_synthetic_csv(csv, model, rows=scale * len(base), seed=seed)
+                data = load_policy_data(csv)
+            ctx = {"csv": csv, "data": data, "work": work}
+            for name in stages:
+                result = run_stage(name, ctx)
+                results.append({"scale": scale, "rows": len(ctx["data"]), **result})
+                print(f"{scale:>5}x {result['stage']:<18} {result['seconds']:>9.3f}s "
+                      f"{result['peak_rss_bytes'] / 2**20:>9.1f} MiB  {result['output_bytes'] or '-'}")
+            del ctx, data
+    return results
+
+
+def save_results(results, path, source=POLICY_CSV):
+    """
+    Writes benchmark results with the environment they were measured in.
+
+    Args:
+        results (list): Output of run_benchmarks.
+        path (str or Path): Output JSON file.
+        source (str or Path): CSV the synthetic tables were derived from.
+
+    Returns:
+        Path: The results file.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "format": BENCHMARK_FORMAT,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "cpus": psutil.cpu_count(),
+        "source_hash": file_hash(source),
+        "results": results,
+    }
+    path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    return path
+
+
+def compare_results(baseline, results):
+    """
+    Relates new timings to a saved baseline.
+
+    Args:
+        baseline (dict): Payload written by save_results.
+        results (list): Output of run_benchmarks.
+
+    Returns:
+        list: (scale, stage, baseline seconds, seconds, ratio) for every pair
+        measured in both runs.
+    """
+    before = {(r["scale"], r["stage"]): r["seconds"] for r in baseline["results"]}
+    rows = []
+    for r in results:
+        old = before.get((r["scale"], r["stage"]))
+        if old is not None:
+            rows.append((r["scale"], r["stage"], old, r["seconds"], r["seconds"] / old if old else float("inf")))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the analysis and export pipeline.")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES)
+    parser.add_argument("--stages", nargs="+", default=list(STAGES), choices=list(STAGES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="results file (default: benchmarks/<timestamp>.json)")
+    parser.add_argument("--compare", default=None, help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.scales, args.stages, seed=args.seed)
+    out = args.out or BENCHMARK_DIR / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    print(f"results -> {save_results(results, out)}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        for scale, stage, old, new, ratio in compare_results(baseline, results):
+            print(f"{scale:>5}x {stage:<18} {old:>9.3f}s -> {new:>9.3f}s  x{ratio:.2f}")
@@ -0,0 +1,554 @@
+"""
+Bitmap index over the rows of the cleaned policy table.
+
+BitmapIndex keeps one compressed set of row positions (a Bitmap) per distinct value
+of country, region, focus area, policy class and each Yes/No employment flag, so any
+combination of filters is answered with set operations on those bitmaps instead of
+boolean masks over the whole frame:
+
+    index = BitmapIndex.from_frame(data)
+    rows = index.bitmap("women", True) & index.bitmap("disability", True) & index.bitmap("focus", "energy")
+    len(rows & index.bitmap("region", "West Africa"))                 # cardinality
+    index.count(women=True, disability=True, focus="energy", region="West Africa")
+    index.query('women AND disability AND energy AND "West Africa"')
+    index.count_by("country", index.query("youth AND NOT women"))     # per-country counts
+
+Bitmaps use the layout of Roaring bitmaps: row positions are split into chunks of
+65536 rows; a chunk holding at most 4096 rows is stored as a sorted uint16 array,
+a denser one as 1024 uint64 words (8 KiB). Set operations and cardinality work chunk
+by chunk on whole numpy arrays, so the cost grows with the number of chunks and set
+rows, not with Python-level loops over rows. The index is built in appends
+(BitmapIndex.update), so from_csv can index a file of millions of rows chunk by chunk.
+
+Usage:
+    python scripts/policy_bitmap.py 'women AND disability AND focus=energy AND region="West Africa"'
+                                    [--csv path] [--by country]
+"""
+import argparse
+import re
+
+import numpy as np
+import pandas as pd
+
+from policy_data import (
+    COUNTRY,
+    DEFAULT_CHUNKSIZE,
+    DISABILITY,
+    FOCUS,
+    POLICY_CLASS,
+    POLICY_CSV,
+    REGION,
+    WOMEN,
+    YOUTH,
+    read_policy_chunks,
+)
+from policy_instrument import instrumented
+
+# Index axes and the table columns they are built from
+AXIS_COLUMNS = {
+    "country": COUNTRY,
+    "region": REGION,
+    "focus": FOCUS,
+    "policy_class": POLICY_CLASS,
+    "youth": YOUTH,
+    "women": WOMEN,
+    "disability": DISABILITY,
+}
+FLAG_AXES = ["youth", "women", "disability"]
+
+CHUNK_BITS = 16
+CHUNK_SIZE = 1 << CHUNK_BITS
+ARRAY_LIMIT = 4096  # chunks with more rows are stored as bitmaps
+WORDS = CHUNK_SIZE // 64
+
+
+def _to_words(positions):
+    # sorted uint16 positions -> 1024 little-endian uint64 words
+    bits = np.zeros(CHUNK_SIZE, dtype=bool)
+    bits[positions] = True
+    return np.packbits(bits, bitorder="little").view("<u8")
+
+
+def _to_array(words):
+    return np.flatnonzero(np.unpackbits(words.view(np.uint8), bitorder="little")).astype(np.uint16)
+
+
+def _positions(container):
+    return container if container.dtype == np.uint16 else _to_array(container)
+
+
+def _contains(words, positions):
+    # mask of the positions whose bit is set in words
+    shifts = (positions & 63).astype(np.uint64)
+    return (words[positions >> 6] >> shifts) & np.uint64(1) == 1
+
+
+def _cardinality(container):
+    return len(container) if container.dtype == np.uint16 else int(np.bitwise_count(container).sum())
+
+
+def _normalize(container):
+    # picks the smaller representation; None for an empty chunk
+    if container.dtype == np.uint16:
+        if len(container) == 0:
+            return None
+        return _to_words(container) if len(container) > ARRAY_LIMIT else container
+    count = _cardinality(container)
+    if count == 0:
+        return None
+    return _to_array(container) if count <= ARRAY_LIMIT else container
+
+
+def _result(container):
+    # normalization of an operation's result: sparse word containers are not unpacked,
+    # because the next operation or len() handles them as fast as an array
+    if container.dtype == np.uint16:
+        return _normalize(container)
+    return container if container.any() else None
+
+
+def _and(a, b):
+    if a.dtype == np.uint16 and b.dtype == np.uint16:
+        return np.intersect1d(a, b, assume_unique=True)
+    if a.dtype == np.uint16:
+        return a[_contains(b, a)]
+    if b.dtype == np.uint16:
+        return b[_contains(a, b)]
+    return a & b
+
+
+def _or(a, b):
+    if a.dtype == np.uint16 and b.dtype == np.uint16:
+        return np.union1d(a, b)
+    if a.dtype == np.uint16:
+        a = _to_words(a)
+    if b.dtype == np.uint16:
+        b = _to_words(b)
+    return a | b
+
+
+def _andnot(a, b):
+    if a.dtype == np.uint16 and b.dtype == np.uint16:
+        return np.setdiff1d(a, b, assume_unique=True)
+    if a.dtype == np.uint16:
+        return a[~_contains(b, a)]
+    if b.dtype == np.uint16:
+        b = _to_words(b)
+    return a & ~b
+
+
+class Bitmap:
+    """
+    Compressed set of row positions.
+
+    Combine bitmaps with & (AND), | (OR) and - (AND NOT); len() is the number of
+    rows in the set. NOT needs the number of rows in the table, see BitmapIndex.negate.
+
+    Args:
+        containers (dict, optional): Chunk number -> sorted uint16 positions or
+            uint64 words, none of them empty.
+    """
+
+    def __init__(self, containers=None):
+        self.containers = containers or {}
+
+    @classmethod
+    def from_positions(cls, positions):
+        """
+        Builds a bitmap from row positions.
+
+        Args:
+            positions (np.ndarray): Sorted, distinct non-negative row positions.
+
+        Returns:
+            Bitmap: The set of those positions.
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        chunks = positions >> CHUNK_BITS
+        keys, starts = np.unique(chunks, return_index=True)
+        ends = np.append(starts[1:], len(positions))
+        containers = {}
+        for key, start, end in zip(keys.tolist(), starts, ends):
+            containers[key] = _normalize((positions[start:end] & (CHUNK_SIZE - 1)).astype(np.uint16))
+        return cls(containers)
+
+    @classmethod
+    def full(cls, size):
+        """
+        Args:
+            size (int): Number of rows.
+
+        Returns:
+            Bitmap: The positions 0..size-1.
+        """
+        containers = {}
+        for key in range((size + CHUNK_SIZE - 1) // CHUNK_SIZE):
+            rows = min(CHUNK_SIZE, size - key * CHUNK_SIZE)
+            if rows == CHUNK_SIZE:
+                containers[key] = np.full(WORDS, np.iinfo(np.uint64).max, dtype=np.uint64)
+            else:
+                containers[key] = _normalize(np.arange(rows, dtype=np.uint16))
+        return cls(containers)
+
+    def _combine(self, other, op, keys):
+        containers = {}
+        for key in keys:
+            a, b = self.containers.get(key), other.containers.get(key)
+            if a is None or b is None:
+                container = a if b is None else b
+            else:
+                container = _result(op(a, b))
+            if container is not None:
+                containers[key] = container
+        return Bitmap(containers)
+
+    def __and__(self, other):
+        keys = self.containers.keys() & other.containers.keys()
+        return self._combine(other, _and, sorted(keys))
+
+    def __or__(self, other):
+        keys = self.containers.keys() | other.containers.keys()
+        return self._combine(other, _or, sorted(keys))
+
+    def __sub__(self, other):
+        containers = {}
+        for key, a in self.containers.items():
+            b = other.containers.get(key)
+            container = a if b is None else _result(_andnot(a, b))
+            if container is not None:
+                containers[key] = container
+        return Bitmap(containers)
+
+    def __len__(self):
+        return sum(_cardinality(container) for container in self.containers.values())
+
+    def __bool__(self):
+        return bool(self.containers)
+
+    def __eq__(self, other):
+        if not isinstance(other, Bitmap) or self.containers.keys() != other.containers.keys():
+            return False
+        return all(np.array_equal(_positions(a), _positions(other.containers[key]))
+                   for key, a in self.containers.items())
+
+    def to_positions(self):
+        """
+        Returns:
+            np.ndarray: The row positions in the set, sorted (int64).
+        """
+        parts = []
+        for key in sorted(self.containers):
+            parts.append(_positions(self.containers[key]).astype(np.int64) + (key << CHUNK_BITS))
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    @property
+    def nbytes(self):
+        """
+        Returns:
+            int: Bytes held by the containers.
+        """
+        return sum(container.nbytes for container in self.containers.values())
+
+
+# Tokens of the query language: parentheses, "=", quoted strings and bare words
+_TOKEN = re.compile(r"""\s*(?:([()=])|"([^"]*)"|'([^']*)'|([^\s()="']+))""")
+_TRUE_WORDS = {"yes": True, "true": True, "no": False, "false": False}
+
+
+class BitmapIndex:
+    """
+    One Bitmap per distinct value of every axis in AXIS_COLUMNS.
+
+    Build it with from_frame or from_csv. Row positions are the row numbers of the
+    indexed table (0..size-1), so data.iloc[bitmap.to_positions()] selects the rows.
+
+    Attributes:
+        size (int): Number of indexed rows.
+        bitmaps (dict): Axis name -> {value -> Bitmap}; the flag axes have the
+            values True and False (unknown answers are in neither).
+    """
+
+    def __init__(self):
+        self.size = 0
+        self.bitmaps = {axis: {} for axis in AXIS_COLUMNS}
+        self._universe = None
+
+    @classmethod
+    @instrumented("bitmap_index")
+    def from_frame(cls, data):
+        """
+        Indexes the cleaned table.
+
+        Args:
+            data (pd.DataFrame): Cleaned policy table.
+
+        Returns:
+            BitmapIndex: The index.
+        """
+        index = cls()
+        index.update(data)
+        return index
+
+    @classmethod
+    def from_csv(cls, path=POLICY_CSV, chunksize=DEFAULT_CHUNKSIZE):
+        """
+        Indexes a spreadsheet chunk by chunk, without loading it whole.
+
+        Args:
+            path (str or Path): Policy CSV.
+            chunksize (int): Rows per chunk.
+
+        Returns:
+            BitmapIndex: The index.
+        """
+        index = cls()
+        for chunk in read_policy_chunks(path, chunksize):
+            index.update(chunk)
+        return index
+
+    def update(self, data):
+        """
+        Appends the rows of a cleaned table after the rows already indexed.
+
+        Args:
+            data (pd.DataFrame): Cleaned policy table (or chunk of one).
+        """
+        for axis, column in AXIS_COLUMNS.items():
+            values = data[column]
+            if axis in FLAG_AXES:
+                labels = [False, True]
+                codes = np.where(values.isna(), -1, values.fillna(False).astype("int8"))
+            else:
+                labels = values.cat.categories.tolist()
+                codes = values.cat.codes.to_numpy()
+
+            # row positions grouped by value, ascending within each value
+            positions = np.flatnonzero(codes >= 0)
+            codes = codes[positions]
+            order = np.argsort(codes, kind="stable")
+            positions = positions[order] + self.size
+            bounds = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(labels)))])
+            for label, start, end in zip(labels, bounds[:-1], bounds[1:]):
+                if start == end:
+                    continue
+                bitmap = Bitmap.from_positions(positions[start:end])
+                previous = self.bitmaps[axis].get(label)
+                self.bitmaps[axis][label] = bitmap if previous is None else previous | bitmap
+        self.size += len(data)
+        self._universe = None
+
+    def _axis(self, axis):
+        if axis not in self.bitmaps:
+            raise KeyError(f"unknown axis {axis!r}; axes are {list(self.bitmaps)}")
+        return self.bitmaps[axis]
+
+    def bitmap(self, axis, value):
+        """
+        Args:
+            axis (str): Axis name, e.g. "focus".
+            value: Value of that axis, e.g. "energy" (True / False for flags).
+
+        Returns:
+            Bitmap: Rows with that value (empty if there are none).
+        """
+        return self._axis(axis).get(value, Bitmap())
+
+    def universe(self):
+        """
+        Returns:
+            Bitmap: Every indexed row.
+        """
+        if self._universe is None:
+            self._universe = Bitmap.full(self.size)
+        return self._universe
+
+    def negate(self, bitmap):
+        """
+        Args:
+            bitmap (Bitmap): Set of rows.
+
+        Returns:
+            Bitmap: The indexed rows not in bitmap (NOT).
+        """
+        return self.universe() - bitmap
+
+    def select(self, **filters):
+        """
+        ANDs one condition per axis.
+
+        Args:
+            **filters: Axis name -> value, or list of values of which any may match
+                (OR), e.g. women=True, region="West Africa", focus=["energy", "WASH"].
+
+        Returns:
+            Bitmap: Rows matching every filter (every row without filters).
+        """
+        result = None
+        for axis, wanted in filters.items():
+            wanted = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+            matches = Bitmap()
+            for value in wanted:
+                matches = matches | self.bitmap(axis, value)
+            result = matches if result is None else result & matches
+        return self.universe() if result is None else result
+
+    def count(self, **filters):
+        """
+        Args:
+            **filters: As for select.
+
+        Returns:
+            int: Number of rows matching every filter.
+        """
+        return len(self.select(**filters))
+
+    def count_by(self, axis, bitmap=None):
+        """
+        Counts the rows of a set per value of one axis.
+
+        Args:
+            axis (str): Axis to count along.
+            bitmap (Bitmap, optional): Rows to count; every row when None.
+
+        Returns:
+            pd.Series: Non-zero counts named "count", index named after the table
+            column, in descending order (ties in value order).
+        """
+        counts = {}
+        for value, rows in self._axis(axis).items():
+            count = len(rows if bitmap is None else rows & bitmap)
+            if count:
+                counts[value] = count
+        counts = pd.Series(counts, dtype="int64", name="count")
+        counts.index.name = AXIS_COLUMNS[axis]
+        return counts.sort_values(ascending=False, kind="stable")
+
+    def _resolve(self, term):
+        # a bare word: a flag name, or a value of exactly one axis
+        if term.lower() in FLAG_AXES:
+            return self.bitmap(term.lower(), True)
+        axes = [axis for axis, values in self.bitmaps.items() if axis not in FLAG_AXES and term in values]
+        if len(axes) != 1:
+            problem = "matches no value" if not axes else f"is ambiguous ({', '.join(axes)})"
+            raise ValueError(f"query term {term!r} {problem}; write axis=value")
+        return self.bitmaps[axes[0]][term]
+
+    def _resolve_pair(self, axis, value):
+        # an axis=value term; unknown axes and values fail like unknown bare words
+        if axis not in self.bitmaps:
+            raise ValueError(f"query axis {axis!r} is unknown; axes are {', '.join(self.bitmaps)}")
+        if axis in FLAG_AXES:
+            if value.lower() not in _TRUE_WORDS:
+                raise ValueError(f"{axis} takes yes or no, not {value!r}")
+            return self.bitmap(axis, _TRUE_WORDS[value.lower()])
+        if value not in self.bitmaps[axis]:
+            raise ValueError(f"query term {axis}={value!r} matches no value")
+        return self.bitmaps[axis][value]
+
+    def query(self, expression):
+        """
+        Evaluates a boolean expression over the index.
+
+        Terms are axis=value (value quoted when it contains spaces), a flag name on
+        its own (youth means youth=yes), or a bare value of a single axis; flags
+        accept yes/no/true/false. Terms combine with NOT, AND, OR (in that order
+        of precedence, case-insensitive) and parentheses, e.g.
+
+            women AND disability AND focus=energy AND region="West Africa"
+            (youth OR women) AND NOT "multiple sectors"
+
+        Args:
+            expression (str): The query.
+
+        Returns:
+            Bitmap: Matching rows.
+
+        Raises:
+            ValueError: If the expression does not parse or names an unknown axis or value.
+        """
+        tokens = []
+        position = 0
+        expression = expression.strip()
+        while position < len(expression):
+            match = _TOKEN.match(expression, position)
+            if match is None or match.end() == position:
+                raise ValueError(f"cannot parse query at {expression[position:]!r}")
+            symbol, double, single, word = match.groups()
+            if symbol:
+                tokens.append(symbol)
+            elif word is not None and word.upper() in ("AND", "OR", "NOT"):
+                tokens.append(word.upper())
+            else:
+                # quoted strings and words are both values; "=" is kept as its own token
+                tokens.append(("value", next(v for v in (double, single, word) if v is not None)))
+            position = match.end()
+
+        def peek():
+            return tokens[0] if tokens else None
+
+        def expect_value():
+            token = tokens.pop(0) if tokens else None
+            if not isinstance(token, tuple):
+                raise ValueError(f"expected a value in query {expression!r}")
+            return token[1]
+
+        def parse_or():
+            result = parse_and()
+            while peek() == "OR":
+                tokens.pop(0)
+                result = result | parse_and()
+            return result
+
+        def parse_and():
+            result = parse_not()
+            while peek() == "AND":
+                tokens.pop(0)
+                result = result & parse_not()
+            return result
+
+        def parse_not():
+            if peek() == "NOT":
+                tokens.pop(0)
+                return self.negate(parse_not())
+            if peek() == "(":
+                tokens.pop(0)
+                result = parse_or()
+                if peek() != ")":
+                    raise ValueError(f"missing ')' in query {expression!r}")
+                tokens.pop(0)
+                return result
+            term = expect_value()
+            if peek() != "=":
+                return self._resolve(term)
+            tokens.pop(0)
+            return self._resolve_pair(term.lower(), expect_value())
+
+        result = parse_or()
+        if tokens:
+            raise ValueError(f"unexpected {tokens[0]!r} in query {expression!r}")
+        return result
+
+    @property
+    def nbytes(self):
+        """
+        Returns:
+            int: Bytes held by all bitmaps.
+        """
+        return sum(bitmap.nbytes for values in self.bitmaps.values() for bitmap in values.values())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Count the policy rows matching a boolean query.")
+    parser.add_argument("query", help='e.g. \'women AND disability AND focus=energy AND region="West Africa"\'')
+    parser.add_argument("--csv", default=POLICY_CSV, help="policy CSV (indexed chunk by chunk)")
+    parser.add_argument("--by", default=None, choices=list(AXIS_COLUMNS), help="also count per value of an axis")
+    args = parser.parse_args()
+
+    index = BitmapIndex.from_csv(args.csv)
+    try:
+        rows = index.query(args.query)
+    except ValueError as error:
+        parser.error(str(error))
+    print(f"{len(rows)} of {index.size} rows ({index.nbytes / 2**20:.1f} MiB index)")
+    if args.by:
+        print(index.count_by(args.by, rows).to_string())
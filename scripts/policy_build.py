@@ -0,0 +1,251 @@
+"""
+Full and incremental builds of the data files the web map loads.
+
+A full build writes every data/africa_policy_* file from the cleaned table and saves
+the table as a snapshot next to the load cache. An incremental build compares the
+current table with that snapshot document by document, keyed on
+(Country ID, Document ID by country), and only regroups the countries and regions
+whose documents were added, removed or edited; their entries are patched into the
+existing files and only their shards are rewritten. The facet index and the country
+summary refer to positions in the sorted name lists, so they are rebuilt from the
+whole table (one cheap pass each); the search index is rebuilt only when an action
+text, a title or the row order changed, since most curation edits only touch the
+classifications and Yes/No columns.
+
+Usage:
+    python scripts/policy_build.py            incremental build (full when there is no snapshot)
+    python scripts/policy_build.py --full     full build
+"""
+import argparse
+import hashlib
+import json
+from pathlib import Path
+
+import pandas as pd
+
+from policy_cache import load_policy_data_cached
+from policy_data import COUNTRY, DATA_DIR, DOCUMENT_KEY, POLICY_COLUMNS, REGION, REGIONS
+from policy_export import (
+    DOCUMENTS,
+    EXPORT_COLUMNS,
+    SHARD_DIR,
+    build_country_records,
+    build_region_aggregates,
+    shard_name,
+    write_country_shards,
+    write_country_summary,
+    write_facet_index,
+    write_json,
+    write_region_aggregates,
+)
+from policy_instrument import instrumented
+from policy_search import search_entries, write_search_index
+
+try:
+    import pyarrow.feather as feather
+except ImportError:
+    feather = None
+
+# Output files, relative to the data directory
+RECORDS_JSON = "africa_policy_data.json"
+FACETS_JSON = "africa_policy_facets.json"
+REGIONS_JSON = "africa_policy_regions.json"
+SEARCH_JSON = "africa_policy_search.json"
+SUMMARY_JSON = "africa_policy_summary.json"
+SNAPSHOT = Path("cache") / "export_snapshot.feather"
+
+
+def _write_records(grouped, path):
+    # the array-of-records file as the notebook always wrote it (indent=2)
+    grouped.rename(columns={COUNTRY: "country"}).to_json(path, orient="records", indent=2)
+
+
+def _remove_stale_shards(shard_dir, countries):
+    # drops the shards (and compressed siblings) of countries no longer in the table
+    keep = {shard_name(country) for country in countries}
+    for shard in Path(shard_dir).glob("*.json*"):
+        if shard.name.split(".json")[0] + ".json" not in keep:
+            shard.unlink()
+
+
+def save_snapshot(data, data_dir=DATA_DIR):
+    """
+    Stores the table the current data files were built from.
+
+    Args:
+        data (pd.DataFrame): Cleaned policy table.
+        data_dir (str or Path): Data directory of the export.
+
+    Returns:
+        Path or None: The snapshot file, or None when pyarrow is not installed.
+    """
+    if feather is None:
+        return None
+    path = Path(data_dir) / SNAPSHOT
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    feather.write_feather(data, tmp, compression="uncompressed")
+    tmp.replace(path)
+    return path
+
+
+def load_snapshot(data_dir=DATA_DIR):
+    """
+    Reads the snapshot saved by the last build.
+
+    Args:
+        data_dir (str or Path): Data directory of the export.
+
+    Returns:
+        pd.DataFrame or None: The snapshot, or None if there is none (or no pyarrow).
+    """
+    path = Path(data_dir) / SNAPSHOT
+    if feather is None or not path.exists():
+        return None
+    return feather.read_table(path, memory_map=True).to_pandas()
+
+
+def document_fingerprints(data):
+    """
+    Hashes the rows of every document.
+
+    Args:
+        data (pd.DataFrame): Cleaned policy table.
+
+    Returns:
+        pd.Series: Hex digest per (Country ID, Document ID by country) key; it
+        changes when any row of the document is edited, added, removed or reordered.
+    """
+    row_hashes = pd.util.hash_pandas_object(data[POLICY_COLUMNS], index=False)
+    return row_hashes.groupby([data[col] for col in DOCUMENT_KEY], sort=True).agg(
+        lambda hashes: hashlib.sha1(hashes.to_numpy().tobytes()).hexdigest()
+    )
+
+
+def diff_policy_data(old, new):
+    """
+    Finds the documents, countries and regions that differ between two tables.
+
+    Args:
+        old (pd.DataFrame): Table the current files were built from.
+        new (pd.DataFrame): Current table.
+
+    Returns:
+        dict: "documents" (changed (Country ID, Document ID by country) keys),
+        "countries" and "regions" (sorted names touched by those documents, in
+        either table).
+    """
+    old_prints = document_fingerprints(old)
+    new_prints = document_fingerprints(new)
+    prints = pd.concat([old_prints.rename("old"), new_prints.rename("new")], axis=1)
+    changed = prints.index[prints["old"].ne(prints["new"])]
+
+    countries, regions = set(), set()
+    for table in (old, new):
+        rows = table[pd.MultiIndex.from_frame(table[DOCUMENT_KEY]).isin(changed)]
+        countries.update(rows[COUNTRY].dropna().astype(object))
+        regions.update(rows[REGION].dropna().astype(object))
+    return {
+        "documents": changed.tolist(),
+        "countries": sorted(countries),
+        "regions": [region for region in REGIONS if region in regions],
+    }
+
+
+@instrumented("export")
+def export_web_data(data, data_dir=DATA_DIR):
+    """
+    Full build: writes every data file of the map and saves the snapshot.
+
+    Args:
+        data (pd.DataFrame): Cleaned policy table.
+        data_dir (str or Path): Output directory.
+
+    Returns:
+        dict: Output path -> size in bytes for the precompressed files written.
+    """
+    data_dir = Path(data_dir)
+    grouped = build_country_records(data)
+    _write_records(grouped, data_dir / RECORDS_JSON)
+
+    sizes = write_facet_index(data, data_dir / FACETS_JSON)
+    sizes.update(write_region_aggregates(data, data_dir / REGIONS_JSON))
+    sizes.update(write_search_index(data, data_dir / SEARCH_JSON))
+    sizes.update(write_country_summary(data, data_dir / SUMMARY_JSON))
+    sizes.update(write_country_shards(grouped, data_dir / SHARD_DIR))
+    _remove_stale_shards(data_dir / SHARD_DIR, grouped[COUNTRY])
+    save_snapshot(data, data_dir)
+    return sizes
+
+
+@instrumented("export_incremental")
+def export_incremental(data, data_dir=DATA_DIR):
+    """
+    Incremental build: patches the data files for the documents that changed.
+
+    Falls back to export_web_data when there is no snapshot or an output is missing.
+
+    Args:
+        data (pd.DataFrame): Cleaned policy table.
+        data_dir (str or Path): Output directory of a previous build.
+
+    Returns:
+        dict: "mode" ("full", "incremental" or "unchanged") plus the diff_policy_data
+        result for incremental builds.
+    """
+    data_dir = Path(data_dir)
+    snapshot = load_snapshot(data_dir)
+    outputs = [RECORDS_JSON, FACETS_JSON, REGIONS_JSON, SEARCH_JSON, SUMMARY_JSON]
+    if snapshot is None or not all((data_dir / name).exists() for name in outputs):
+        export_web_data(data, data_dir)
+        return {"mode": "full"}
+
+    diff = diff_policy_data(snapshot, data)
+    if not diff["documents"]:
+        return {"mode": "unchanged", **diff}
+
+    # per-country records: regroup only the touched countries, keep everything else
+    records = pd.DataFrame(json.loads((data_dir / RECORDS_JSON).read_text(encoding="utf-8")))
+    records = records.rename(columns={"country": COUNTRY}).set_index(COUNTRY)
+    touched = data[data[COUNTRY].isin(diff["countries"])]
+    records = records.drop(index=diff["countries"], errors="ignore")
+    if not touched.empty:  # empty when the change only deleted countries
+        records = pd.concat([records, build_country_records(touched).set_index(COUNTRY)])
+    order = [country for country in data[COUNTRY].cat.categories if country in records.index]
+    grouped = records.loc[order, [DOCUMENTS, *EXPORT_COLUMNS]].reset_index()
+
+    _write_records(grouped, data_dir / RECORDS_JSON)
+    write_country_shards(grouped, data_dir / SHARD_DIR, countries=diff["countries"])
+    _remove_stale_shards(data_dir / SHARD_DIR, grouped[COUNTRY])
+
+    # region summaries: recompute only the touched regions, in place
+    region_payload = json.loads((data_dir / REGIONS_JSON).read_text(encoding="utf-8"))
+    touched_regions = build_region_aggregates(data[data[REGION].isin(diff["regions"])])["regions"]
+    for region in diff["regions"]:
+        region_payload["regions"][region] = touched_regions[region]
+    write_json(region_payload, data_dir / REGIONS_JSON)
+
+    write_facet_index(data, data_dir / FACETS_JSON)
+    write_country_summary(data, data_dir / SUMMARY_JSON)
+    if search_entries(data) != search_entries(snapshot):
+        write_search_index(data, data_dir / SEARCH_JSON)
+    save_snapshot(data, data_dir)
+    return {"mode": "incremental", **diff}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the web map's data files.")
+    parser.add_argument("--full", action="store_true", help="rebuild everything")
+    args = parser.parse_args()
+
+    data = load_policy_data_cached()
+    if args.full:
+        export_web_data(data)
+        print("full build")
+    else:
+        report = export_incremental(data)
+        print(f"{report['mode']} build")
+        if report["mode"] != "full":
+            print(f"changed documents: {len(report['documents'])}")
+            print(f"countries: {', '.join(report['countries']) or '-'}")
+            print(f"regions: {', '.join(report['regions']) or '-'}")
@@ -0,0 +1,122 @@
+"""
+On-disk cache of the cleaned policy table.
+
+The cleaned frame is written as a Feather (Arrow IPC) file named after the source
+CSV's location and a content hash of it. When the hash matches, the table is read
+back memory-mapped instead of re-parsing and re-cleaning the CSV; when the CSV
+changes a new file is written and that CSV's stale ones are removed. Several CSVs
+(the real sheet, synthetic and benchmark copies) share the cache directory without
+evicting each other.
+
+pyarrow is optional: without it load_policy_data_cached falls back to load_policy_data.
+"""
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+from policy_data import DATA_DIR, POLICY_CSV, load_policy_data
+from policy_instrument import instrumented
+
+try:
+    import pyarrow.feather as feather
+except ImportError:
+    feather = None
+
+CACHE_DIR = DATA_DIR / "cache"
+
+# Bump when clean_policy_data or POLICY_DTYPES change so old caches are not reused
+CACHE_VERSION = 3
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """
+    Computes the SHA-256 content hash of a file.
+
+    Args:
+        path (str or Path): File to hash.
+        chunk_size (int): Bytes read per iteration.
+
+    Returns:
+        str: Hex digest of the file contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_key(path):
+    """
+    Identifies a source CSV by its location.
+
+    Args:
+        path (str or Path): Source CSV file.
+
+    Returns:
+        str: Short hex digest of the resolved path.
+    """
+    return hashlib.sha256(str(Path(path).resolve()).encode("utf-8")).hexdigest()[:8]
+
+
+def cache_path(source_hash, cache_dir=CACHE_DIR, path=POLICY_CSV):
+    """
+    Returns the cache file used for a given source CSV and content hash.
+
+    Args:
+        source_hash (str): Hash returned by file_hash.
+        cache_dir (str or Path): Directory holding the cache files.
+        path (str or Path): Source CSV file.
+
+    Returns:
+        Path: Location of the Feather file.
+    """
+    return Path(cache_dir) / f"policy_data-v{CACHE_VERSION}-{source_key(path)}-{source_hash[:16]}.feather"
+
+
+def _remove_stale(cache_dir, keep, path):
+    # older contents of the same CSV, plus files of other cache versions
+    key = source_key(path)
+    for stale in Path(cache_dir).glob("policy_data-v*.feather"):
+        name = stale.name.split("-")
+        outdated = name[1] != f"v{CACHE_VERSION}" or len(name) != 4
+        if stale != keep and (outdated or name[2] == key):
+            stale.unlink(missing_ok=True)
+
+
+@instrumented("load_cached")
+def load_policy_data_cached(path=POLICY_CSV, cache_dir=CACHE_DIR, refresh=False):
+    """
+    Loads the cleaned policy table, reusing the binary cache when the CSV is unchanged.
+
+    Args:
+        path (str or Path): Source CSV file.
+        cache_dir (str or Path): Directory holding the cache files.
+        refresh (bool): Rebuild the cache even if it is up to date.
+
+    Returns:
+        pd.DataFrame: The cleaned policy table (same schema as load_policy_data).
+    """
+    if feather is None:
+        return load_policy_data(path)
+
+    target = cache_path(file_hash(path), cache_dir, path)
+    if target.exists() and not refresh:
+        return feather.read_table(target, memory_map=True).to_pandas()
+
+    data = load_policy_data(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # every writer uses its own temporary file and renames it into place, so a
+    # concurrent job never reads a partial file and two builds of the same cache
+    # do not write into each other's
+    with tempfile.NamedTemporaryFile(dir=target.parent, prefix=target.stem + "-", suffix=".tmp", delete=False) as tmp:
+        pass
+    try:
+        feather.write_feather(data, tmp.name, compression="uncompressed")
+        os.replace(tmp.name, target)
+    except BaseException:
+        Path(tmp.name).unlink(missing_ok=True)
+        raise
+    _remove_stale(cache_dir, keep=target, path=path)
+    return data
@@ -0,0 +1,473 @@
+"""
+Headless batch rendering of the analysis charts.
+
+The notebook draws its charts one by one on screen. This module describes the
+same charts as specs that carry only the aggregated series they plot, so every
+chart can be rendered independently: in parallel worker processes, without a
+display (figures are created with matplotlib's object API and saved through the
+Agg canvas), to PNG and/or SVG. A manifest lists every file written.
+
+Each manifest entry also stores the chart's fingerprint: a hash of exactly the
+series the chart plots plus its title, size, style and the renderer version. On the
+next run a chart whose fingerprint and files are unchanged is taken from the
+previous output instead of being drawn again, so after a small data edit only the
+charts whose numbers moved are re-rendered.
+
+Usage:
+    python scripts/policy_charts.py [--out charts] [--format png svg] [--workers N] [--no-cache]
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+
+import matplotlib
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+
+from policy_cube import PolicyCube
+from policy_data import (
+    DISABILITY,
+    EMPLOYMENT_COLUMNS,
+    REGIONS,
+    ROOT_DIR,
+    WOMEN,
+    YOUTH,
+)
+from policy_export import slugify
+from policy_instrument import stage
+
+CHARTS_FORMAT = "africa-policy-charts/1"
+CHARTS_DIR = ROOT_DIR / "charts"
+MANIFEST_NAME = "manifest.json"
+
+# Bump when a drawer changes so cached images are re-rendered
+RENDER_VERSION = 1
+
+# Legend / title names of the employment columns, as in the notebook
+EMPLOYMENT_TITLES = {
+    YOUTH: "Youth Employment",
+    WOMEN: "Women Employment",
+    DISABILITY: "Employment of People with Disabilities",
+}
+
+# Figure sizes the notebook uses for the regional pie charts
+PIE_FIGSIZES = {"North Africa": (12, 11), "Central Africa": (12, 11)}
+
+
+def _spec(name, kind, series, title, figsize, **style):
+    # one chart: the aggregated data it plots plus everything that affects its look
+    return {"name": name, "kind": kind, "series": series, "title": title, "figsize": figsize, "style": style}
+
+
+def chart_specs(data, regions=REGIONS):
+    """
+    Describes every chart of the analysis notebook.
+
+    Args:
+        data (pd.DataFrame): Cleaned policy table with the REGION column.
+        regions (dict): Region name -> list of countries.
+
+    Returns:
+        list: Chart specs (dicts with "name", "kind", "series", "title", "figsize"
+        and "style"); "series" holds only the aggregated data the chart draws.
+        Every series is read from one PolicyCube of the table.
+    """
+    cube = PolicyCube.from_frame(data)
+    specs = [
+        _spec("top-countries", "barh", cube.top_k("country"), "Top 10 Countries by Number of Policies",
+              (10, 5), xlabel="Number of Policies", ylabel="Country"),
+    ]
+
+    # regional top 10 policy classes and focus areas: grids, stacked totals, one chart per region
+    for axis, label, slug in (("policy_class", "Policy Classes", "policy-classes"), ("focus", "Focus Areas", "focus-areas")):
+        top = {region: cube.select(region=region).top_k(axis, 10) for region in regions}
+        top = {region: counts for region, counts in top.items() if len(counts)}
+        ylabel = "Policy Class" if axis == "policy_class" else "Focus Area"
+        specs.append(_spec(f"{slug}-by-region", "grid_barh", top, f"Top {label} in {{region}}", (15, 15),
+                           xlabel="Number of Policies", ylabel=ylabel))
+        specs.append(_spec(f"top-{slug}-by-region-stacked", "stacked_barh",
+                           pd.DataFrame(top).fillna(0).astype(int).T, f"Top 10 {label} by Region", (12, 8),
+                           xlabel="Number of Policies", ylabel=ylabel, legend="Region"))
+        for region, counts in top.items():
+            specs.append(_spec(f"{slug}-{slugify(region)}", "barh", counts, f"Top {label} in {region}", (12, 6),
+                               xlabel="Number of Policies", ylabel=ylabel))
+
+    for region in regions:
+        counts = cube.select(region=region).top_k("policy_class", None)
+        if len(counts):
+            specs.append(_spec(f"policy-class-distribution-{slugify(region)}", "pie", counts,
+                               f"Distribution of Policy Strategy Classes in {region}",
+                               PIE_FIGSIZES.get(region, (10, 10))))
+
+    # continent-wide charts
+    specs += [
+        _spec("top-focus-areas-africa", "barh", cube.top_k("focus"), "Top 10 Focus Areas in Africa", (12, 6),
+              xlabel="Number of mentions", ylabel="Focus Area"),
+        _spec("top-policy-classes-africa", "barh", cube.top_k("policy_class"), "Top 10 Policy Classes in Africa",
+              (12, 6), xlabel="Number of instances", ylabel="Policy Class"),
+        _spec("policy-class-distribution-africa", "pie", cube.top_k("policy_class", None),
+              "Distribution of Policy Strategy Classes in Africa", (10, 10)),
+    ]
+
+    # focus areas of the rows promoting each kind of employment (and all three)
+    subsets = [
+        ("youth", cube.select(youth=True), "Youth"),
+        ("women", cube.select(women=True), "women"),
+        ("disability", cube.select(disability=True), "Disability"),
+        ("all-employment", cube.select(youth=True, women=True, disability=True), "all"),
+    ]
+    for slug, subset, label in subsets:
+        title = f"Top 10 Focus Areas Promoting {label} Employment" if slug != "all-employment" \
+            else "Top 10 Focus Areas promoting all employments"
+        specs.append(_spec(f"focus-areas-promoting-{slug}", "barh", subset.top_k("focus"), title,
+                           (12, 6), xlabel="Number of employment created", ylabel="Focus Area"))
+
+    # youth employment Yes/No per region and per country
+    yes_no = {True: "Yes", False: "No"}
+    youth_by_region = {region: cube.select(region=region).top_k("youth", None).rename(yes_no) for region in regions}
+    specs += [
+        _spec("youth-employment-by-region", "grid_barh", youth_by_region, "Youth Employment Promotion in {region}",
+              (15, 15), xlabel="Number of Policies", ylabel="Promotion Status"),
+        _spec("youth-employment-overall", "barh", cube.top_k("youth", None).rename(yes_no),
+              "Youth Employment Promotion by Country", (12, 6), xlabel="Number of Policies", ylabel="Country"),
+        _spec("countries-least-youth-employment", "barh", cube.select(youth=False).top_k("country", None),
+              "Countries with Least Youth Employment Promotion", (12, 6), xlabel="Number of Policies",
+              ylabel="Country"),
+        _spec("countries-most-youth-employment", "barh", cube.select(youth=True).top_k("country", None),
+              "Countries with Most Youth Employment Promotion", (12, 6), xlabel="Number of Policies",
+              ylabel="Country"),
+    ]
+
+    # top / least 5 countries per employment type, continent-wide and per region
+    df_counts = cube.employment_counts()
+    for column in EMPLOYMENT_COLUMNS:
+        title = EMPLOYMENT_TITLES[column]
+        slug = slugify(title)
+        top, least = df_counts[column].nlargest(5), df_counts[column].nsmallest(5)
+        specs.append(_spec(f"top-5-{slug}", "employment_barh", top, f"Top 5 Countries Promoting {title}", (10, 6),
+                           color="forestgreen"))
+        if len(df_counts) > 5 or least.sum() > 0:
+            specs.append(_spec(f"least-5-{slug}", "employment_barh", least, f"Least 5 Countries Promoting {title}",
+                               (10, 6), color="indianred"))
+
+    for region, countries in regions.items():
+        regional = df_counts.reindex(countries).dropna()
+        if regional.empty:
+            continue
+        n = min(5, len(regional))
+        for column in EMPLOYMENT_COLUMNS:
+            title = EMPLOYMENT_TITLES[column]
+            top, least = regional[column].nlargest(n), regional[column].nsmallest(n)
+            if top.sum() > 0:
+                specs.append(_spec(f"top-{slugify(title)}-{slugify(region)}", "employment_barh", top,
+                                   f"Top {n} Countries Promoting {title} in {region}", (10, 6), color="forestgreen"))
+            if not top.equals(least):
+                specs.append(_spec(f"least-{slugify(title)}-{slugify(region)}", "employment_barh", least,
+                                   f"Least {n} Countries Promoting {title} in {region}", (10, 6), color="indianred"))
+
+    # regional stacked employment totals, regions sorted by their total
+    sums = cube.rollup_regions(regions).employment_counts("region", observed=False).rename(columns=EMPLOYMENT_TITLES)
+    sums.index.name = None
+    sums = sums.loc[sums.sum(axis=1).sort_values(kind="stable").index]
+    specs.append(_spec("regional-employment-stacked", "stacked_employment", sums,
+                       "Regional Promotion of Youth, Women, and Disability Employment", (12, 8),
+                       colors=["#4CAF50", "#FFC107", "#2196F3"]))
+
+    # number of countries with at least one row promoting each employment type
+    promoting = (df_counts > 0).sum().set_axis(["Youth", "Women", "Disability"])
+    specs.append(_spec("employment-counts-readable-labels", "bar", promoting,
+                       "Number of Countries Promoting Employment Types in Africa", (10, 6),
+                       colors=["forestgreen", "indianred", "steelblue"]))
+    return specs
+
+
+def _draw_barh(fig, spec):
+    ax = fig.subplots()
+    spec["series"].plot(kind="barh", ax=ax, title=spec["title"])
+    ax.set_xlabel(spec["style"]["xlabel"])
+    ax.set_ylabel(spec["style"]["ylabel"])
+
+
+def _draw_grid_barh(fig, spec):
+    axes = fig.subplots(nrows=3, ncols=2).flatten()
+    for ax, (region, counts) in zip(axes, spec["series"].items()):
+        counts.plot(kind="barh", ax=ax, title=spec["title"].format(region=region))
+        ax.set_xlabel(spec["style"]["xlabel"])
+        ax.set_ylabel(spec["style"]["ylabel"])
+        ax.invert_yaxis()  # largest value on top
+    for ax in axes[len(spec["series"]):]:
+        ax.axis("off")  # unused cells of the 3 x 2 grid
+
+
+def _draw_stacked_barh(fig, spec):
+    ax = fig.subplots()
+    spec["series"].plot(kind="barh", stacked=True, ax=ax)
+    ax.set_title(spec["title"])
+    ax.set_xlabel(spec["style"]["xlabel"])
+    ax.set_ylabel(spec["style"]["ylabel"])
+    ax.legend(title=spec["style"]["legend"], bbox_to_anchor=(1.05, 1), loc="upper left")
+
+
+def _draw_pie(fig, spec):
+    ax = fig.subplots()
+    counts = spec["series"]
+    ax.pie(counts, labels=counts.index, autopct="%1.1f%%", startangle=140,
+           textprops={"fontsize": 11, "fontweight": "bold"}, wedgeprops={"linewidth": 1, "edgecolor": "white"})
+    ax.set_title(spec["title"])
+    ax.axis("equal")
+
+
+def _style_axes(ax):
+    # white background, black text, no top/right spines (the notebook's plot_employment_data look)
+    ax.set_facecolor("white")
+    ax.tick_params(axis="x", rotation=0, labelsize=10, colors="black")
+    ax.tick_params(axis="y", labelsize=12, colors="black")
+    ax.spines["top"].set_visible(False)
+    ax.spines["right"].set_visible(False)
+    ax.spines["bottom"].set_color("black")
+    ax.spines["left"].set_color("black")
+    ax.grid(False)
+
+
+def _draw_employment_barh(fig, spec):
+    fig.patch.set_facecolor("white")
+    ax = fig.subplots()
+    counts = spec["series"]
+    ax.barh(counts.index, counts.values, color=spec["style"]["color"], height=0.7)
+    ax.set_title(spec["title"], fontsize=14, fontweight="bold", color="black")
+    ax.set_xlabel("Number of Policies Promoting Employment", fontsize=12, color="black")
+    ax.set_ylabel("Country", fontsize=12, color="black")
+    _style_axes(ax)
+    ax.invert_yaxis()
+
+
+def _draw_stacked_employment(fig, spec):
+    fig.patch.set_facecolor("white")
+    ax = fig.subplots()
+    sums = spec["series"]
+    left = np.zeros(len(sums))
+    for color, column in zip(spec["style"]["colors"], sums.columns):
+        ax.barh(sums.index, sums[column], left=left, height=0.7, color=color, label=column)
+        left += sums[column].to_numpy()
+    ax.set_title(spec["title"], fontsize=16, fontweight="bold", color="black")
+    ax.set_xlabel("Total Number of Focus areas", fontsize=12, color="black")
+    ax.set_ylabel("Region", fontsize=12, color="black")
+    _style_axes(ax)
+    ax.legend(title="Employment Type", bbox_to_anchor=(1.05, 1), loc="upper left", borderaxespad=0.0)
+    return {"rect": [0, 0, 0.85, 1]}  # room for the legend
+
+
+def _draw_bar(fig, spec):
+    ax = fig.subplots()
+    spec["series"].plot(kind="bar", ax=ax, color=spec["style"]["colors"])
+    ax.set_title(spec["title"], fontsize=16, fontweight="bold")
+    ax.set_xlabel("Employment Type", fontsize=14)
+    ax.set_ylabel("Number of Countries", fontsize=14)
+    ax.tick_params(axis="x", rotation=0)
+    ax.grid(axis="y", linestyle="--", alpha=0.7)
+
+
+DRAWERS = {
+    "barh": _draw_barh,
+    "grid_barh": _draw_grid_barh,
+    "stacked_barh": _draw_stacked_barh,
+    "pie": _draw_pie,
+    "employment_barh": _draw_employment_barh,
+    "stacked_employment": _draw_stacked_employment,
+    "bar": _draw_bar,
+}
+
+
+def _hash_data(digest, series):
+    # values, index and labels of a Series / DataFrame (or a dict of them)
+    if isinstance(series, dict):
+        for key, value in series.items():
+            digest.update(repr(key).encode("utf-8"))
+            _hash_data(digest, value)
+        return
+    labels = list(series.columns) if isinstance(series, pd.DataFrame) else [series.name]
+    digest.update(repr((type(series).__name__, labels, series.index.name)).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(series, index=True).to_numpy().tobytes())
+
+
+def chart_fingerprint(spec):
+    """
+    Hashes everything that determines how a chart looks.
+
+    Args:
+        spec (dict): Chart spec from chart_specs.
+
+    Returns:
+        str: Hex digest of the spec's series, kind, title, figure size and style,
+        the renderer version and the matplotlib version.
+    """
+    digest = hashlib.sha256()
+    header = [RENDER_VERSION, matplotlib.__version__, spec["kind"], spec["title"], list(spec["figsize"]), spec["style"]]
+    digest.update(json.dumps(header, sort_keys=True, default=str).encode("utf-8"))
+    _hash_data(digest, spec["series"])
+    return digest.hexdigest()
+
+
+def load_manifest(out_dir=CHARTS_DIR):
+    """
+    Reads the manifest of the previous render run.
+
+    Args:
+        out_dir (str or Path): Output directory.
+
+    Returns:
+        dict: Chart name -> manifest entry (empty if there is no manifest).
+    """
+    path = Path(out_dir) / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    if payload.get("format") != CHARTS_FORMAT:
+        return {}
+    return {entry["name"]: entry for entry in payload["charts"]}
+
+
+def _cached_entry(previous, fingerprint, out_dir, formats):
+    # the previous entry if it was rendered from the same inputs and all files are still there
+    if previous is None or previous.get("fingerprint") != fingerprint:
+        return None
+    if not all(fmt in previous["files"] and (Path(out_dir) / previous["files"][fmt]).exists() for fmt in formats):
+        return None
+    files = {fmt: previous["files"][fmt] for fmt in formats}
+    sizes = {fmt: previous["bytes"][fmt] for fmt in formats if fmt in previous.get("bytes", {})}
+    return {**previous, "cached": True, "files": files, "bytes": sizes}
+
+
+def _remove_stale_files(previous, entries, out_dir):
+    # files of the previous manifest that no chart of this run lists (dropped charts or formats)
+    kept = {name for entry in entries for name in entry["files"].values()}
+    for entry in previous.values():
+        for name in entry.get("files", {}).values():
+            if name not in kept:
+                (Path(out_dir) / name).unlink(missing_ok=True)
+
+
+def render_chart(spec, out_dir, formats=("png",)):
+    """
+    Renders one chart spec to files.
+
+    Uses a standalone Figure (no pyplot state, no GUI backend), so it is safe to
+    call from worker processes.
+
+    Args:
+        spec (dict): Chart spec from chart_specs.
+        out_dir (str or Path): Output directory.
+        formats (tuple): File formats, e.g. ("png", "svg").
+
+    Returns:
+        dict: Manifest entry with the chart's name, title, kind, fingerprint, files,
+        sizes in bytes and render time in seconds.
+    """
+    start = time.perf_counter()
+    with stage(f"chart:{spec['name']}"):
+        fig = Figure(figsize=spec["figsize"])
+        layout = DRAWERS[spec["kind"]](fig, spec) or {}
+        fig.tight_layout(**layout)
+
+        files, sizes = {}, {}
+        for fmt in formats:
+            path = Path(out_dir) / f"{spec['name']}.{fmt}"
+            fig.savefig(path, format=fmt)
+            files[fmt] = path.name
+            sizes[fmt] = path.stat().st_size
+    return {
+        "name": spec["name"],
+        "title": spec["title"],
+        "kind": spec["kind"],
+        "fingerprint": chart_fingerprint(spec),
+        "cached": False,
+        "files": files,
+        "bytes": sizes,
+        "seconds": round(time.perf_counter() - start, 4),
+    }
+
+
+def render_charts(specs, out_dir=CHARTS_DIR, formats=("png",), workers=None, use_cache=True):
+    """
+    Renders chart specs, fanning them out over a process pool.
+
+    Args:
+        specs (list): Chart specs from chart_specs.
+        out_dir (str or Path): Output directory (created if needed).
+        formats (tuple): File formats, e.g. ("png", "svg").
+        workers (int, optional): Worker processes; 1 renders in this process.
+            Defaults to the number of CPUs.
+        use_cache (bool): Reuse the files of charts whose fingerprint matches the
+            previous manifest in out_dir.
+
+    Returns:
+        list: Manifest entries in spec order ("cached" tells which were reused).
+        Files listed in the previous manifest but not in these entries are deleted.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    formats = tuple(formats)
+
+    entries = [None] * len(specs)
+    previous = load_manifest(out_dir)
+    if use_cache:
+        for i, spec in enumerate(specs):
+            entries[i] = _cached_entry(previous.get(spec["name"]), chart_fingerprint(spec), out_dir, formats)
+    todo = [i for i, entry in enumerate(entries) if entry is None]
+
+    workers = min(workers or os.cpu_count() or 1, max(len(todo), 1))
+    if workers == 1:
+        rendered = [render_chart(specs[i], out_dir, formats) for i in todo]
+    else:
+        chunksize = max(1, len(todo) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rendered = list(pool.map(render_chart, [specs[i] for i in todo], repeat(out_dir), repeat(formats),
+                                     chunksize=chunksize))
+    for i, entry in zip(todo, rendered):
+        entries[i] = entry
+    _remove_stale_files(previous, entries, out_dir)
+    return entries
+
+
+def write_manifest(entries, out_dir=CHARTS_DIR, **info):
+    """
+    Writes the manifest of a render run.
+
+    Args:
+        entries (list): Manifest entries from render_charts.
+        out_dir (str or Path): Output directory.
+        **info: Extra top-level fields (e.g. source hash, wall time).
+
+    Returns:
+        Path: The manifest file.
+    """
+    path = Path(out_dir) / MANIFEST_NAME
+    payload = {"format": CHARTS_FORMAT, **info, "charts": entries}
+    path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    return path
+
+
+if __name__ == "__main__":
+    from policy_cache import file_hash, load_policy_data_cached
+    from policy_data import POLICY_CSV
+
+    parser = argparse.ArgumentParser(description="Render every analysis chart headlessly.")
+    parser.add_argument("--out", default=CHARTS_DIR, help="output directory")
+    parser.add_argument("--format", nargs="+", default=["png"], choices=["png", "svg"], help="file formats")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--no-cache", action="store_true", help="re-render every chart")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    specs = chart_specs(load_policy_data_cached())
+    entries = render_charts(specs, args.out, tuple(args.format), args.workers, use_cache=not args.no_cache)
+    seconds = round(time.perf_counter() - start, 3)
+    manifest = write_manifest(entries, args.out, source_hash=file_hash(POLICY_CSV), seconds=seconds)
+    cached = sum(entry["cached"] for entry in entries)
+    print(f"{len(entries)} charts ({len(entries) - cached} rendered, {cached} from cache) in {seconds}s -> {manifest}")
@@ -0,0 +1,300 @@
+"""
+A precomputed count cube over the cleaned policy table.
+
+The notebook's charts all count rows by some combination of country, focus area,
+policy class and the three Yes/No employment flags. PolicyCube counts every
+combination once into an integer cube
+
+    country x focus x policy_class x youth x women x disability
+
+and answers those projections by slicing and summing the cube instead of rescanning
+the frame. Every axis ends with a None label for empty cells; the flag axes are
+[False, True, None]. Like value_counts, sums leave the None labels out unless
+dropna=False.
+
+    cube = PolicyCube.from_frame(data)
+    cube.select(youth=True).top_k("focus", 10)                     # focus areas promoting youth employment
+    cube.select(region="West Africa", women=True, focus="energy").total()
+    cube.rollup_regions().sum("region", "policy_class")            # region x class matrix
+
+The cube has about a million cells but only a few thousand are non-zero, so it is
+stored as the coordinates and counts of its non-zero cells (the dense array is
+available as .counts). A marginal over the axes a query touches is one np.bincount
+over those cells; marginals are memoized and shared by every cube selected from the
+same counts, so repeated queries only slice a few hundred cells.
+"""
+import numpy as np
+import pandas as pd
+
+from policy_data import COUNTRY, DISABILITY, EMPLOYMENT_COLUMNS, FOCUS, POLICY_CLASS, REGION, REGIONS, WOMEN, YOUTH
+from policy_instrument import instrumented
+
+# Cube axes and the table columns they count
+AXIS_COLUMNS = {
+    "country": COUNTRY,
+    "focus": FOCUS,
+    "policy_class": POLICY_CLASS,
+    "youth": YOUTH,
+    "women": WOMEN,
+    "disability": DISABILITY,
+}
+FLAG_AXES = ["youth", "women", "disability"]
+FLAG_LABELS = [False, True, None]
+
+
+class PolicyCube:
+    """
+    Integer counts over labelled axes.
+
+    Build it with from_frame. select is lazy (it only records which labels to
+    keep) and, like rollup_regions, returns a new cube.
+
+    Args:
+        coords (np.ndarray): Axis x cell array of the non-zero cells' label positions.
+        values (np.ndarray): Count of every non-zero cell.
+        labels (dict): Axis name -> list of labels, in coordinate order.
+    """
+
+    def __init__(self, coords, values, labels, _filters=None, _marginals=None):
+        self._coords = coords
+        self._values = values
+        self._all_labels = {axis: list(axis_labels) for axis, axis_labels in labels.items()}
+        self.axes = list(self._all_labels)
+        self._shape = tuple(len(axis_labels) for axis_labels in self._all_labels.values())
+        self._filters = _filters or {}  # axis -> kept label positions
+        self._marginals = _marginals if _marginals is not None else {}  # axes tuple -> dense marginal
+
+    @classmethod
+    def _from_codes(cls, codes, shape, labels, weights=None):
+        # collapses per-row (or per-cell) coordinates into unique non-zero cells
+        flat = np.ravel_multi_index(codes, shape)
+        cells, inverse = np.unique(flat, return_inverse=True)
+        values = np.bincount(inverse, weights=weights).astype(np.int64)
+        keep = values > 0
+        return cls(np.array(np.unravel_index(cells[keep], shape)), values[keep], labels)
+
+    @classmethod
+    @instrumented("cube")
+    def from_frame(cls, data):
+        """
+        Counts every axis combination of the cleaned table in one pass.
+
+        Args:
+            data (pd.DataFrame): Cleaned policy table.
+
+        Returns:
+            PolicyCube: The cube.
+        """
+        labels, codes = {}, []
+        for axis, column in AXIS_COLUMNS.items():
+            if axis in FLAG_AXES:
+                # False -> 0, True -> 1, <NA> -> 2
+                values = data[column]
+                labels[axis] = FLAG_LABELS
+                codes.append(np.where(values.isna(), 2, values.fillna(False).astype("int8")))
+            else:
+                categories = data[column].cat.categories.tolist()
+                labels[axis] = categories + [None]
+                column_codes = data[column].cat.codes.to_numpy()
+                codes.append(np.where(column_codes < 0, len(categories), column_codes))
+        shape = tuple(len(axis_labels) for axis_labels in labels.values())
+        return cls._from_codes(codes, shape, labels)
+
+    @property
+    def labels(self):
+        """
+        Returns:
+            dict: Axis name -> labels left after select.
+        """
+        return {axis: self._axis_labels(axis) for axis in self.axes}
+
+    @property
+    def counts(self):
+        """
+        Returns:
+            np.ndarray: The selected cube as a dense int64 array.
+        """
+        dense = np.zeros(self._shape, dtype=np.int64)
+        np.add.at(dense, tuple(self._coords), self._values)
+        for axis, keep in self._filters.items():
+            dense = np.take(dense, keep, axis=self._axis(axis))
+        return dense
+
+    def _axis(self, axis):
+        if axis not in self._all_labels:
+            raise KeyError(f"unknown axis {axis!r}; axes are {self.axes}")
+        return self.axes.index(axis)
+
+    def _axis_labels(self, axis):
+        labels = self._all_labels[axis]
+        return [labels[j] for j in self._filters[axis]] if axis in self._filters else list(labels)
+
+    def _marginal(self, axes):
+        # dense counts over the given axes (in axis order) of the unfiltered cube, memoized
+        axes = tuple(sorted(axes, key=self._axis))
+        if axes not in self._marginals:
+            positions = [self._axis(axis) for axis in axes]
+            shape = tuple(self._shape[i] for i in positions)
+            flat = np.ravel_multi_index(tuple(self._coords[positions]), shape) if axes else np.zeros_like(self._values)
+            self._marginals[axes] = np.bincount(flat, weights=self._values, minlength=int(np.prod(shape))) \
+                .astype(np.int64).reshape(shape)
+        return self._marginals[axes], axes
+
+    def select(self, region=None, **filters):
+        """
+        Keeps only some labels along one or more axes.
+
+        Args:
+            region (str, optional): On a cube with a "region" axis (see
+                rollup_regions), keep that region's label. Otherwise keep the
+                countries of this region (see REGIONS); combined with a country
+                filter, only the given countries of the region.
+            **filters: Axis name -> label or list of labels to keep, e.g.
+                youth=True, focus=["energy", "WASH"].
+
+        Returns:
+            PolicyCube: Cube with the same axes over the kept labels.
+        """
+        filters = list(filters.items())
+        if region is not None and "region" in self.axes:
+            filters.append(("region", region))
+        elif region is not None:
+            # applied after any country filter, so the two intersect
+            filters.append(("country", set(REGIONS[region])))
+        selected = dict(self._filters)
+        for axis, wanted in filters:
+            i = self._axis(axis)
+            wanted = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+            positions = selected.get(axis, range(self._shape[i]))
+            selected[axis] = [j for j in positions if self._all_labels[axis][j] in wanted]
+        return PolicyCube(self._coords, self._values, self._all_labels, selected, self._marginals)
+
+    def rollup_regions(self, regions=REGIONS):
+        """
+        Sums the countries of each region.
+
+        Args:
+            regions (dict): Region name -> list of countries.
+
+        Returns:
+            PolicyCube: Cube whose "country" axis is replaced by a "region" axis
+            (region names, then None for countries outside every region).
+        """
+        lookup = {country: region for region, members in regions.items() for country in members}
+        region_labels = list(regions) + [None]
+        to_region = np.array([region_labels.index(lookup.get(c)) for c in self._all_labels["country"]])
+
+        # apply the selection to the cells, then move every cell to its region
+        keep = np.ones(len(self._values), dtype=bool)
+        labels, codes = {}, []
+        for i, axis in enumerate(self.axes):
+            axis_codes = self._coords[i]
+            if axis in self._filters:
+                # renumber the kept labels 0..n-1 and drop cells outside the selection
+                remap = np.full(self._shape[i], -1)
+                remap[self._filters[axis]] = np.arange(len(self._filters[axis]))
+                keep &= remap[axis_codes] >= 0
+                if axis != "country":
+                    axis_codes = remap[axis_codes]
+            if axis == "country":
+                codes.append(to_region[axis_codes])
+                labels["region"] = region_labels
+            else:
+                codes.append(axis_codes)
+                labels[axis] = self._axis_labels(axis)
+        codes = [axis_codes[keep] for axis_codes in codes]
+        shape = tuple(len(axis_labels) for axis_labels in labels.values())
+        return PolicyCube._from_codes(codes, shape, labels, weights=self._values[keep])
+
+    def total(self):
+        """
+        Returns:
+            int: Number of rows counted in the cube (None labels included).
+        """
+        marginal, axes = self._marginal(self._filters)
+        for i, axis in enumerate(axes):
+            marginal = np.take(marginal, self._filters[axis], axis=i)
+        return int(marginal.sum())
+
+    def _reduce(self, keep, dropna):
+        # (counts array over the kept axes in keep order, label list per kept axis)
+        for axis in keep:
+            self._axis(axis)
+        summed, axes = self._marginal(set(keep) | set(self._filters))
+        for i, axis in enumerate(axes):
+            if axis in self._filters:
+                summed = np.take(summed, self._filters[axis], axis=i)
+        summed = summed.sum(axis=tuple(i for i, axis in enumerate(axes) if axis not in keep))
+        # the kept axes are in axis order: put them in the requested order
+        kept_axes = [axis for axis in axes if axis in keep]
+        summed = np.transpose(summed, [kept_axes.index(axis) for axis in keep])
+
+        labels = []
+        for axis in keep:
+            axis_labels = self._axis_labels(axis)
+            positions = [j for j, label in enumerate(axis_labels) if not (dropna and label is None)]
+            summed = np.take(summed, positions, axis=len(labels))
+            labels.append([axis_labels[j] for j in positions])
+        return summed, labels
+
+    def _index(self, axis, labels):
+        # flag labels are booleans; every other axis holds strings
+        dtype = bool if axis in FLAG_AXES and None not in labels else object
+        return pd.Index(labels, dtype=dtype, name=AXIS_COLUMNS.get(axis, REGION))
+
+    def sum(self, *keep, dropna=True):
+        """
+        Sums over every axis except the kept ones.
+
+        Args:
+            *keep (str): One or two axis names to keep, in output order.
+            dropna (bool): Leave out the None labels of the kept axes.
+
+        Returns:
+            pd.Series or pd.DataFrame: Counts labelled like value_counts ("count",
+            index named after the table column) for one axis, a matrix for two.
+        """
+        if len(keep) not in (1, 2):
+            raise ValueError("keep one or two axes")
+        summed, labels = self._reduce(keep, dropna)
+        indexes = [self._index(axis, axis_labels) for axis, axis_labels in zip(keep, labels)]
+        if len(keep) == 1:
+            return pd.Series(summed, index=indexes[0], name="count")
+        return pd.DataFrame(summed, index=indexes[0], columns=indexes[1])
+
+    def top_k(self, axis, k=10, ascending=False):
+        """
+        Ranks the labels of one axis by their count.
+
+        Args:
+            axis (str): Axis to rank.
+            k (int, optional): Number of labels kept; None keeps all.
+            ascending (bool): Rank the smallest counts first.
+
+        Returns:
+            pd.Series: Non-zero counts in rank order, ties in label order.
+        """
+        summed, (labels,) = self._reduce((axis,), True)
+        order = np.argsort(summed if ascending else -summed, kind="stable")
+        order = order[summed[order] > 0][:k]
+        return pd.Series(summed[order], index=self._index(axis, [labels[j] for j in order]), name="count")
+
+    def employment_counts(self, axis="country", observed=True):
+        """
+        Counts the rows marked "Yes" for each employment column along one axis.
+
+        Args:
+            axis (str): Axis of the rows, e.g. "country" or "region" after rollup_regions.
+            observed (bool): Leave out labels without any row.
+
+        Returns:
+            pd.DataFrame: Label x employment column matrix, like
+            employment_counts_by_country / counts_by_region.
+        """
+        columns = {}
+        for flag, column in zip(FLAG_AXES, EMPLOYMENT_COLUMNS):
+            columns[column] = self.select(**{flag: True}).sum(axis)
+        counts = pd.DataFrame(columns)
+        if observed:
+            counts = counts[self.sum(axis) > 0]
+        return counts
@@ -0,0 +1,179 @@
+"""
+Loading and cleaning of the climate tech policy spreadsheet.
+
+The notebook in analysis.py and the export/build scripts all start from the
+same cleaned table, so the schema lives here once instead of in a marimo cell.
+"""
+from pathlib import Path
+
+import pandas as pd
+
+from policy_instrument import instrumented
+
+# Repo locations (independent of the current working directory)
+ROOT_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = ROOT_DIR / "data"
+POLICY_CSV = DATA_DIR / "Wilma-climate tech policies.csv"
+
+# Rows per chunk when a spreadsheet is read in pieces
+DEFAULT_CHUNKSIZE = 200_000
+
+# Column names as they appear in the spreadsheet
+COUNTRY_ID = "Country ID"
+COUNTRY = "Country name"
+DOCUMENT_ID = "Document ID by country"
+DOCUMENT = "Government document"
+GREEN_TECH = "Policy targets green technology"
+FOCUS = "Focus areas"
+ACTION = "action or strategy"
+YOUTH = "Policy promotes youth employment"
+WOMEN = "Policy promotes women employment"
+DISABILITY = "policy promotes employment of people with disabilities"
+POLICY_CLASS = "Policy class"
+
+# Added by clean_policy_data
+REGION = "Region"
+
+# A document is identified by both IDs: "Document ID by country" restarts at 1 for every country
+DOCUMENT_KEY = [COUNTRY_ID, DOCUMENT_ID]
+
+# The three Yes/No employment columns
+EMPLOYMENT_COLUMNS = [YOUTH, WOMEN, DISABILITY]
+
+# Only the named columns are read; the trailing unnamed columns are dropped at parse time
+POLICY_COLUMNS = [
+    COUNTRY_ID,
+    COUNTRY,
+    DOCUMENT_ID,
+    DOCUMENT,
+    GREEN_TECH,
+    FOCUS,
+    ACTION,
+    YOUTH,
+    WOMEN,
+    DISABILITY,
+    POLICY_CLASS,
+]
+
+# Regions and their corresponding countries, spelled as in the spreadsheet and africa.geojson
+REGIONS = {
+    "North Africa": ["Algeria", "Egypt", "Libya", "Morocco", "Sudan", "Tunisia", "Western Sahara"],
+    "West Africa": ["Benin", "Burkina Faso", "Cape Verde", "The Gambia", "Ghana", "Guinea", "Guinea-Bissau", "Côte d'Ivoire", "Liberia", "Mali", "Mauritania", "Niger", "Nigeria", "Senegal", "Sierra Leone", "Togo"],
+    "Central Africa": ["Burundi", "Cameroon", "Central African Republic", "Chad", "Democratic Republic of Congo", "Republic of Congo", "Equatorial Guinea", "Gabon", "São Tomé and Príncipe"],
+    "East Africa": ["Comoros", "Djibouti", "Eritrea", "Ethiopia", "Kenya", "Madagascar", "Mauritius", "Rwanda", "Seychelles", "Somalia", "South Sudan", "Tanzania", "Uganda"],
+    "Southern Africa": ["Angola", "Botswana", "Eswatini", "Lesotho", "Malawi", "Mozambique", "Namibia", "South Africa", "Zambia", "Zimbabwe"],
+}
+
+CATEGORICAL_COLUMNS = [COUNTRY, DOCUMENT, GREEN_TECH, FOCUS, POLICY_CLASS, ACTION]
+
+# dtypes applied by read_csv; the employment columns are converted to booleans afterwards
+# because the sheet contains values like "policy cannot be found online"
+POLICY_DTYPES = {
+    COUNTRY_ID: "int32",
+    DOCUMENT_ID: "int32",
+    **{col: "category" for col in CATEGORICAL_COLUMNS},
+    **{col: "string" for col in EMPLOYMENT_COLUMNS},
+}
+
+
+def yes_no_to_bool(series):
+    """
+    Converts a Yes/No column to a nullable boolean column.
+
+    Values are compared case-insensitively after stripping whitespace;
+    anything other than yes/no (e.g. "policy cannot be found online") becomes <NA>.
+
+    Args:
+        series (pd.Series): Column holding Yes/No strings.
+
+    Returns:
+        pd.Series: Column with pandas "boolean" dtype.
+    """
+    normalized = series.astype("string").str.strip().str.lower()
+    return normalized.map({"yes": True, "no": False}).astype("boolean")
+
+
+def bool_to_yes_no(series, missing=None):
+    """
+    Converts a boolean employment column back to the "Yes"/"No" strings used by the web map.
+
+    Args:
+        series (pd.Series): Column with pandas "boolean" dtype.
+        missing (str, optional): Value written for <NA> entries. Defaults to None.
+
+    Returns:
+        pd.Series: Object column with "Yes", "No" or the missing value.
+    """
+    return series.map({True: "Yes", False: "No"}).astype(object).where(series.notna(), missing)
+
+
+def region_of(countries, regions=REGIONS):
+    """
+    Maps country names to their region.
+
+    Args:
+        countries (pd.Series): Country names.
+        regions (dict): Region name -> list of countries.
+
+    Returns:
+        pd.Series: Categorical region column (categories in the order of regions);
+        countries outside every region get NaN.
+    """
+    lookup = {country: region for region, members in regions.items() for country in members}
+    return pd.Series(
+        pd.Categorical(countries.astype(object).map(lookup), categories=list(regions)),
+        index=countries.index,
+    )
+
+
+@instrumented("clean")
+def clean_policy_data(df):
+    """
+    Applies the shared schema to a raw policy frame.
+
+    Args:
+        df (pd.DataFrame): Frame read with the spreadsheet's column names.
+
+    Returns:
+        pd.DataFrame: Frame restricted to POLICY_COLUMNS with categorical text
+        columns and boolean employment columns, plus the categorical REGION column.
+    """
+    data = df[POLICY_COLUMNS].copy()
+    for col in CATEGORICAL_COLUMNS:
+        if data[col].dtype != "category":
+            data[col] = data[col].astype("category")
+    for col in EMPLOYMENT_COLUMNS:
+        data[col] = yes_no_to_bool(data[col])
+    data[REGION] = region_of(data[COUNTRY])
+    return data
+
+
+@instrumented("load")
+def load_policy_data(path=POLICY_CSV):
+    """
+    Reads the policy spreadsheet with the explicit schema.
+
+    Args:
+        path (str or Path): CSV file to read. Defaults to the repo's policy sheet.
+
+    Returns:
+        pd.DataFrame: The cleaned policy table (see clean_policy_data).
+    """
+    df = pd.read_csv(path, usecols=POLICY_COLUMNS, dtype=POLICY_DTYPES)
+    return clean_policy_data(df)
+
+
+def read_policy_chunks(path=POLICY_CSV, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Reads the policy spreadsheet in cleaned chunks.
+
+    Args:
+        path (str or Path): CSV file to read.
+        chunksize (int): Rows per chunk.
+
+    Yields:
+        pd.DataFrame: Cleaned chunk (see clean_policy_data); categories are per chunk.
+    """
+    with pd.read_csv(path, usecols=POLICY_COLUMNS, dtype=POLICY_DTYPES, chunksize=chunksize) as reader:
+        for chunk in reader:
+            yield clean_policy_data(chunk)
@@ -0,0 +1,424 @@
+"""
+Builders and writers for the web map's policy data files.
+
+Per-country lists are row-aligned: index i of "Focus areas", "Policy class",
+"Document ID by country", ... always refers to the same spreadsheet row, with null
+for empty cells. Titles are not repeated on every row: each record carries a
+"documents" object mapping the country's document IDs to their title once, taken
+from the document table (build_document_table):
+
+    {"country": "Algeria", "documents": {"1": "National Climate Plan", ...},
+     "Focus areas": [...], "Document ID by country": [1, 1, 2, ...], ...}
+
+For the map's first screen only a small summary is needed; each country's full
+record is written to its own shard and fetched when the country is clicked:
+
+    {
+      "format": "africa-policy-summary/1",
+      "focus": [...], "class": [...],
+      "countries": {"Algeria": {"shard": "shards/algeria.json", "total_documents": 4,
+                                "rows": [[focus id, class id, number of rows], ...]}, ...}
+    }
+
+"rows" counts the country's rows per focus area / policy class combination (ids index
+"focus" and "class"; null for an empty cell), which is enough for the filter tooltips.
+"""
+import gzip
+import json
+import re
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from policy_aggregates import employment_flags
+from policy_data import (
+    ACTION,
+    COUNTRY,
+    DOCUMENT,
+    DOCUMENT_ID,
+    DOCUMENT_KEY,
+    EMPLOYMENT_COLUMNS,
+    FOCUS,
+    GREEN_TECH,
+    POLICY_CLASS,
+    REGION,
+    REGIONS,
+    bool_to_yes_no,
+)
+from policy_instrument import instrumented
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+FACETS_FORMAT = "africa-policy-facets/1"
+REGIONS_FORMAT = "africa-policy-regions/1"
+SUMMARY_FORMAT = "africa-policy-summary/1"
+
+# Shard directory, relative to the summary file
+SHARD_DIR = "shards"
+
+# Per-country list columns of the web export, in output order
+EXPORT_COLUMNS = [FOCUS, POLICY_CLASS, DOCUMENT_ID, GREEN_TECH, ACTION, *EMPLOYMENT_COLUMNS]
+
+# Per-country document ID -> title object of the web export
+DOCUMENTS = "documents"
+
+
+@instrumented("documents")
+def build_document_table(data):
+    """
+    Builds the document dimension: one row per (Country ID, Document ID by country).
+
+    The spreadsheet repeats a document's title on every one of its rows, and some
+    copies drift (autofilled years, trailing spaces). The table resolves every
+    document to one title, its first non-empty one stripped, as
+    policy_queries.country_documents does.
+
+    Args:
+        data (pd.DataFrame): Cleaned policy table.
+
+    Returns:
+        pd.DataFrame: Indexed by DOCUMENT_KEY in sorted order, with the document's
+        COUNTRY (first named row), title (DOCUMENT), first GREEN_TECH answer, number
+        of "rows" and the Yes/No employment flags (Yes if any of its rows says Yes).
+    """
+    keys = [data[col] for col in DOCUMENT_KEY]
+    first = data[[COUNTRY, DOCUMENT, GREEN_TECH]].astype(object).groupby(keys, sort=True).first()
+    flags = employment_flags(data).groupby(keys, sort=True).max()
+    table = first.assign(**{
+        DOCUMENT: first[DOCUMENT].str.strip(),
+        "rows": data.groupby(keys, sort=True).size(),
+        **{col: flags[col].map({1: "Yes", 0: "No"}) for col in EMPLOYMENT_COLUMNS},
+    })
+    return table.where(table.notna(), None)
+
+
+def document_titles(documents):
+    """
+    Groups the titles of the document table by country name.
+
+    Args:
+        documents (pd.DataFrame): Frame from build_document_table.
+
+    Returns:
+        dict: Country name -> {document ID as a string: title}, IDs in ascending
+        order; documents without a country name are left out.
+    """
+    titles = {}
+    for (_, document_id), country, title in zip(documents.index, documents[COUNTRY], documents[DOCUMENT]):
+        if country is not None:
+            titles.setdefault(country, {})[str(document_id)] = title
+    return titles
+
+
+def group_rows_by_country(data, columns=EXPORT_COLUMNS):
+    """
+    Collects each country's rows into row-aligned lists with one stable sort.
+
+    Args:
+        data (pd.DataFrame): Policy table with a categorical country column.
+        columns (list): Columns to collect.
+
+    Returns:
+        pd.DataFrame: One row per country (in category order) with a list per column;
+        missing cells are None so list positions stay aligned.
+    """
+    codes = data[COUNTRY].cat.codes.to_numpy()
+    order = np.argsort(codes, kind="stable")
+    order = order[codes[order] >= 0]  # rows without a country are skipped
+
+    counts = np.bincount(codes[order], minlength=len(data[COUNTRY].cat.categories))
+    present = np.flatnonzero(counts)
+    if len(present) == 0:
+        # np.split would still return one (empty) chunk
+        return pd.DataFrame(columns=[COUNTRY, *columns])
+    cuts = np.cumsum(counts[present])[:-1]
+
+    grouped = {COUNTRY: data[COUNTRY].cat.categories[present].tolist()}
+    for col in columns:
+        values = data[col].astype(object)
+        values = values.where(values.notna(), None).to_numpy()[order]
+        grouped[col] = [chunk.tolist() for chunk in np.split(values, cuts)]
+    return pd.DataFrame(grouped)
+
+
+@instrumented("group")
+def build_country_records(data):
+    """
+    Builds the grouped per-country frame behind africa_policy_data.json.
+
+    Args:
+        data (pd.DataFrame): Cleaned policy table.
+
+    Returns:
+        pd.DataFrame: Columns COUNTRY, DOCUMENTS and EXPORT_COLUMNS; the employment
+        columns hold the "Yes"/"No" strings the map expects (None when unknown).
+    """
+    export_data = data.assign(**{col: bool_to_yes_no(data[col]) for col in EMPLOYMENT_COLUMNS})
+    grouped = group_rows_by_country(export_data)
+    titles = document_titles(build_document_table(data))
+    grouped.insert(1, DOCUMENTS, [titles.get(country, {}) for country in grouped[COUNTRY]])
+    return grouped
+
+
+@instrumented("facets")
+def build_facet_index(data):
+    """
+    Precomputes which focus areas, policy classes and countries occur together.
+
+    Every list refers to positions in the "focus", "class" and "countries" name lists
+    (all sorted), so the map can answer a filter change with lookups:
+
+    - focus_classes[f] / focus_countries[f]: classes / countries with a row in focus area f
+    - class_focus[c] / class_countries[c]: focus areas / countries with a row in class c
+    - pairs: [f, c, [countries]] for every focus area / class combination that occurs
+
+    Args:
+        data (pd.DataFrame): Cleaned policy table.
+
+    Returns:
+        dict: Facet index payload.
+    """
+    combos = data[[FOCUS, POLICY_CLASS, COUNTRY]].dropna().astype(object).drop_duplicates()
+    focus_names = sorted(combos[FOCUS].unique())
+    class_names = sorted(combos[POLICY_CLASS].unique())
+    country_names = sorted(combos[COUNTRY].unique())
+
+    ids = pd.DataFrame({
+        "f": combos[FOCUS].map({name: i for i, name in enumerate(focus_names)}),
+        "c": combos[POLICY_CLASS].map({name: i for i, name in enumerate(class_names)}),
+        "n": combos[COUNTRY].map({name: i for i, name in enumerate(country_names)}),
+    })
+
+    def id_lists(key, value, size):
+        lists = ids.drop_duplicates([key, value]).groupby(key)[value].agg(lambda s: sorted(s.tolist()))
+        return [lists.get(i, []) for i in range(size)]
+
+    pairs = ids.groupby(["f", "c"])["n"].agg(lambda s: sorted(s.tolist()))
+    return {
+        "format": FACETS_FORMAT,
+        "focus": focus_names,
+        "class": class_names,
+        "countries": country_names,
+        "focus_classes": id_lists("f", "c", len(focus_names)),
+        "focus_countries": id_lists("f", "n", len(focus_names)),
+        "class_focus": id_lists("c", "f", len(class_names)),
+        "class_countries": id_lists("c", "n", len(class_names)),
+        "pairs": [[int(f), int(c), countries] for (f, c), countries in pairs.items()],
+    }
+
+
+def _ranked_counts(values):
+    # [[value, count], ...] by descending count, ties in first-seen order
+    counts = values.dropna().astype(object).value_counts(sort=False)
+    counts = counts.sort_values(ascending=False, kind="stable")
+    return [[value, int(count)] for value, count in counts.items()]
+
+
+@instrumented("regional_aggregates")
+def build_region_aggregates(data, regions=REGIONS):
+    """
+    Precomputes the per-region summaries shown in the map's region view.
+
+    Args:
+        data (pd.DataFrame): Cleaned policy table with the REGION column.
+        regions (dict): Region name -> list of countries (sets the country order).
+
+    Returns:
+        dict: Payload with a "regions" object keyed by region name. Each region has
+        the "Government document" titles (one per document, see build_document_table,
+        in first-row order), "total_documents", focus area and
+        policy class names ranked by frequency ("Focus areas", "Policy class") with
+        their counts ("Focus area counts", "Policy class counts"), the Yes/No
+        employment flags (Yes if any row in the region says Yes) and "countries".
+    """
+    titles = build_document_table(data)[DOCUMENT]
+    summaries = {}
+    for region, rows in data.groupby(REGION, observed=False, sort=False):
+        present = set(rows[COUNTRY].dropna().astype(object))
+        keys = pd.MultiIndex.from_frame(rows[DOCUMENT_KEY]).unique()
+        documents = [title for title in titles.loc[keys] if title is not None]
+        focus_counts = _ranked_counts(rows[FOCUS])
+        class_counts = _ranked_counts(rows[POLICY_CLASS])
+        summary = {
+            "Government document": documents,
+            "total_documents": len(keys),
+            "Focus areas": [name for name, _ in focus_counts],
+            "Policy class": [name for name, _ in class_counts],
+            "Focus area counts": focus_counts,
+            "Policy class counts": class_counts,
+            "countries": [country for country in regions[region] if country in present],
+        }
+        for col in EMPLOYMENT_COLUMNS:
+            summary[col] = "Yes" if rows[col].any() else "No"
+        summaries[region] = summary
+    ordered = {region: summaries[region] for region in regions if region in summaries}
+    return {"format": REGIONS_FORMAT, "regions": ordered}
+
+
+def slugify(text):
+    """
+    Turns a name into a lowercase ASCII file name stem.
+
+    Args:
+        text (str): Name such as "São Tomé and Príncipe".
+
+    Returns:
+        str: Slug such as "sao-tome-and-principe".
+    """
+    ascii_text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", "-", ascii_text.lower()).strip("-")
+
+
+def shard_name(country):
+    """
+    Returns the file name of a country's shard.
+
+    Args:
+        country (str): Country name.
+
+    Returns:
+        str: slugify(country) plus ".json", e.g. "sao-tome-and-principe.json".
+    """
+    return slugify(country) + ".json"
+
+
+@instrumented("country_summary")
+def build_country_summary(data):
+    """
+    Precomputes the per-country summary the map needs before any click.
+
+    Args:
+        data (pd.DataFrame): Cleaned policy table.
+
+    Returns:
+        dict: Summary payload (see module docstring), countries in category order.
+    """
+    rows = data[data[COUNTRY].notna()]
+    focus_names = sorted(rows[FOCUS].dropna().astype(object).unique())
+    class_names = sorted(rows[POLICY_CLASS].dropna().astype(object).unique())
+
+    # ids per row, -1 for an empty cell
+    ids = pd.DataFrame({
+        COUNTRY: rows[COUNTRY].astype(object),
+        "f": rows[FOCUS].astype(object).map({name: i for i, name in enumerate(focus_names)}).fillna(-1),
+        "c": rows[POLICY_CLASS].astype(object).map({name: i for i, name in enumerate(class_names)}).fillna(-1),
+    })
+    combos = ids.groupby([COUNTRY, "f", "c"], sort=True).size()
+    documents = rows.groupby(COUNTRY, observed=True)[DOCUMENT_ID].nunique()
+
+    countries = {}
+    for country in rows[COUNTRY].cat.categories:
+        if country not in documents.index:
+            continue
+        countries[country] = {
+            "shard": f"{SHARD_DIR}/{shard_name(country)}",
+            "total_documents": int(documents[country]),
+            "rows": [
+                [None if f < 0 else int(f), None if c < 0 else int(c), int(n)]
+                for (f, c), n in combos[country].items()
+            ],
+        }
+    return {"format": SUMMARY_FORMAT, "focus": focus_names, "class": class_names, "countries": countries}
+
+
+def write_json(payload, path, precompress=True):
+    """
+    Writes a payload as minified UTF-8 JSON, optionally with precompressed siblings.
+
+    A gzip sibling (path + ".gz") is always written when precompress is set;
+    a brotli sibling (path + ".br") is added when the brotli package is installed.
+    Static servers can hand these out directly with the matching Content-Encoding.
+
+    Args:
+        payload: JSON-serializable object.
+        path (str or Path): Output file.
+        precompress (bool): Also write the compressed siblings.
+
+    Returns:
+        dict: Output path -> size in bytes for every file written.
+    """
+    path = Path(path)
+    raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    outputs = {path: raw}
+    if precompress:
+        outputs[path.with_name(path.name + ".gz")] = gzip.compress(raw, compresslevel=9, mtime=0)
+        if brotli is not None:
+            outputs[path.with_name(path.name + ".br")] = brotli.compress(raw, quality=11)
+
+    sizes = {}
+    for out_path, content in outputs.items():
+        out_path.write_bytes(content)
+        sizes[str(out_path)] = len(content)
+    return sizes
+
+
+def write_facet_index(data, path, precompress=True):
+    """
+    Writes the facet index used by africa_map.js for filter lookups.
+
+    Args:
+        data (pd.DataFrame): Cleaned policy table.
+        path (str or Path): Output file, e.g. data/africa_policy_facets.json.
+        precompress (bool): Also write .gz (and .br when available) siblings.
+
+    Returns:
+        dict: Output path -> size in bytes for every file written.
+    """
+    return write_json(build_facet_index(data), path, precompress)
+
+
+def write_region_aggregates(data, path, precompress=True):
+    """
+    Writes the prebuilt region summaries used by the map's region view.
+
+    Args:
+        data (pd.DataFrame): Cleaned policy table with the REGION column.
+        path (str or Path): Output file, e.g. data/africa_policy_regions.json.
+        precompress (bool): Also write .gz (and .br when available) siblings.
+
+    Returns:
+        dict: Output path -> size in bytes for every file written.
+    """
+    return write_json(build_region_aggregates(data), path, precompress)
+
+
+def write_country_summary(data, path, precompress=True):
+    """
+    Writes the per-country summary loaded on the map's first screen.
+
+    Args:
+        data (pd.DataFrame): Cleaned policy table.
+        path (str or Path): Output file, e.g. data/africa_policy_summary.json.
+        precompress (bool): Also write .gz (and .br when available) siblings.
+
+    Returns:
+        dict: Output path -> size in bytes for every file written.
+    """
+    return write_json(build_country_summary(data), path, precompress)
+
+
+def write_country_shards(grouped, shard_dir, countries=None, precompress=True):
+    """
+    Writes one shard per country holding its full row-aligned record.
+
+    Args:
+        grouped (pd.DataFrame): Frame from build_country_records.
+        shard_dir (str or Path): Output directory, e.g. data/shards.
+        countries (list, optional): Only write these countries. Defaults to all.
+        precompress (bool): Also write .gz (and .br when available) siblings.
+
+    Returns:
+        dict: Output path -> size in bytes for every file written.
+    """
+    shard_dir = Path(shard_dir)
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    sizes = {}
+    for record in grouped.rename(columns={COUNTRY: "country"}).to_dict(orient="records"):
+        if countries is None or record["country"] in countries:
+            sizes.update(write_json(record, shard_dir / shard_name(record["country"]), precompress))
+    return sizes
@@ -0,0 +1,204 @@
+"""
+Merging of policy sheets from several sources into one table.
+
+Research teams send their own sheets, one per team and update round. ingest_sources
+parses a directory of them (.csv, and .xlsx when openpyxl is installed) on a process
+pool, maps each sheet's headers onto the shared column names (case and surrounding
+whitespace are ignored), cleans the combined rows with clean_policy_data and writes
+one merged CSV with the schema of the original spreadsheet.
+
+A document is identified by (Country ID, Document ID by country). When several
+sheets contain the same document, the rows of the sheet whose file name sorts last
+are kept and the other copies are dropped, so a later round ("round-2-...") replaces
+an earlier one and the result does not depend on which worker finishes first.
+
+Usage:
+    python scripts/policy_ingest.py sources_dir [--out data/merged-policies.csv] [--workers N]
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from policy_data import (
+    COUNTRY_ID,
+    DATA_DIR,
+    DOCUMENT_ID,
+    EMPLOYMENT_COLUMNS,
+    POLICY_COLUMNS,
+    POLICY_DTYPES,
+    bool_to_yes_no,
+    clean_policy_data,
+)
+from policy_instrument import instrumented
+
+SOURCE_SUFFIXES = (".csv", ".xlsx")
+MERGED_CSV = DATA_DIR / "merged-policies.csv"
+
+# Column added while merging: position of the row's sheet in sorted file-name order
+SOURCE = "_source"
+
+
+def discover_sources(directory):
+    """
+    Lists the policy sheets in a directory.
+
+    Args:
+        directory (str or Path): Directory holding the sheets.
+
+    Returns:
+        list: Paths of the .csv / .xlsx files, sorted by file name.
+    """
+    files = [p for p in Path(directory).iterdir() if p.is_file() and p.suffix.lower() in SOURCE_SUFFIXES]
+    return sorted(files, key=lambda p: p.name)
+
+
+def _column_mapping(columns, path):
+    # sheet header -> shared column name, matched case-insensitively after stripping
+    wanted = {col.strip().lower(): col for col in POLICY_COLUMNS}
+    mapping = {}
+    for col in columns:
+        key = str(col).strip().lower()
+        if key in wanted and wanted[key] not in mapping.values():
+            mapping[col] = wanted[key]
+    missing = [col for col in POLICY_COLUMNS if col not in mapping.values()]
+    if missing:
+        raise ValueError(f"{Path(path).name}: missing columns {missing}")
+    return mapping
+
+
+def read_source(path):
+    """
+    Reads one sheet and maps it onto the shared schema.
+
+    Args:
+        path (str or Path): .csv or .xlsx file.
+
+    Returns:
+        pd.DataFrame: The POLICY_COLUMNS of the sheet with the POLICY_DTYPES types,
+        not cleaned yet.
+
+    Raises:
+        ValueError: If a column of POLICY_COLUMNS is missing or the file type is unknown.
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        mapping = _column_mapping(pd.read_csv(path, nrows=0).columns, path)
+        dtypes = {source: POLICY_DTYPES[col] for source, col in mapping.items() if col in POLICY_DTYPES}
+        df = pd.read_csv(path, usecols=list(mapping), dtype=dtypes)
+    elif suffix == ".xlsx":
+        # needs openpyxl; read as text so the types below match the CSV path
+        df = pd.read_excel(path, dtype=object)
+        mapping = _column_mapping(df.columns, path)
+        df = df[list(mapping)]
+    else:
+        raise ValueError(f"{path.name}: unsupported file type {suffix!r}")
+    df = df.rename(columns=mapping)[POLICY_COLUMNS]
+    return df.astype({col: dtype for col, dtype in POLICY_DTYPES.items() if df[col].dtype != dtype})
+
+
+def _read_timed(path):
+    start = time.perf_counter()
+    df = read_source(path)
+    return df, time.perf_counter() - start
+
+
+@instrumented("merge")
+def merge_sources(frames):
+    """
+    Combines the sheets, keeping one copy of every document.
+
+    Args:
+        frames (list): Frames from read_source, in sorted file-name order.
+
+    Returns:
+        pd.DataFrame: Rows of every kept document with a SOURCE column holding the
+        position of their sheet in frames, ordered by Country ID and Document ID
+        (rows of one document keep their sheet order).
+    """
+    combined = pd.concat(
+        [df.assign(**{SOURCE: i}) for i, df in enumerate(frames)],
+        ignore_index=True,
+    )
+    # the last sheet that has a document wins
+    winner = combined.groupby([COUNTRY_ID, DOCUMENT_ID], sort=False)[SOURCE].transform("max")
+    merged = combined[combined[SOURCE] == winner]
+    return merged.sort_values([COUNTRY_ID, DOCUMENT_ID], kind="stable", ignore_index=True)
+
+
+def ingest_sources(paths, workers=None):
+    """
+    Parses sheets in parallel and merges them into one cleaned table.
+
+    Args:
+        paths (list): Sheet files; they are merged in sorted file-name order.
+        workers (int, optional): Worker processes; 1 parses in this process.
+            Defaults to the number of CPUs.
+
+    Returns:
+        tuple: (cleaned merged table, report) where report has one dict per sheet
+        with path, rows, documents, rows_kept and seconds.
+    """
+    paths = sorted((Path(p) for p in paths), key=lambda p: p.name)
+    if not paths:
+        raise ValueError("no policy sheets to ingest")
+
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    if workers == 1:
+        parsed = [_read_timed(p) for p in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parsed = list(pool.map(_read_timed, paths))
+
+    frames = [df for df, _ in parsed]
+    merged = merge_sources(frames)
+    kept = merged[SOURCE].value_counts()
+    report = [
+        {
+            "path": str(path),
+            "rows": len(df),
+            "documents": int(df[[COUNTRY_ID, DOCUMENT_ID]].drop_duplicates().shape[0]),
+            "rows_kept": int(kept.get(i, 0)),
+            "seconds": round(seconds, 4),
+        }
+        for i, (path, (df, seconds)) in enumerate(zip(paths, parsed))
+    ]
+    return clean_policy_data(merged.drop(columns=SOURCE)), report
+
+
+def write_merged(data, path=MERGED_CSV):
+    """
+    Writes a cleaned table as a CSV that load_policy_data reads back.
+
+    Args:
+        data (pd.DataFrame): Cleaned policy table.
+        path (str or Path): Output CSV.
+
+    Returns:
+        Path: The written file.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    out = data[POLICY_COLUMNS].assign(**{col: bool_to_yes_no(data[col]) for col in EMPLOYMENT_COLUMNS})
+    out.to_csv(path, index=False)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge a directory of policy sheets into one table.")
+    parser.add_argument("sources", help="directory of .csv / .xlsx sheets")
+    parser.add_argument("--out", default=MERGED_CSV, help="merged CSV")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    data, report = ingest_sources(discover_sources(args.sources), args.workers)
+    out = write_merged(data, args.out)
+    for entry in report:
+        print(f"{Path(entry['path']).name:<40} {entry['rows']:>9} rows {entry['documents']:>6} documents "
+              f"{entry['rows_kept']:>9} kept  {entry['seconds']:.2f}s")
+    print(f"{len(data)} rows -> {out} in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,275 @@
+"""
+Per-stage instrumentation of the pipeline.
+
+Stages are marked with the instrumented decorator or the stage context manager:
+
+    @instrumented("group")
+    def build_country_records(data): ...
+
+    with stage(f"chart:{name}") as s:
+        ...
+        s.rows_out = len(series)
+
+Tracing is off unless POLICY_TRACE names a JSON-lines file (or configure() is
+called); while it is off a stage costs one dictionary lookup. When it is on, every
+stage appends one line to that file:
+
+    {"stage": "group", "parent": "export", "pid": 4711, "start": 1760000000.1,
+     "wall_s": 0.021, "cpu_s": 0.020, "rss_bytes": 181000000,
+     "peak_rss_delta_bytes": 1200000, "rows_in": 5808, "rows_out": 55,
+     "profile": null, "error": null}
+
+peak_rss_delta_bytes is the highest resident memory seen while the stage ran minus
+the level at its start (sampled with psutil). rows_in is the length of the first
+DataFrame argument, rows_out the length of a DataFrame result.
+
+With POLICY_PROFILE_DIR set as well, each outermost stage also runs under cProfile
+and its stats are dumped to <dir>/<stage>-<pid>-<n>.prof (readable with pstats,
+snakeviz or flameprof for a flame graph).
+
+Usage:
+    POLICY_TRACE=trace.jsonl marimo run analysis.py
+    python scripts/policy_instrument.py trace.jsonl     per-stage totals of a trace
+"""
+import cProfile
+import contextvars
+import functools
+import itertools
+import json
+import os
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+import psutil
+
+TRACE_ENV = "POLICY_TRACE"
+PROFILE_ENV = "POLICY_PROFILE_DIR"
+
+_settings = {
+    "path": os.environ.get(TRACE_ENV) or None,
+    "profile_dir": os.environ.get(PROFILE_ENV) or None,
+}
+_current = contextvars.ContextVar("policy_stage", default=None)
+_profile_numbers = itertools.count(1)
+_write_lock = threading.Lock()
+
+
+def configure(path=None, profile_dir=None):
+    """
+    Turns tracing on (or off with path=None) for this process.
+
+    Worker processes started afterwards inherit the setting through the environment.
+
+    Args:
+        path (str or Path, optional): JSON-lines file the stage records are appended to.
+        profile_dir (str or Path, optional): Directory for per-stage cProfile dumps.
+    """
+    _settings["path"] = str(path) if path else None
+    _settings["profile_dir"] = str(profile_dir) if profile_dir else None
+    for env, value in ((TRACE_ENV, _settings["path"]), (PROFILE_ENV, _settings["profile_dir"])):
+        if value:
+            os.environ[env] = value
+        else:
+            os.environ.pop(env, None)
+
+
+def enabled():
+    """
+    Returns:
+        bool: True when stage records are being written.
+    """
+    return _settings["path"] is not None
+
+
+class PeakMemory:
+    """
+    Context manager sampling the process's resident memory in a background thread.
+
+    Args:
+        interval (float): Seconds between samples.
+
+    Attributes:
+        peak (int): Highest RSS seen minus the RSS at entry, in bytes.
+        rss (int): RSS at exit, in bytes.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0
+        self.rss = 0
+        self._process = psutil.Process()
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self._process.memory_info().rss - self._start)
+
+    def __enter__(self):
+        self._start = self._process.memory_info().rss
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.rss = self._process.memory_info().rss
+        self.peak = max(self.peak, self.rss - self._start)
+        return False
+
+
+class _Stage:
+    # one traced stage; rows_in / rows_out may be set by the code inside the block
+    def __init__(self, name, rows_in=None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self._profiler = None
+        self._profile_path = None
+
+    def __enter__(self):
+        self.parent = _current.get()
+        self._token = _current.set(self)
+        profile_dir = _settings["profile_dir"]
+        if profile_dir and not self._in_profile():
+            Path(profile_dir).mkdir(parents=True, exist_ok=True)
+            slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", self.name)
+            self._profile_path = Path(profile_dir) / f"{slug}-{os.getpid()}-{next(_profile_numbers)}.prof"
+            self._profiler = cProfile.Profile()
+        self._memory = PeakMemory().__enter__()
+        self._start = time.time()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        if self._profiler is not None:
+            self._profiler.enable()
+        return self
+
+    def _in_profile(self):
+        # only one profiler can be active: nested stages are covered by the outer dump
+        parent = self.parent
+        while parent is not None:
+            if parent._profiler is not None:
+                return True
+            parent = parent.parent
+        return False
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._profiler is not None:
+            self._profiler.disable()
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu
+        self._memory.__exit__(None, None, None)
+        _current.reset(self._token)
+        if self._profiler is not None:
+            self._profiler.dump_stats(self._profile_path)
+
+        record = {
+            "stage": self.name,
+            "parent": self.parent.name if self.parent is not None else None,
+            "pid": os.getpid(),
+            "start": round(self._start, 6),
+            "wall_s": round(wall, 6),
+            "cpu_s": round(cpu, 6),
+            "rss_bytes": self._memory.rss,
+            "peak_rss_delta_bytes": self._memory.peak,
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "profile": str(self._profile_path) if self._profile_path else None,
+            "error": exc_type.__name__ if exc_type else None,
+        }
+        line = json.dumps(record) + "\n"
+        with _write_lock, open(_settings["path"], "a", encoding="utf-8") as trace:
+            trace.write(line)
+        return False
+
+
+class _NoStage:
+    # shared stand-in while tracing is off; attribute writes are harmless
+    rows_in = rows_out = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_STAGE = _NoStage()
+
+
+def stage(name, rows_in=None):
+    """
+    Context manager recording one stage.
+
+    Args:
+        name (str): Stage name, e.g. "load" or "chart:focus_areas".
+        rows_in (int, optional): Number of input rows.
+
+    Returns:
+        Context manager yielding an object whose rows_in / rows_out can be set
+        inside the block (a no-op stand-in while tracing is off).
+    """
+    if _settings["path"] is None:
+        return _NO_STAGE
+    return _Stage(name, rows_in)
+
+
+def _frame_rows(values):
+    for value in values:
+        if isinstance(value, pd.DataFrame):
+            return len(value)
+    return None
+
+
+def instrumented(name):
+    """
+    Decorator recording every call of a function as a stage.
+
+    Args:
+        name (str): Stage name.
+
+    Returns:
+        function: Decorator.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _settings["path"] is None:
+                return func(*args, **kwargs)
+            with _Stage(name, _frame_rows(itertools.chain(args, kwargs.values()))) as traced:
+                result = func(*args, **kwargs)
+                traced.rows_out = _frame_rows([result])
+            return result
+        return wrapper
+    return decorate
+
+
+def summarize_trace(path):
+    """
+    Totals a trace file per stage.
+
+    Args:
+        path (str or Path): JSON-lines file written while tracing.
+
+    Returns:
+        pd.DataFrame: calls, wall_s, cpu_s (sums) and peak_rss_delta_bytes (max) per
+        stage, slowest first.
+    """
+    records = pd.read_json(path, lines=True)
+    totals = records.groupby("stage").agg(
+        calls=("wall_s", "size"),
+        wall_s=("wall_s", "sum"),
+        cpu_s=("cpu_s", "sum"),
+        peak_rss_delta_bytes=("peak_rss_delta_bytes", "max"),
+    )
+    return totals.sort_values("wall_s", ascending=False)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("usage: python scripts/policy_instrument.py trace.jsonl")
+    print(summarize_trace(sys.argv[1]).to_string())
@@ -0,0 +1,358 @@
+"""
+Read-only queries over the cleaned policy table.
+
+These answer the questions the map asks for one view at a time (which countries match
+a filter, which documents a country has, which actions a document lists) so a server
+can send just that slice instead of the whole dataset.
+
+Documents are identified by "<Country ID>-<Document ID by country>" (e.g. "7-2"),
+because "Document ID by country" alone restarts at 1 for every country.
+
+CachedPolicyQueries wraps the same queries for a long-running server: results are
+kept in an LRU cache keyed on the normalized arguments and dropped as soon as the
+source CSV's content hash changes. It also keeps a BitmapIndex of the table, so the
+map's filter combinations are answered from bitmaps instead of masks over the frame.
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from policy_bitmap import BitmapIndex
+from policy_data import (
+    ACTION,
+    COUNTRY,
+    COUNTRY_ID,
+    DOCUMENT,
+    DOCUMENT_ID,
+    EMPLOYMENT_COLUMNS,
+    FOCUS,
+    GREEN_TECH,
+    POLICY_CLASS,
+    POLICY_CSV,
+    REGION,
+    bool_to_yes_no,
+)
+from policy_cache import file_hash, load_policy_data_cached
+from policy_export import build_region_aggregates
+
+
+def document_key(country_id, document_id):
+    """
+    Builds the public identifier of a document.
+
+    Args:
+        country_id (int): Value of the "Country ID" column.
+        document_id (int): Value of the "Document ID by country" column.
+
+    Returns:
+        str: Identifier such as "7-2".
+    """
+    return f"{int(country_id)}-{int(document_id)}"
+
+
+def parse_document_key(key):
+    """
+    Splits a document identifier back into its two IDs.
+
+    Args:
+        key (str): Identifier built by document_key.
+
+    Returns:
+        tuple: (country_id, document_id) as ints.
+
+    Raises:
+        ValueError: If key is not of the form "<int>-<int>".
+    """
+    country_id, sep, document_id = str(key).partition("-")
+    if not sep:
+        raise ValueError(f"invalid document id: {key!r}")
+    return int(country_id), int(document_id)
+
+
+def _unique(values):
+    # distinct non-null values in first-seen order
+    return values.dropna().astype(object).unique().tolist()
+
+
+def _any_yes(values):
+    return "Yes" if values.any() else "No"
+
+
+def matching_countries(data, focus=None, policy_class=None, region=None, index=None):
+    """
+    Lists the countries with at least one row matching every given filter.
+
+    Args:
+        data (pd.DataFrame): Cleaned policy table.
+        focus (str, optional): Focus area; None matches all.
+        policy_class (str, optional): Policy class; None matches all.
+        region (str, optional): Region name; None matches all.
+        index (BitmapIndex, optional): Bitmap index of data; when given the
+            filters are evaluated on it instead of the frame.
+
+    Returns:
+        list: Sorted country names.
+    """
+    if index is not None:
+        filters = {"focus": focus, "policy_class": policy_class, "region": region}
+        rows = index.select(**{axis: value for axis, value in filters.items() if value is not None})
+        return sorted(index.count_by("country", rows).index)
+
+    mask = pd.Series(True, index=data.index)
+    for column, value in ((FOCUS, focus), (POLICY_CLASS, policy_class), (REGION, region)):
+        if value is not None:
+            mask &= data[column] == value
+    return sorted(_unique(data.loc[mask, COUNTRY]))
+
+
+def country_documents(data, country):
+    """
+    Summarizes the documents of one country.
+
+    Args:
+        data (pd.DataFrame): Cleaned policy table.
+        country (str): Country name as in the spreadsheet.
+
+    Returns:
+        list or None: One dict per document (id, title, number of actions, focus
+        areas, policy classes, green technology answers and the Yes/No employment
+        flags, Yes if any of its rows says Yes), ordered by document ID;
+        None if the country has no rows.
+    """
+    country_ids = data.loc[data[COUNTRY] == country, COUNTRY_ID].unique()
+    if len(country_ids) == 0:
+        return None
+
+    # select by ID so rows with a missing country name are still included
+    rows = data[data[COUNTRY_ID].isin(country_ids)]
+    documents = []
+    for (country_id, document_id), doc_rows in rows.groupby([COUNTRY_ID, DOCUMENT_ID], sort=True):
+        titles = _unique(doc_rows[DOCUMENT])
+        document = {
+            "id": document_key(country_id, document_id),
+            "title": titles[0].strip() if titles else None,
+            "actions": int(doc_rows[ACTION].notna().sum()),
+            "Focus areas": _unique(doc_rows[FOCUS]),
+            "Policy class": _unique(doc_rows[POLICY_CLASS]),
+            "Policy targets green technology": _unique(doc_rows[GREEN_TECH]),
+        }
+        for col in EMPLOYMENT_COLUMNS:
+            document[col] = _any_yes(doc_rows[col])
+        documents.append(document)
+    return documents
+
+
+def document_actions(data, key):
+    """
+    Lists the actions of one document.
+
+    Args:
+        data (pd.DataFrame): Cleaned policy table.
+        key (str): Document identifier (see document_key).
+
+    Returns:
+        dict or None: Document id, country, title and an "actions" list with one
+        entry per row (action text, focus area, policy class and the Yes/No
+        employment flags, null when unknown); None if the document does not exist.
+
+    Raises:
+        ValueError: If key is malformed.
+    """
+    country_id, document_id = parse_document_key(key)
+    rows = data[(data[COUNTRY_ID] == country_id) & (data[DOCUMENT_ID] == document_id)]
+    if rows.empty:
+        return None
+
+    columns = [ACTION, FOCUS, POLICY_CLASS]
+    actions = rows[columns].astype(object)
+    actions = actions.assign(**{col: bool_to_yes_no(rows[col]) for col in EMPLOYMENT_COLUMNS})
+    actions = actions.where(actions.notna(), None)
+
+    countries = _unique(rows[COUNTRY])
+    titles = _unique(rows[DOCUMENT])
+    return {
+        "id": document_key(country_id, document_id),
+        "country": countries[0] if countries else None,
+        "title": titles[0].strip() if titles else None,
+        "actions": actions.to_dict(orient="records"),
+    }
+
+
+def normalize_filter(value):
+    """
+    Normalizes a filter value so equivalent requests share a cache entry.
+
+    Args:
+        value (str or None): Raw filter value.
+
+    Returns:
+        str or None: The stripped value, or None for "no filter" (None, "" or "all"
+        in any case, the value of the map's "All" option).
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    return None if value == "" or value.lower() == "all" else value
+
+
+class LRUCache:
+    """
+    Least-recently-used cache bounded by entry count and by approximate size.
+
+    Args:
+        max_entries (int): Maximum number of cached results.
+        max_bytes (int): Maximum total size of the cached results, measured as the
+            length of their JSON encoding.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, max_entries=1024, max_bytes=32 << 20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, size), least recent first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key, compute):
+        """
+        Returns the cached result for key, computing and storing it on a miss.
+
+        Args:
+            key (tuple): Hashable cache key.
+            compute (callable): Called without arguments on a miss.
+
+        Returns:
+            The cached or freshly computed result.
+        """
+        with self._lock:
+            entry = self._entries.get(key, self._MISSING)
+            if entry is not self._MISSING:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        value = compute()
+        size = len(json.dumps(value, ensure_ascii=False, default=str))
+        if size > self.max_bytes:
+            return value  # too large to keep at all
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        """Drops every entry (the counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """
+        Returns the cache counters.
+
+        Returns:
+            dict: hits, misses, evictions, entries and bytes.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+
+class CachedPolicyQueries:
+    """
+    The query functions of this module over one CSV, with an LRU result cache.
+
+    Before each query the CSV is stat-ed; only when its size or modification time
+    changed is it re-hashed, and only when the hash changed is the table reloaded
+    and the cache cleared.
+
+    Args:
+        path (str or Path): Source CSV file.
+        max_entries (int): Maximum number of cached results.
+        max_bytes (int): Maximum approximate size of the cached results.
+    """
+
+    def __init__(self, path=POLICY_CSV, max_entries=1024, max_bytes=32 << 20):
+        self.path = path
+        self.cache = LRUCache(max_entries, max_bytes)
+        self.invalidations = 0
+        self._lock = threading.Lock()
+        self._stat = None
+        self.source_hash = None
+        self.data = None
+        self.index = None
+        self._refresh()
+
+    def _refresh(self):
+        stat = os.stat(self.path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        if signature == self._stat:
+            return
+        with self._lock:
+            if signature == self._stat:
+                return
+            source_hash = file_hash(self.path)
+            if source_hash != self.source_hash:
+                self.data = load_policy_data_cached(self.path)
+                self.index = BitmapIndex.from_frame(self.data)
+                if self.source_hash is not None:
+                    self.invalidations += 1
+                self.source_hash = source_hash
+                self.cache.clear()
+            self._stat = signature
+
+    def _cached(self, key, compute):
+        self._refresh()
+        # the hash is part of the key so a result computed while the CSV was being
+        # reloaded can never be served for the new version
+        source_hash, data, index = self.source_hash, self.data, self.index
+        return self.cache.get_or_compute((source_hash, *key), lambda: compute(data, index))
+
+    def matching_countries(self, focus=None, policy_class=None, region=None):
+        """Cached matching_countries; "" and "all" mean no filter."""
+        key = ("countries", normalize_filter(focus), normalize_filter(policy_class), normalize_filter(region))
+        return self._cached(key, lambda data, index: matching_countries(data, *key[1:], index=index))
+
+    def country_documents(self, country):
+        """Cached country_documents."""
+        key = ("documents", str(country).strip())
+        return self._cached(key, lambda data, index: country_documents(data, key[1]))
+
+    def document_actions(self, key):
+        """Cached document_actions; raises ValueError for malformed ids."""
+        document = parse_document_key(key)  # malformed ids are rejected before caching
+        return self._cached(("actions", *document), lambda data, index: document_actions(data, key))
+
+    def region_summaries(self):
+        """Cached build_region_aggregates payload."""
+        return self._cached(("regions",), lambda data, index: build_region_aggregates(data))
+
+    def stats(self):
+        """
+        Returns the cache counters plus the number of reloads caused by a changed CSV.
+
+        Returns:
+            dict: LRUCache.stats() with "invalidations" and "source_hash" added.
+        """
+        return {**self.cache.stats(), "invalidations": self.invalidations, "source_hash": self.source_hash}
@@ -0,0 +1,315 @@
+"""
+Full-text search over the policy actions and document titles.
+
+Every non-empty "action or strategy" cell and every document title becomes one
+entry of an inverted index: text is lowercased, split into word tokens, stripped
+of stop words and lightly stemmed ("policies" -> "policy", "manufacturing" and
+"manufactured" -> "manufactur"), and each term keeps the entries it occurs in with
+its token positions. Queries are ranked with BM25; with phrase=True the terms must
+also appear next to each other.
+
+The index is exported as a static artifact:
+
+    {
+      "format": "africa-policy-search/1",
+      "k1": 1.2, "b": 0.75,
+      "entries": [["7-2", 1534], ["7-2", null], ...],
+      "lengths": [12, 5, ...],
+      "postings": {"solar": [entry delta, tf, position, ..., entry delta, tf, ...], ...}
+    }
+
+An entry is [document id, row]: row is the table row of an action and null for a
+document title; document ids are the "<Country ID>-<Document ID by country>" keys
+of policy_queries. Entry numbers in a posting list are delta-encoded.
+
+Usage:
+    python scripts/policy_search.py                 (re)build data/africa_policy_search.json
+    python scripts/policy_search.py "solar pumps"   search the built index
+"""
+import json
+import math
+import re
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from policy_data import ACTION, COUNTRY_ID, DATA_DIR, DOCUMENT, DOCUMENT_ID
+from policy_export import write_json
+from policy_instrument import instrumented
+from policy_queries import document_key
+
+SEARCH_FORMAT = "africa-policy-search/1"
+SEARCH_INDEX_PATH = DATA_DIR / "africa_policy_search.json"
+
+# BM25 term-frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from has have in into is it its of on or such that "
+    "the their this to was were which will with".split()
+)
+
+_TOKEN = re.compile(r"[^\W_]+")
+
+
+@lru_cache(maxsize=65536)
+def stem(token):
+    """
+    Strips common English suffixes so inflected forms share one term.
+
+    This is deliberately light (plural, -ing/-ed and a final e) rather than a
+    full Porter stemmer; it only has to map the same word to the same term.
+
+    Args:
+        token (str): Lowercased token.
+
+    Returns:
+        str: Stemmed token.
+    """
+    if len(token) <= 3 or token.isdigit():
+        return token
+    if token.endswith("sses"):
+        token = token[:-2]
+    elif token.endswith("ies"):
+        token = token[:-3] + "y"
+    elif token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        token = token[:-1]
+    for suffix in ("ing", "ed"):
+        stemmed = token[:-len(suffix)]
+        if token.endswith(suffix) and len(stemmed) >= 3 and re.search("[aeiouy]", stemmed):
+            token = stemmed
+            break
+    if token.endswith("e") and len(token) > 4:
+        token = token[:-1]
+    return token
+
+
+def tokenize(text):
+    """
+    Splits text into index terms.
+
+    Args:
+        text (str): Raw text.
+
+    Returns:
+        list: Stemmed terms in order, stop words removed.
+    """
+    return [stem(token) for token in _TOKEN.findall(str(text).lower()) if token not in STOP_WORDS]
+
+
+def search_entries(data):
+    """
+    Lists the texts that get indexed.
+
+    Args:
+        data (pd.DataFrame): Cleaned policy table.
+
+    Returns:
+        list: (document id, row, text) tuples, one per action row followed by one
+        per document title (row None).
+    """
+    keys = [document_key(c, d) for c, d in zip(data[COUNTRY_ID], data[DOCUMENT_ID])]
+    actions = data[ACTION].astype(object).to_numpy()
+    entries = [(key, row, text) for row, (key, text) in enumerate(zip(keys, actions)) if isinstance(text, str)]
+
+    titles = {}
+    for key, title in zip(keys, data[DOCUMENT].astype(object)):
+        if isinstance(title, str):
+            titles.setdefault(key, title.strip())
+    entries += [(key, None, title) for key, title in titles.items()]
+    return entries
+
+
+class SearchIndex:
+    """
+    Inverted index with BM25 ranking.
+
+    Build it with build_search_index or load an exported artifact with
+    load_search_index.
+
+    Args:
+        entries (list): [document id, row] per entry.
+        lengths (list): Number of terms per entry.
+        postings (dict): Term -> list of (entry, positions) pairs in entry order.
+        k1 (float): BM25 term-frequency saturation.
+        b (float): BM25 length normalization.
+    """
+
+    def __init__(self, entries, lengths, postings, k1=BM25_K1, b=BM25_B):
+        self.entries = [tuple(entry) for entry in entries]
+        self.lengths = np.asarray(lengths, dtype=np.float32)
+        self.postings = postings
+        self.k1 = k1
+        self.b = b
+
+        # per-term BM25 weights are fixed once the index is built, so they are
+        # computed here and a query only sums a few precomputed arrays
+        n = len(self.entries)
+        norm = k1 * (1 - b + b * self.lengths / max(float(self.lengths.mean()), 1.0)) if n else self.lengths
+        self._weights = {}
+        for term, posting in postings.items():
+            ids = np.fromiter((entry for entry, _ in posting), dtype=np.int32, count=len(posting))
+            tf = np.fromiter((len(positions) for _, positions in posting), dtype=np.float32, count=len(posting))
+            idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            self._weights[term] = (ids, idf * tf * (k1 + 1) / (tf + norm[ids]))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _phrase_entries(self, terms):
+        # entries where the terms occur at consecutive positions
+        positions = [dict(self.postings[term]) for term in terms]
+        matches = []
+        for entry, starts in positions[0].items():
+            candidates = set(starts)
+            for offset, following in enumerate(positions[1:], start=1):
+                later = following.get(entry)
+                if later is None:
+                    candidates = set()
+                    break
+                candidates &= {p - offset for p in later}
+            if candidates:
+                matches.append(entry)
+        return np.array(matches, dtype=np.int32)
+
+    def search(self, query, k=10, phrase=False):
+        """
+        Ranks the entries matching a query.
+
+        Args:
+            query (str): Free-text query; every term must match (AND semantics).
+            k (int): Maximum number of results.
+            phrase (bool): Require the terms to appear consecutively.
+
+        Returns:
+            list: Dicts with "document", "row" (None for a title) and "score",
+            best first.
+        """
+        terms = tokenize(query)
+        if not terms or any(term not in self._weights for term in terms):
+            return []
+
+        scores = np.zeros(len(self.entries), dtype=np.float32)
+        hits = np.zeros(len(self.entries), dtype=np.int16)
+        for term in dict.fromkeys(terms):
+            ids, weights = self._weights[term]
+            scores[ids] += weights * terms.count(term)
+            hits[ids] += 1
+
+        matched = np.flatnonzero(hits == len(set(terms)))
+        if phrase and len(terms) > 1:
+            matched = np.intersect1d(matched, self._phrase_entries(terms))
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        matched = matched[np.argsort(-scores[matched], kind="stable")]
+
+        return [
+            {"document": self.entries[i][0], "row": self.entries[i][1], "score": float(scores[i])}
+            for i in matched
+        ]
+
+    def to_payload(self):
+        """
+        Encodes the index as the static artifact described in the module docstring.
+
+        Returns:
+            dict: JSON-serializable payload.
+        """
+        postings = {}
+        for term in sorted(self.postings):
+            flat, previous = [], 0
+            for entry, positions in self.postings[term]:
+                flat += [entry - previous, len(positions), *positions]
+                previous = entry
+            postings[term] = flat
+        return {
+            "format": SEARCH_FORMAT,
+            "k1": self.k1,
+            "b": self.b,
+            "entries": [list(entry) for entry in self.entries],
+            "lengths": self.lengths.astype(int).tolist(),
+            "postings": postings,
+        }
+
+
+@instrumented("search_index")
+def build_search_index(data):
+    """
+    Indexes the actions and document titles of the policy table.
+
+    Args:
+        data (pd.DataFrame): Cleaned policy table.
+
+    Returns:
+        SearchIndex: The index.
+    """
+    entries, lengths, postings = [], [], {}
+    for entry, (key, row, text) in enumerate(search_entries(data)):
+        terms = tokenize(text)
+        positions = {}
+        for position, term in enumerate(terms):
+            positions.setdefault(term, []).append(position)
+        for term, term_positions in positions.items():
+            postings.setdefault(term, []).append((entry, term_positions))
+        entries.append((key, row))
+        lengths.append(len(terms))
+    return SearchIndex(entries, lengths, postings)
+
+
+def load_search_index(path=SEARCH_INDEX_PATH):
+    """
+    Reads an index written by write_search_index.
+
+    Args:
+        path (str or Path): Artifact file.
+
+    Returns:
+        SearchIndex: The index.
+    """
+    payload = json.loads(Path(path).read_text(encoding="utf-8"))
+    if payload.get("format") != SEARCH_FORMAT:
+        raise ValueError(f"{path} is not a {SEARCH_FORMAT} file")
+
+    postings = {}
+    for term, flat in payload["postings"].items():
+        posting, entry, i = [], 0, 0
+        while i < len(flat):
+            entry += flat[i]
+            tf = flat[i + 1]
+            posting.append((entry, flat[i + 2:i + 2 + tf]))
+            i += 2 + tf
+        postings[term] = posting
+    return SearchIndex(payload["entries"], payload["lengths"], postings, payload["k1"], payload["b"])
+
+
+def write_search_index(data, path=SEARCH_INDEX_PATH, precompress=True):
+    """
+    Builds and writes the search index artifact.
+
+    Args:
+        data (pd.DataFrame): Cleaned policy table.
+        path (str or Path): Output file, e.g. data/africa_policy_search.json.
+        precompress (bool): Also write .gz (and .br when available) siblings.
+
+    Returns:
+        dict: Output path -> size in bytes for every file written.
+    """
+    return write_json(build_search_index(data).to_payload(), path, precompress)
+
+
+if __name__ == "__main__":
+    from policy_cache import load_policy_data_cached
+
+    data = load_policy_data_cached()
+    if len(sys.argv) == 1:
+        for out_path, size in write_search_index(data).items():
+            print(f"{out_path}: {size} bytes")
+    else:
+        index = load_search_index()
+        texts = {(key, row): text for key, row, text in search_entries(data)}
+        for result in index.search(" ".join(sys.argv[1:])):
+            text = texts[(result["document"], result["row"])]
+            print(f"{result['score']:6.2f}  {result['document']:>6}  {text}")
@@ -0,0 +1,489 @@
+"""
+SQLite storage of the cleaned policy table.
+
+write_sqlite loads the table into a normalized database (stdlib sqlite3 only):
+
+    regions(region_id, name)
+    countries(country_id, name)                           country_id is the sheet's Country ID
+    country_names(name_id, name, region_id)               every distinct "Country name" once
+    documents(document_pk, country_id, document_id, title)
+    focus_areas(focus_id, name), policy_classes(class_id, name)
+    actions(action_id, text)                              every distinct action text once
+    rows(row_id, document_pk, name_id, focus_id, class_id, action_id,
+         green_tech, youth, women, disability)           one per spreadsheet row
+
+row_id is the row's position in the cleaned table; the flags are 1 / 0 / NULL. A row
+is counted for the country named in its own "Country name" cell (name_id is NULL
+when the cell is empty), so the country and region helpers leave such rows out
+exactly as the pandas aggregations do; documents belong to their Country ID.
+The indexes on rows lead with country, focus area, policy class and the flags and
+hold the other filter columns too, so the filtered counts below are answered from
+the indexes alone. Every table is filled with executemany inside one transaction,
+the indexes are built afterwards, and the file is written next to the target and
+renamed into place, so readers never see a half-written database.
+
+The query helpers mirror the notebook's aggregations and the map's queries:
+
+    conn = connect()
+    count_rows(conn, region="West Africa", women=True, focus="energy")
+    employment_counts_by_country(conn)       # like policy_aggregates.employment_counts_by_country
+    top_k_by_region(conn, "focus", 10)       # like policy_aggregates.top_k_by_region
+
+Usage:
+    python scripts/policy_sqlite.py [--csv path] [--db data/africa_policy.sqlite]
+"""
+import argparse
+import os
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+
+import pandas as pd
+
+import policy_aggregates
+from policy_data import (
+    ACTION,
+    COUNTRY,
+    COUNTRY_ID,
+    DATA_DIR,
+    DISABILITY,
+    DOCUMENT,
+    DOCUMENT_KEY,
+    EMPLOYMENT_COLUMNS,
+    FOCUS,
+    GREEN_TECH,
+    POLICY_CLASS,
+    POLICY_CSV,
+    REGION,
+    REGIONS,
+    WOMEN,
+    YOUTH,
+)
+from policy_export import build_document_table
+from policy_instrument import instrumented
+from policy_queries import document_key, parse_document_key
+from policy_queries import matching_countries as frame_matching_countries
+
+POLICY_DB = DATA_DIR / "africa_policy.sqlite"
+
+SCHEMA = """
+CREATE TABLE regions (
+    region_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE countries (
+    country_id INTEGER PRIMARY KEY,
+    name TEXT
+);
+CREATE TABLE country_names (
+    name_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    region_id INTEGER REFERENCES regions (region_id)
+);
+CREATE TABLE documents (
+    document_pk INTEGER PRIMARY KEY,
+    country_id INTEGER NOT NULL REFERENCES countries (country_id),
+    document_id INTEGER NOT NULL,
+    title TEXT,
+    UNIQUE (country_id, document_id)
+);
+CREATE TABLE focus_areas (
+    focus_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE policy_classes (
+    class_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE actions (
+    action_id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL
+);
+CREATE TABLE rows (
+    row_id INTEGER PRIMARY KEY,
+    document_pk INTEGER NOT NULL REFERENCES documents (document_pk),
+    name_id INTEGER REFERENCES country_names (name_id),
+    focus_id INTEGER REFERENCES focus_areas (focus_id),
+    class_id INTEGER REFERENCES policy_classes (class_id),
+    action_id INTEGER REFERENCES actions (action_id),
+    green_tech TEXT,
+    youth INTEGER,
+    women INTEGER,
+    disability INTEGER
+);
+"""
+
+# Built after the bulk insert; each one covers the filters and groupings of the helpers
+INDEXES = """
+CREATE INDEX rows_by_country ON rows (name_id, focus_id, class_id, youth, women, disability);
+CREATE INDEX rows_by_focus ON rows (focus_id, class_id, name_id, youth, women, disability);
+CREATE INDEX rows_by_class ON rows (class_id, focus_id, name_id, youth, women, disability);
+CREATE INDEX rows_by_flags ON rows (youth, women, disability, focus_id, class_id, name_id);
+CREATE INDEX rows_by_document ON rows (document_pk);
+CREATE INDEX country_names_by_region ON country_names (region_id, name_id);
+"""
+
+# Helper filter name -> SQL condition on the rows table r
+_FILTERS = {
+    "country": "r.name_id = (SELECT name_id FROM country_names WHERE name = ?)",
+    "region": "r.name_id IN (SELECT n.name_id FROM country_names n JOIN regions g USING (region_id) "
+              "WHERE g.name = ?)",
+    "focus": "r.focus_id = (SELECT focus_id FROM focus_areas WHERE name = ?)",
+    "policy_class": "r.class_id = (SELECT class_id FROM policy_classes WHERE name = ?)",
+    "youth": "r.youth = ?",
+    "women": "r.women = ?",
+    "disability": "r.disability = ?",
+}
+FLAG_COLUMNS = {"youth": YOUTH, "women": WOMEN, "disability": DISABILITY}
+
+# Axis name -> (id column of rows, lookup table, column name in the cleaned table)
+_AXES = {
+    "focus": ("focus_id", "focus_areas", FOCUS),
+    "policy_class": ("class_id", "policy_classes", POLICY_CLASS),
+}
+
+
+def _values(series):
+    # column as a list of Python values with None for missing entries (what sqlite3 binds)
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def _categories(series):
+    # (id, label) rows of a categorical column; ids are the category codes + 1
+    return list(enumerate(series.cat.categories.astype(str).tolist(), start=1))
+
+
+def _codes(series):
+    # ids of a categorical column's values (see _categories), None for missing entries
+    codes = (series.cat.codes + 1).astype("Int64")
+    return _values(codes.mask(codes == 0))
+
+
+@instrumented("sqlite_load")
+def write_sqlite(data, path=POLICY_DB):
+    """
+    Loads the cleaned table into a new SQLite database, replacing any old one.
+
+    Args:
+        data (pd.DataFrame): Cleaned policy table.
+        path (str or Path): Database file.
+
+    Returns:
+        Path: The database file.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.unlink(missing_ok=True)
+
+    # countries keyed by Country ID (owners of the documents), named after their first named row
+    names = data[[COUNTRY_ID, COUNTRY]].dropna().drop_duplicates(COUNTRY_ID).set_index(COUNTRY_ID)[COUNTRY]
+    countries = [(i, names.get(i)) for i in sorted(int(i) for i in data[COUNTRY_ID].unique())]
+
+    # the "Country name" values the rows are aggregated by, with their region
+    region_ids = {name: i for i, name in enumerate(REGIONS, start=1)}
+    lookup = {country: region_ids[region] for region, members in REGIONS.items() for country in members}
+    country_names = [(i, name, lookup.get(name)) for i, name in _categories(data[COUNTRY])]
+
+    # documents numbered in (Country ID, Document ID) order, one title each
+    document_pk = data.groupby(DOCUMENT_KEY, sort=True).ngroup() + 1
+    titles = build_document_table(data)[DOCUMENT]
+    documents = [
+        (pk, int(country_id), int(document_id), title)
+        for pk, ((country_id, document_id), title) in enumerate(titles.items(), start=1)
+    ]
+
+    rows = zip(
+        range(len(data)),
+        _values(document_pk),
+        _codes(data[COUNTRY]),
+        _codes(data[FOCUS]),
+        _codes(data[POLICY_CLASS]),
+        _codes(data[ACTION]),
+        _values(data[GREEN_TECH]),
+        *(_values(data[col].astype("Int8")) for col in EMPLOYMENT_COLUMNS),
+    )
+
+    conn = sqlite3.connect(tmp)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.executescript(SCHEMA)
+        with conn:  # one transaction for the whole load
+            conn.executemany("INSERT INTO regions VALUES (?, ?)", list(enumerate(REGIONS, start=1)))
+            conn.executemany("INSERT INTO countries VALUES (?, ?)", countries)
+            conn.executemany("INSERT INTO country_names VALUES (?, ?, ?)", country_names)
+            conn.executemany("INSERT INTO documents VALUES (?, ?, ?, ?)", documents)
+            conn.executemany("INSERT INTO focus_areas VALUES (?, ?)", _categories(data[FOCUS]))
+            conn.executemany("INSERT INTO policy_classes VALUES (?, ?)", _categories(data[POLICY_CLASS]))
+            conn.executemany("INSERT INTO actions VALUES (?, ?)", _categories(data[ACTION]))
+            conn.executemany("INSERT INTO rows VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.executescript(INDEXES)
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp, path)
+    return path
+
+
+def connect(path=POLICY_DB):
+    """
+    Opens a database written by write_sqlite read-only.
+
+    Args:
+        path (str or Path): Database file.
+
+    Returns:
+        sqlite3.Connection: The connection (usable from other threads).
+    """
+    uri = Path(path).resolve().as_uri() + "?mode=ro"
+    return sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+
+def _where(filters):
+    # (" WHERE ..." or "", parameters) for the helper filters that are not None
+    clauses, params = [], []
+    for name, value in filters.items():
+        if name not in _FILTERS:
+            raise KeyError(f"unknown filter {name!r}; filters are {list(_FILTERS)}")
+        if value is None:
+            continue
+        clauses.append(_FILTERS[name])
+        params.append(int(value) if name in FLAG_COLUMNS else value)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def count_rows(conn, **filters):
+    """
+    Counts the rows matching every filter.
+
+    Args:
+        conn (sqlite3.Connection): Database connection.
+        **filters: country, region, focus or policy_class names and youth / women /
+            disability booleans; None means no filter.
+
+    Returns:
+        int: Number of matching rows.
+    """
+    where, params = _where(filters)
+    return conn.execute(f"SELECT COUNT(*) FROM rows r{where}", params).fetchone()[0]
+
+
+def value_counts(conn, axis, **filters):
+    """
+    Counts the matching rows per focus area or policy class.
+
+    Args:
+        conn (sqlite3.Connection): Database connection.
+        axis (str): "focus" or "policy_class".
+        **filters: As for count_rows.
+
+    Returns:
+        pd.Series: Non-zero counts named "count" in descending order (ties by
+        name), indexed by the values and named after the table column.
+    """
+    id_column, table, column = _AXES[axis]
+    where, params = _where(filters)
+    rows = conn.execute(
+        f"SELECT t.name, COUNT(*) AS n FROM rows r JOIN {table} t ON t.{id_column} = r.{id_column}{where} "
+        f"GROUP BY t.name ORDER BY n DESC, t.name",
+        params,
+    ).fetchall()
+    return pd.Series(dict(rows), dtype="int64", name="count").rename_axis(column)
+
+
+def matching_countries(conn, focus=None, policy_class=None, region=None):
+    """
+    Lists the countries with at least one row matching every given filter.
+
+    Args:
+        conn (sqlite3.Connection): Database connection.
+        focus (str, optional): Focus area; None matches all.
+        policy_class (str, optional): Policy class; None matches all.
+        region (str, optional): Region name; None matches all.
+
+    Returns:
+        list: Sorted country names (as policy_queries.matching_countries).
+    """
+    where, params = _where({"focus": focus, "policy_class": policy_class, "region": region})
+    rows = conn.execute(
+        f"SELECT DISTINCT n.name FROM rows r JOIN country_names n USING (name_id){where} ORDER BY n.name",
+        params,
+    ).fetchall()
+    return [name for (name,) in rows]
+
+
+def employment_counts_by_country(conn):
+    """
+    Counts the rows marked "Yes" per country for each employment column.
+
+    Args:
+        conn (sqlite3.Connection): Database connection.
+
+    Returns:
+        pd.DataFrame: Country x employment column matrix, as
+        policy_aggregates.employment_counts_by_country.
+    """
+    counts = pd.read_sql_query(
+        "SELECT n.name, COALESCE(SUM(r.youth), 0), COALESCE(SUM(r.women), 0), COALESCE(SUM(r.disability), 0) "
+        "FROM rows r JOIN country_names n USING (name_id) GROUP BY n.name ORDER BY n.name",
+        conn,
+    )
+    counts.columns = [COUNTRY, *EMPLOYMENT_COLUMNS]
+    return counts.set_index(COUNTRY).astype("int64")
+
+
+def counts_by_region(conn):
+    """
+    Counts the rows marked "Yes" per region for each employment column.
+
+    Args:
+        conn (sqlite3.Connection): Database connection.
+
+    Returns:
+        pd.DataFrame: Region x employment column matrix with every region, as
+        policy_aggregates.counts_by_region.
+    """
+    counts = pd.read_sql_query(
+        "SELECT g.name, COALESCE(SUM(r.youth), 0), COALESCE(SUM(r.women), 0), COALESCE(SUM(r.disability), 0) "
+        "FROM regions g LEFT JOIN country_names n USING (region_id) LEFT JOIN rows r USING (name_id) "
+        "GROUP BY g.region_id ORDER BY g.region_id",
+        conn,
+    )
+    counts.columns = [REGION, *EMPLOYMENT_COLUMNS]
+    return counts.set_index(REGION).astype("int64")
+
+
+def top_k_by_region(conn, axis, k=10):
+    """
+    Finds the k most frequent focus areas or policy classes in each region.
+
+    Args:
+        conn (sqlite3.Connection): Database connection.
+        axis (str): "focus" or "policy_class".
+        k (int): Number of values kept per region.
+
+    Returns:
+        dict: Region name -> count Series in descending order (ties by name), as
+        policy_aggregates.top_k_by_region.
+    """
+    id_column, table, column = _AXES[axis]
+    rows = conn.execute(
+        f"""
+        SELECT region, name, n FROM (
+            SELECT g.name AS region, g.region_id, t.name, COUNT(*) AS n,
+                   ROW_NUMBER() OVER (PARTITION BY g.region_id ORDER BY COUNT(*) DESC, t.name) AS rank
+            FROM rows r
+            JOIN country_names n USING (name_id)
+            JOIN regions g USING (region_id)
+            JOIN {table} t ON t.{id_column} = r.{id_column}
+            GROUP BY g.region_id, t.name
+        ) WHERE rank <= ? ORDER BY region_id, rank
+        """,
+        (k,),
+    ).fetchall()
+    top = {region: {} for region in REGIONS}
+    for region, name, n in rows:
+        top[region][name] = n
+    return {
+        region: pd.Series(counts, dtype="int64", name="count").rename_axis(column)
+        for region, counts in top.items()
+    }
+
+
+def document_actions(conn, key):
+    """
+    Lists the actions of one document.
+
+    Args:
+        conn (sqlite3.Connection): Database connection.
+        key (str): Document identifier (see policy_queries.document_key).
+
+    Returns:
+        dict or None: As policy_queries.document_actions; None if the document
+        does not exist.
+
+    Raises:
+        ValueError: If key is malformed.
+    """
+    country_id, document_id = parse_document_key(key)
+    document = conn.execute(
+        "SELECT d.document_pk, c.name, d.title FROM documents d JOIN countries c USING (country_id) "
+        "WHERE d.country_id = ? AND d.document_id = ?",
+        (country_id, document_id),
+    ).fetchone()
+    if document is None:
+        return None
+
+    document_pk, country, title = document
+    rows = conn.execute(
+        "SELECT a.text, f.name, p.name, r.youth, r.women, r.disability FROM rows r "
+        "LEFT JOIN actions a USING (action_id) LEFT JOIN focus_areas f USING (focus_id) "
+        "LEFT JOIN policy_classes p USING (class_id) WHERE r.document_pk = ? ORDER BY r.row_id",
+        (document_pk,),
+    ).fetchall()
+    yes_no = {1: "Yes", 0: "No", None: None}
+    actions = [
+        {ACTION: action, FOCUS: focus, POLICY_CLASS: policy_class,
+         **{col: yes_no[flag] for col, flag in zip(EMPLOYMENT_COLUMNS, flags)}}
+        for action, focus, policy_class, *flags in rows
+    ]
+    return {
+        "id": document_key(country_id, document_id),
+        "country": country,
+        "title": title,
+        "actions": actions,
+    }
+
+
+def check_against_pandas(conn, data, k=10):
+    """
+    Compares the aggregation helpers with the pandas path on the same table.
+
+    Args:
+        conn (sqlite3.Connection): Database written from data.
+        data (pd.DataFrame): Cleaned policy table.
+        k (int): Number of values compared per region for the top-k helpers.
+
+    Returns:
+        list: Names of the helpers whose result differs; empty when all match.
+    """
+    mismatches = []
+    employment = policy_aggregates.employment_counts_by_country(data)
+    if employment_counts_by_country(conn).to_dict(orient="index") != employment.to_dict(orient="index"):
+        mismatches.append("employment_counts_by_country")
+    regions = policy_aggregates.counts_by_region(data)
+    if counts_by_region(conn).to_dict(orient="index") != regions.to_dict(orient="index"):
+        mismatches.append("counts_by_region")
+    for axis, (_, _, column) in _AXES.items():
+        expected = policy_aggregates.top_k_by_region(data, column, k)
+        actual = top_k_by_region(conn, axis, k)
+        if any(list(actual[region].items()) != list(expected[region].items()) for region in REGIONS):
+            mismatches.append(f"top_k_by_region({axis!r})")
+    for region in [None, *REGIONS]:
+        if matching_countries(conn, region=region) != frame_matching_countries(data, region=region):
+            mismatches.append(f"matching_countries(region={region!r})")
+    return mismatches
+
+
+if __name__ == "__main__":
+    from policy_cache import load_policy_data_cached
+
+    parser = argparse.ArgumentParser(description="Load the policy table into SQLite.")
+    parser.add_argument("--csv", default=POLICY_CSV, help="policy CSV")
+    parser.add_argument("--db", default=POLICY_DB, help="database file")
+    parser.add_argument("--check", action="store_true", help="compare the helpers with the pandas aggregations")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    data = load_policy_data_cached(args.csv)
+    db = write_sqlite(data, args.db)
+    print(f"{len(data)} rows -> {db} ({db.stat().st_size / 2**20:.1f} MiB) in {time.perf_counter() - start:.2f}s")
+    if args.check:
+        with closing(connect(db)) as conn:
+            mismatches = check_against_pandas(conn, data)
+        if mismatches:
+            raise SystemExit(f"differ from pandas: {', '.join(mismatches)}")
+        print("helpers match the pandas aggregations")
@@ -0,0 +1,404 @@
+"""
+Chunked ingestion for policy spreadsheets that do not fit in memory.
+
+The CSV is read in chunks of a fixed number of rows; each chunk is cleaned with the
+shared schema and folded into PolicyAggregates, which only keeps counters:
+
+    rows per (country, focus area, policy class)   country summary and facet index
+    Yes counts per country and per region          employment counts
+    focus area / policy class counters per region  region top-k and region summaries
+    document IDs per country, titles per region    total_documents, region documents
+
+The aggregates of two chunks (or of two files) merge by adding their counters, so
+their size depends on the number of distinct countries, documents and categories,
+not on the number of rows. The row-aligned per-country lists the shards need cannot be
+summarized; every chunk's lists are appended to one spill file per country and each
+shard is assembled from its spill file alone.
+
+export_streaming writes the summary, facet index, region summaries and shards,
+byte-identical to the full build. The whole-table files (africa_policy_data.json
+and the search index) are not produced in streaming mode.
+
+Usage:
+    python scripts/policy_stream.py [--csv path] [--out data_dir] [--chunksize 200000]
+"""
+import argparse
+import json
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+import pandas as pd
+
+from policy_aggregates import employment_flags
+from policy_build import FACETS_JSON, REGIONS_JSON, SUMMARY_JSON
+from policy_data import (
+    COUNTRY,
+    DATA_DIR,
+    DEFAULT_CHUNKSIZE,
+    DOCUMENT,
+    DOCUMENT_ID,
+    DOCUMENT_KEY,
+    EMPLOYMENT_COLUMNS,
+    FOCUS,
+    POLICY_CLASS,
+    POLICY_CSV,
+    REGION,
+    REGIONS,
+    read_policy_chunks,
+)
+from policy_export import (
+    DOCUMENTS,
+    EXPORT_COLUMNS,
+    FACETS_FORMAT,
+    REGIONS_FORMAT,
+    SHARD_DIR,
+    SUMMARY_FORMAT,
+    build_country_records,
+    build_document_table,
+    shard_name,
+    slugify,
+    write_json,
+)
+from policy_instrument import stage
+
+
+def _value(value):
+    # categorical NaN -> None, everything else as a plain Python object
+    return None if pd.isna(value) else value
+
+
+def _ordered_unique(values):
+    # dict used as an insertion-ordered set
+    return dict.fromkeys(values.dropna().astype(object))
+
+
+def _merge_titles(titles, other):
+    # keep the first title seen for every document, unless it was missing
+    for key, title in other.items():
+        if titles.get(key) is None:
+            titles[key] = title
+
+
+class PolicyAggregates:
+    """
+    Mergeable counters over any number of policy rows.
+
+    Build one per chunk with from_frame and fold them together with merge (update
+    does both); the result answers the same questions as the aggregations over a
+    fully loaded table.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.combos = Counter()  # (country, focus, class) -> rows, None for an empty cell
+        self.country_documents = {}  # country -> ordered set of document IDs
+        self.country_employment = {}  # country -> Counter of Yes rows per column
+        self.regions = {
+            region: {
+                "documents": {},  # (Country ID, Document ID) -> title, first-seen order
+                FOCUS: Counter(),
+                POLICY_CLASS: Counter(),
+                "countries": set(),
+                "employment": Counter(),
+            }
+            for region in REGIONS
+        }
+
+    @classmethod
+    def from_frame(cls, data):
+        """
+        Summarizes one cleaned chunk.
+
+        Args:
+            data (pd.DataFrame): Cleaned policy rows (see clean_policy_data).
+
+        Returns:
+            PolicyAggregates: Counters of these rows.
+        """
+        agg = cls()
+        agg.rows = len(data)
+        rows = data[data[COUNTRY].notna()]
+
+        combos = rows.groupby([COUNTRY, FOCUS, POLICY_CLASS], observed=True, dropna=False, sort=False).size()
+        for (country, focus, policy_class), n in combos.items():
+            agg.combos[(country, _value(focus), _value(policy_class))] += int(n)
+
+        for country, document_ids in rows.groupby(COUNTRY, observed=True, sort=False)[DOCUMENT_ID]:
+            agg.country_documents[country] = _ordered_unique(document_ids)
+        titles = build_document_table(data)[DOCUMENT]
+        flags = employment_flags(rows)
+        for country, counts in flags.groupby(rows[COUNTRY], observed=True).sum().iterrows():
+            agg.country_employment[country] = Counter(counts.to_dict())
+
+        for region, region_rows in rows.groupby(REGION, observed=True, sort=False):
+            summary = agg.regions[region]
+            keys = pd.MultiIndex.from_frame(region_rows[DOCUMENT_KEY]).unique()
+            summary["documents"] = dict(zip(keys, titles.loc[keys]))
+            for col in (FOCUS, POLICY_CLASS):
+                # value_counts(sort=False) keeps first-seen order, which the ranked lists use for ties
+                summary[col].update(region_rows[col].dropna().astype(object).value_counts(sort=False).to_dict())
+            summary["countries"] = set(region_rows[COUNTRY].astype(object))
+            summary["employment"].update(flags.loc[region_rows.index].sum().to_dict())
+        return agg
+
+    def merge(self, other):
+        """
+        Adds the counters of rows that come after this object's rows.
+
+        Args:
+            other (PolicyAggregates): Aggregates of later rows.
+
+        Returns:
+            PolicyAggregates: self.
+        """
+        self.rows += other.rows
+        self.combos.update(other.combos)
+        for country, document_ids in other.country_documents.items():
+            self.country_documents.setdefault(country, {}).update(document_ids)
+        for country, counts in other.country_employment.items():
+            self.country_employment.setdefault(country, Counter()).update(counts)
+        for region, summary in other.regions.items():
+            mine = self.regions[region]
+            _merge_titles(mine["documents"], summary["documents"])
+            mine[FOCUS].update(summary[FOCUS])
+            mine[POLICY_CLASS].update(summary[POLICY_CLASS])
+            mine["countries"] |= summary["countries"]
+            mine["employment"].update(summary["employment"])
+        return self
+
+    def update(self, data):
+        """
+        Folds a cleaned chunk into the aggregates.
+
+        Args:
+            data (pd.DataFrame): Cleaned policy rows.
+
+        Returns:
+            PolicyAggregates: self.
+        """
+        return self.merge(PolicyAggregates.from_frame(data))
+
+    def employment_counts(self, columns=EMPLOYMENT_COLUMNS):
+        """
+        Yes rows per country, as employment_counts_by_country returns them.
+
+        Returns:
+            pd.DataFrame: Country x column count matrix, countries sorted.
+        """
+        countries = sorted(self.country_employment)
+        counts = [[self.country_employment[c][col] for col in columns] for c in countries]
+        return pd.DataFrame(counts, index=pd.Index(countries, name=COUNTRY), columns=columns).astype(int)
+
+    def top_k(self, column, k=10):
+        """
+        The k most frequent values of a column per region, as top_k_by_region returns them.
+
+        Args:
+            column (str): FOCUS or POLICY_CLASS.
+            k (int): Number of values kept per region.
+
+        Returns:
+            dict: Region name -> count Series in descending order (ties by name).
+        """
+        top = {}
+        for region, summary in self.regions.items():
+            ranked = sorted(summary[column].items(), key=lambda item: (-item[1], item[0]))[:k]
+            top[region] = pd.Series(dict(ranked), dtype="int64", name="count").rename_axis(column)
+        return top
+
+    def country_summary(self):
+        """
+        Builds the same payload as policy_export.build_country_summary.
+
+        Returns:
+            dict: Summary payload.
+        """
+        focus_names = sorted({focus for _, focus, _ in self.combos if focus is not None})
+        class_names = sorted({c for _, _, c in self.combos if c is not None})
+        focus_ids = {name: i for i, name in enumerate(focus_names)}
+        class_ids = {name: i for i, name in enumerate(class_names)}
+
+        rows = {}
+        for (country, focus, policy_class), n in self.combos.items():
+            key = (focus_ids.get(focus, -1), class_ids.get(policy_class, -1))
+            rows.setdefault(country, {})[key] = n
+        countries = {}
+        for country in sorted(rows):
+            countries[country] = {
+                "shard": f"{SHARD_DIR}/{shard_name(country)}",
+                "total_documents": len(self.country_documents.get(country, ())),
+                "rows": [
+                    [None if f < 0 else f, None if c < 0 else c, n]
+                    for (f, c), n in sorted(rows[country].items())
+                ],
+            }
+        return {"format": SUMMARY_FORMAT, "focus": focus_names, "class": class_names, "countries": countries}
+
+    def facet_index(self):
+        """
+        Builds the same payload as policy_export.build_facet_index.
+
+        Returns:
+            dict: Facet index payload.
+        """
+        triples = {key for key in self.combos if None not in key}
+        focus_names = sorted({f for _, f, _ in triples})
+        class_names = sorted({c for _, _, c in triples})
+        country_names = sorted({n for n, _, _ in triples})
+        f_ids = {name: i for i, name in enumerate(focus_names)}
+        c_ids = {name: i for i, name in enumerate(class_names)}
+        n_ids = {name: i for i, name in enumerate(country_names)}
+        ids = {(f_ids[f], c_ids[c], n_ids[n]) for n, f, c in triples}
+
+        def id_lists(key, value, size):
+            lists = [set() for _ in range(size)]
+            for triple in ids:
+                lists[triple[key]].add(triple[value])
+            return [sorted(values) for values in lists]
+
+        pairs = {}
+        for f, c, n in ids:
+            pairs.setdefault((f, c), []).append(n)
+        return {
+            "format": FACETS_FORMAT,
+            "focus": focus_names,
+            "class": class_names,
+            "countries": country_names,
+            "focus_classes": id_lists(0, 1, len(focus_names)),
+            "focus_countries": id_lists(0, 2, len(focus_names)),
+            "class_focus": id_lists(1, 0, len(class_names)),
+            "class_countries": id_lists(1, 2, len(class_names)),
+            "pairs": [[f, c, sorted(pairs[(f, c)])] for f, c in sorted(pairs)],
+        }
+
+    def region_aggregates(self):
+        """
+        Builds the same payload as policy_export.build_region_aggregates.
+
+        Returns:
+            dict: Region summaries payload.
+        """
+        summaries = {}
+        for region, summary in self.regions.items():
+            # regions without rows are kept with empty summaries, as in the full build
+            documents = [title for title in summary["documents"].values() if title is not None]
+            ranked = {
+                col: sorted(summary[col].items(), key=lambda item: -item[1])  # stable: ties keep first-seen order
+                for col in (FOCUS, POLICY_CLASS)
+            }
+            summaries[region] = {
+                "Government document": documents,
+                "total_documents": len(summary["documents"]),
+                "Focus areas": [name for name, _ in ranked[FOCUS]],
+                "Policy class": [name for name, _ in ranked[POLICY_CLASS]],
+                "Focus area counts": [[name, n] for name, n in ranked[FOCUS]],
+                "Policy class counts": [[name, n] for name, n in ranked[POLICY_CLASS]],
+                "countries": [country for country in REGIONS[region] if country in summary["countries"]],
+                **{col: "Yes" if summary["employment"][col] else "No" for col in EMPLOYMENT_COLUMNS},
+            }
+        return {"format": REGIONS_FORMAT, "regions": summaries}
+
+
+def spill_country_lists(data, spill_dir):
+    """
+    Appends a chunk's row-aligned per-country lists to one spill file per country.
+
+    Every line of a spill file is {"country": name, "documents": {...}, <column>: [...], ...}
+    for one chunk.
+
+    Args:
+        data (pd.DataFrame): Cleaned chunk.
+        spill_dir (str or Path): Directory of the spill files.
+    """
+    if not data[COUNTRY].notna().any():
+        return  # nothing to spill from a chunk of unnamed rows
+    for record in build_country_records(data).rename(columns={COUNTRY: "country"}).to_dict(orient="records"):
+        path = Path(spill_dir) / f"{slugify(record['country'])}.jsonl"
+        with open(path, "a", encoding="utf-8") as spill:
+            spill.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+
+def write_shards_from_spill(spill_dir, shard_dir, precompress=True):
+    """
+    Writes every country's shard from its spill file, one country in memory at a time.
+
+    Args:
+        spill_dir (str or Path): Directory filled by spill_country_lists.
+        shard_dir (str or Path): Output directory, e.g. data/shards.
+        precompress (bool): Also write .gz (and .br when available) siblings.
+
+    Returns:
+        dict: Output path -> size in bytes for every file written.
+    """
+    shard_dir = Path(shard_dir)
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    sizes = {}
+    for spill in sorted(Path(spill_dir).glob("*.jsonl")):
+        record = None
+        with open(spill, encoding="utf-8") as lines:
+            for line in lines:
+                part = json.loads(line)
+                if record is None:
+                    record = part
+                else:
+                    _merge_titles(record[DOCUMENTS], part[DOCUMENTS])
+                    for col in EXPORT_COLUMNS:
+                        record[col] += part[col]
+        record[DOCUMENTS] = dict(sorted(record[DOCUMENTS].items(), key=lambda item: int(item[0])))
+        sizes.update(write_json(record, shard_dir / shard_name(record["country"]), precompress))
+    return sizes
+
+
+def stream_policy_csv(path=POLICY_CSV, chunksize=DEFAULT_CHUNKSIZE, spill_dir=None):
+    """
+    Folds a policy CSV into PolicyAggregates chunk by chunk.
+
+    Args:
+        path (str or Path): CSV file to read.
+        chunksize (int): Rows per chunk.
+        spill_dir (str or Path, optional): Also spill the per-country lists here.
+
+    Returns:
+        PolicyAggregates: Aggregates of the whole file.
+    """
+    aggregates = PolicyAggregates()
+    for chunk in read_policy_chunks(path, chunksize):
+        with stage("stream_chunk", rows_in=len(chunk)):
+            aggregates.update(chunk)
+            if spill_dir is not None:
+                spill_country_lists(chunk, spill_dir)
+    return aggregates
+
+
+def export_streaming(path=POLICY_CSV, data_dir=DATA_DIR, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Writes the summary, facet index, region summaries and shards with bounded memory.
+
+    Args:
+        path (str or Path): CSV file to read.
+        data_dir (str or Path): Output directory.
+        chunksize (int): Rows per chunk.
+
+    Returns:
+        dict: Output path -> size in bytes for the files written.
+    """
+    data_dir = Path(data_dir)
+    with tempfile.TemporaryDirectory(prefix="policy-spill-") as spill_dir:
+        aggregates = stream_policy_csv(path, chunksize, spill_dir)
+        sizes = write_shards_from_spill(spill_dir, data_dir / SHARD_DIR)
+    sizes.update(write_json(aggregates.facet_index(), data_dir / FACETS_JSON))
+    sizes.update(write_json(aggregates.region_aggregates(), data_dir / REGIONS_JSON))
+    sizes.update(write_json(aggregates.country_summary(), data_dir / SUMMARY_JSON))
+    return sizes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the map's summary files from a CSV in chunks.")
+    parser.add_argument("--csv", default=POLICY_CSV, help="policy spreadsheet to read")
+    parser.add_argument("--out", default=DATA_DIR, help="output data directory")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    args = parser.parse_args()
+
+    sizes = export_streaming(args.csv, args.out, args.chunksize)
+    print(f"{len(sizes)} files, {sum(sizes.values())} bytes")
@@ -0,0 +1,216 @@
+"""
+Synthetic policy spreadsheets of any size, for load testing.
+
+A model is learned from the real table:
+
+    country       weighted by its number of documents
+    document      rows per document, title and green-technology answer, drawn from
+                  the documents of the same country
+    row           the joint (focus area, policy class, youth, women, disability)
+                  combination, drawn from the rows of the same country
+    action text   number of words, drawn from the actions with the same focus area;
+                  the words themselves follow the vocabulary of all actions
+
+Documents are then generated one at a time from a seeded numpy generator and
+streamed to a CSV with the spreadsheet's columns, so the output is identical for a
+given seed and memory use does not grow with the file size. Output stops at the
+first document boundary after the requested number of rows or bytes.
+
+Usage:
+    python scripts/policy_synth.py out.csv (--rows N | --size 2G) [--seed 0]
+"""
+import argparse
+import csv
+import io
+
+import numpy as np
+
+from policy_data import (
+    ACTION,
+    COUNTRY,
+    COUNTRY_ID,
+    DOCUMENT,
+    DOCUMENT_ID,
+    EMPLOYMENT_COLUMNS,
+    FOCUS,
+    GREEN_TECH,
+    POLICY_CLASS,
+    POLICY_COLUMNS,
+    POLICY_CSV,
+    bool_to_yes_no,
+)
+
+# Document ID by country is read as int32
+MAX_DOCUMENTS_PER_COUNTRY = np.iinfo(np.int32).max
+
+PROFILE_COLUMNS = [FOCUS, POLICY_CLASS, *EMPLOYMENT_COLUMNS]
+
+_SIZE_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+
+def _cumulative(counts):
+    # cumulative probabilities for sampling with searchsorted(cum, uniform)
+    cum = np.cumsum(np.asarray(counts, dtype=np.float64))
+    return cum / cum[-1]
+
+
+def parse_size(text):
+    """
+    Parses a byte size such as "500M" or "2G".
+
+    Args:
+        text (str): Number with an optional K, M, G or T suffix (a trailing B is allowed).
+
+    Returns:
+        int: Size in bytes.
+    """
+    value = str(text).strip().upper().removesuffix("B")
+    unit = value[-1] if value and value[-1] in _SIZE_UNITS else ""
+    return int(float(value[:len(value) - len(unit)]) * _SIZE_UNITS[unit])
+
+
+def learn_policy_model(data):
+    """
+    Learns the distributions the generator samples from.
+
+    Args:
+        data (pd.DataFrame): Cleaned policy table.
+
+    Returns:
+        dict: "countries" (list of per-country dicts with id, name, documents,
+        rows_per_document, titles, green_tech, profiles and profile_cum),
+        "country_cum", "lengths" (focus area -> array of action word counts),
+        "vocabulary" and "vocabulary_cum".
+    """
+    data = data.dropna(subset=[COUNTRY])
+    # Yes/No as written in the CSV, "" for a missing answer
+    rows = data[[COUNTRY_ID, COUNTRY, DOCUMENT_ID, DOCUMENT, GREEN_TECH, FOCUS, POLICY_CLASS, ACTION]].astype(object)
+    for col in EMPLOYMENT_COLUMNS:
+        rows[col] = bool_to_yes_no(data[col], missing="")
+    rows = rows.where(rows.notna(), "")
+
+    countries = []
+    for (country_id, name), country_rows in rows.groupby([COUNTRY_ID, COUNTRY], sort=True):
+        documents = country_rows.groupby(DOCUMENT_ID, sort=True)
+        profiles = country_rows.groupby(PROFILE_COLUMNS, sort=True).size()
+        countries.append({
+            "id": int(country_id),
+            "name": name,
+            "documents": documents.ngroups,
+            "rows_per_document": documents.size().to_numpy(),
+            "titles": [str(title).strip() for title in documents[DOCUMENT].first()],
+            "green_tech": documents[GREEN_TECH].first().tolist(),
+            "profiles": list(profiles.index),
+            "profile_cum": _cumulative(profiles.to_numpy()),
+        })
+
+    words = rows[ACTION].str.split()
+    lengths = {focus: group.to_numpy() for focus, group in words.str.len().groupby(rows[FOCUS], sort=True)}
+    vocabulary = words.explode().dropna().value_counts(sort=False).sort_index()
+    return {
+        "countries": countries,
+        "country_cum": _cumulative([country["documents"] for country in countries]),
+        "lengths": lengths,
+        "vocabulary": vocabulary.index.to_numpy(dtype=object),
+        "vocabulary_cum": _cumulative(vocabulary.to_numpy()),
+    }
+
+
+def generate_documents(model, seed=0):
+    """
+    Yields synthetic documents forever.
+
+    Args:
+        model (dict): Output of learn_policy_model.
+        seed (int): Seed of the numpy generator.
+
+    Yields:
+        list: Rows of one document, each a list of values in POLICY_COLUMNS order.
+
+    Raises:
+        ValueError: If a country would need more than MAX_DOCUMENTS_PER_COUNTRY documents.
+    """
+    rng = np.random.default_rng(seed)
+    next_id = [0] * len(model["countries"])
+    while True:
+        c = int(np.searchsorted(model["country_cum"], rng.random(), side="right"))
+        country = model["countries"][c]
+        next_id[c] += 1
+        if next_id[c] > MAX_DOCUMENTS_PER_COUNTRY:
+            raise ValueError(f"more than {MAX_DOCUMENTS_PER_COUNTRY} documents for {country['name']}")
+
+        template = rng.integers(country["documents"])
+        n = int(country["rows_per_document"][rng.integers(country["documents"])])
+        picks = np.searchsorted(country["profile_cum"], rng.random(n), side="right")
+        profiles = [country["profiles"][p] for p in picks]
+        lengths = [model["lengths"][profile[0]] for profile in profiles]
+        lengths = [int(options[rng.integers(len(options))]) for options in lengths]
+        words = model["vocabulary"][np.searchsorted(model["vocabulary_cum"], rng.random(sum(lengths)), side="right")]
+        ends = np.cumsum(lengths)
+
+        head = [country["id"], country["name"], next_id[c], country["titles"][template], country["green_tech"][template]]
+        yield [
+            [*head, focus, " ".join(words[end - length:end]), youth, women, disability, policy_class]
+            for (focus, policy_class, youth, women, disability), length, end in zip(profiles, lengths, ends)
+        ]
+
+
+def write_synthetic_csv(path, model, rows=None, max_bytes=None, seed=0):
+    """
+    Streams a synthetic spreadsheet to a CSV file.
+
+    Args:
+        path (str or Path): Output CSV.
+        model (dict): Output of learn_policy_model.
+        rows (int): Stop once at least this many rows are written.
+        max_bytes (int): Stop once at least this many bytes are written.
+        seed (int): Seed of the generator.
+
+    Returns:
+        dict: "rows", "documents" and "bytes" written.
+
+    Raises:
+        ValueError: If neither rows nor max_bytes is given.
+    """
+    if rows is None and max_bytes is None:
+        raise ValueError("give rows or max_bytes")
+    written = {"rows": 0, "documents": 0, "bytes": 0}
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+
+    def flush(out):
+        chunk = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        out.write(chunk)
+        written["bytes"] += len(chunk)
+
+    with open(path, "wb") as out:
+        # the header goes out first so even an empty sheet can be loaded
+        writer.writerow(POLICY_COLUMNS)
+        flush(out)
+        for document in generate_documents(model, seed):
+            if (rows is not None and written["rows"] >= rows) or (max_bytes is not None and written["bytes"] >= max_bytes):
+                break
+            writer.writerows(document)
+            flush(out)
+            written["rows"] += len(document)
+            written["documents"] += 1
+    return written
+
+
+if __name__ == "__main__":
+    from policy_cache import load_policy_data_cached
+
+    parser = argparse.ArgumentParser(description="Write a synthetic policy spreadsheet.")
+    parser.add_argument("out", help="output CSV")
+    limit = parser.add_mutually_exclusive_group(required=True)
+    limit.add_argument("--rows", type=int, help="approximate number of rows")
+    limit.add_argument("--size", type=parse_size, help="approximate file size, e.g. 500M or 2G")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--csv", default=POLICY_CSV, help="spreadsheet to learn from")
+    args = parser.parse_args()
+
+    model = learn_policy_model(load_policy_data_cached(args.csv))
+    written = write_synthetic_csv(args.out, model, rows=args.rows, max_bytes=args.size, seed=args.seed)
+    print(f"{args.out}: {written['rows']} rows, {written['documents']} documents, {written['bytes']} bytes")